@@ -0,0 +1,122 @@
+"""
+Offline latency benchmark for recommender.get_recommendations.
+
+Record fixtures once (needs OPENAI_API_KEY and network):
+    python Benchmarks/bench_pipeline.py --mode record
+
+Replay them anywhere, with a synthetic latency model:
+    python Benchmarks/bench_pipeline.py --mode replay --latency lognormal:400,0.35
+
+The summary includes LLM usage per stage (tokens per call, latency per
+token, cost per query; from the recorded `usage` blocks). --compare fails
+when latency, prompt tokens per call or cost per query grew by more than
+--tolerance against an earlier --out file, e.g. after a prompt change:
+    python Benchmarks/bench_pipeline.py --out Benchmarks/baselines/pipeline.json
+    python Benchmarks/bench_pipeline.py --compare Benchmarks/baselines/pipeline.json
+
+Run from the Backend directory so the index paths resolve.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(BACKEND_DIR, "Evaluations", "Gen_AI Dataset.xlsx")
+
+
+def load_queries(sheets=("Train-Set", "Test-Set")):
+    from catalog import load_sheet
+
+    queries = []
+    for sheet in sheets:
+        df = load_sheet(DATASET, sheet)
+        queries.extend(df["Query"].dropna().unique().tolist())
+    return list(dict.fromkeys(queries))
+
+
+def summarize(latencies_ms):
+    arr = np.asarray(latencies_ms)
+    return {
+        "n": int(len(arr)),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+    }
+
+
+def compare(baseline, summary, tolerance):
+    """Descriptions of every figure that grew by more than `tolerance` (a fraction)."""
+    checks = [("p50_ms", baseline.get("p50_ms"), summary["p50_ms"]),
+              ("cost_usd_per_query", baseline.get("cost_usd_per_query"), summary["cost_usd_per_query"])]
+    for key, row in summary["usage"].items():
+        before = baseline.get("usage", {}).get(key)
+        if before:
+            checks.append((f"{key} prompt_tokens_per_call", before["prompt_tokens_per_call"], row["prompt_tokens_per_call"]))
+            checks.append((f"{key} latency_ms_per_call", before["latency_ms_per_call"], row["latency_ms_per_call"]))
+    return [f"{name}: {old:.4g} -> {new:.4g}" for name, old, new in checks
+            if old and new > old * (1 + tolerance)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--latency", default=None, help="OPENAI_REPLAY_LATENCY spec, e.g. fixed:250")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-recs", type=int, default=10)
+    parser.add_argument("--no-llm", action="store_true")
+    parser.add_argument("--out", default=None, help="Write the summary as JSON")
+    parser.add_argument("--compare", default=None, help="Summary JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # The replay layer reads its configuration at import time
+    os.environ["OPENAI_REPLAY_MODE"] = args.mode
+    if args.latency:
+        os.environ["OPENAI_REPLAY_LATENCY"] = args.latency
+    sys.path.insert(0, BACKEND_DIR)
+    from recommender import get_recommendations
+    from llm_usage import USAGE
+
+    queries = load_queries()
+    repeats = 1 if args.mode == "record" else args.repeats
+    print(f"Benchmarking {len(queries)} queries x {repeats} repeats ({args.mode})")
+
+    latencies = []
+    for _ in range(repeats):
+        for q in queries:
+            start = time.perf_counter()
+            get_recommendations(q, max_recs=args.max_recs, use_llm=not args.no_llm)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    summary = summarize(latencies)
+    usage = USAGE.snapshot()
+    totals = USAGE.totals()
+    summary["cost_usd_per_query"] = totals["cost_usd"] / len(latencies)
+    summary["prompt_tokens_per_query"] = totals["prompt_tokens"] / len(latencies)
+    summary["usage"] = usage
+    print(json.dumps({k: v for k, v in summary.items() if k != "usage"}, indent=2))
+    print(pd.DataFrame(usage).T[["calls", "prompt_tokens_per_call", "completion_tokens_per_call",
+                                 "latency_ms_per_call", "ms_per_completion_token", "cost_usd"]]
+          .to_string(float_format=lambda v: f"{v:.4g}"))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, summary, args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        print("\n❌ Regressed" if regressions else "\n✅ No regression")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare single-prompt and sharded LLM reranking on the Train-Set.
+
+Each query is retrieved once; every rerank mode then sees the same
+candidates. Quality comes from Evaluations/metrics.py, latency is the
+wall-clock time of the rerank step alone.
+
+    python Benchmarks/compare_rerank.py --shards 2,3,4
+
+Run from the Backend directory.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "Evaluations"))
+
+from metrics import group_relevant, evaluate, normalize_url
+from catalog import load_sheet
+
+DATASET = os.path.join(BACKEND_DIR, "Evaluations", "Gen_AI Dataset.xlsx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default="2,3,4")
+    parser.add_argument("--merges", default="tournament,score")
+    parser.add_argument("--max-recs", type=int, default=10)
+    args = parser.parse_args()
+
+    import recommender
+    from serving_config import get_setting
+
+    gt = load_sheet(DATASET, "Train-Set")
+    relevant = group_relevant(gt, "Query", "Assessment_url")
+    candidates = {
+        q: recommender.retrieve(q, top_k=get_setting("candidate_depth"))[:get_setting("rerank_depth")]
+        for q in relevant
+    }
+
+    modes = {"single": lambda q, c: recommender.llm_rerank(q, c, max_recs=args.max_recs)}
+    for n in (int(x) for x in args.shards.split(",")):
+        for merge in args.merges.split(","):
+            modes[f"sharded-{n}-{merge}"] = (
+                lambda q, c, n=n, merge=merge:
+                recommender.sharded_rerank(q, c, max_recs=args.max_recs, shards=n, merge=merge)
+            )
+
+    rows = []
+    for name, fn in modes.items():
+        predicted, timings = {}, []
+        for q, cands in candidates.items():
+            start = time.perf_counter()
+            ranked = fn(q, cands)
+            timings.append((time.perf_counter() - start) * 1000.0)
+            predicted[q] = [normalize_url(r.get("url", "")) for r in ranked]
+        summary, _ = evaluate(relevant, predicted, ks=[3, 5, 10])
+        rows.append({
+            "mode": name,
+            **summary["mean"].to_dict(),
+            "p50_ms": float(np.percentile(timings, 50)),
+            "p95_ms": float(np.percentile(timings, 95)),
+        })
+
+    table = pd.DataFrame(rows).set_index("mode")
+    cols = ["recall@5", "recall@10", "map@10", "ndcg@10", "mrr", "p50_ms", "p95_ms"]
+    print(table[cols].to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
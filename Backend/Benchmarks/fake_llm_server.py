@@ -0,0 +1,182 @@
+"""
+Minimal OpenAI-compatible server for load tests.
+
+Serves /v1/embeddings, /v1/responses and /v1/chat/completions with tunable
+latency and error rate, so the recommender can be driven at high concurrency
+without network access or API spend:
+
+    FAKE_LLM_LATENCY_MS=300 FAKE_LLM_ERROR_RATE=0.02 \
+        uvicorn --app-dir Benchmarks fake_llm_server:app --port 9100
+
+Point the service at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1.
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import random
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "50"))
+EMBED_LATENCY_MS = float(os.getenv("FAKE_LLM_EMBED_LATENCY_MS", "60"))
+ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+EMBED_DIM = int(os.getenv("FAKE_LLM_EMBED_DIM", "3072"))
+
+app = FastAPI(title="Fake LLM server")
+rng = random.Random(int(os.getenv("FAKE_LLM_SEED", "0")))
+
+
+async def simulate(base_ms):
+    """Sleep for the configured latency; return an error response if one is injected."""
+    await asyncio.sleep(max(0.0, rng.gauss(base_ms, JITTER_MS)) / 1000.0)
+    if rng.random() < ERROR_RATE:
+        status = rng.choice([429, 500, 503])
+        return JSONResponse(status_code=status, content={
+            "error": {"message": "Injected failure", "type": "server_error", "code": status}
+        })
+    return None
+
+
+def fake_embedding(text, dim):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vec = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vec / np.linalg.norm(vec)).tolist()
+
+
+def usage_for(prompt, completion=""):
+    p, c = len(prompt) // 4, len(completion) // 4
+    return {"input_tokens": p, "output_tokens": c, "total_tokens": p + c,
+            "prompt_tokens": p, "completion_tokens": c}
+
+
+def extract_candidate_ids(prompt):
+    """Pull the numbered candidate ids the rerank prompts list, one per line."""
+    return [int(i) for i in re.findall(r"^\[(\d+)\] ", prompt, re.MULTILINE)]
+
+
+def fake_completion(prompt):
+    """Answer each pipeline stage with a well-formed payload."""
+    if "relevant_test_types" in prompt:
+        return json.dumps({"relevant_test_types": ["K", "P"]})
+    if "max_duration" in prompt:
+        return json.dumps({"job_level": "mid-level", "max_duration": 45})
+    if "SHL test domains" in prompt:
+        return json.dumps(["K", "P"])
+
+    ids = extract_candidate_ids(prompt)
+    ranked = [
+        [idx, round(1.0 - rank / max(len(ids), 1), 3), "Matches the query"]
+        for rank, idx in enumerate(ids)
+    ]
+    return json.dumps(ranked)
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    if (err := await simulate(EMBED_LATENCY_MS)) is not None:
+        return err
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    dim = body.get("dimensions") or EMBED_DIM
+    text = " ".join(map(str, inputs))
+    return {
+        "object": "list",
+        "model": body.get("model"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(str(t), dim)}
+            for i, t in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": len(text) // 4, "total_tokens": len(text) // 4},
+    }
+
+
+def response_body(body, prompt, text):
+    return {
+        "id": f"resp_{int(time.time() * 1e6)}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model"),
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg_fake",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "usage": usage_for(prompt, text),
+    }
+
+
+def stream_events(body, prompt, text, chunk_chars=16):
+    """Emit Responses API stream events, spreading the latency over the text deltas."""
+    final = response_body(body, prompt, text)
+    chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+    delay = max(0.0, rng.gauss(LATENCY_MS, JITTER_MS)) / 1000.0 / (len(chunks) + 1)
+
+    async def events():
+        seq = 0
+        yield f"data: {json.dumps({'type': 'response.created', 'sequence_number': seq, 'response': {**final, 'status': 'in_progress', 'output': []}})}\n\n"
+        await asyncio.sleep(delay)
+        for chunk in chunks:
+            seq += 1
+            yield "data: " + json.dumps({
+                "type": "response.output_text.delta", "sequence_number": seq,
+                "item_id": "msg_fake", "output_index": 0, "content_index": 0,
+                "delta": chunk, "logprobs": [],
+            }) + "\n\n"
+            await asyncio.sleep(delay)
+        yield f"data: {json.dumps({'type': 'response.completed', 'sequence_number': seq + 1, 'response': final})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    body = await request.json()
+    prompt = body["input"] if isinstance(body["input"], str) else json.dumps(body["input"])
+    text = fake_completion(prompt)
+    if body.get("stream"):
+        # Time to first token is a fraction of the full latency
+        if (err := await simulate(LATENCY_MS * 0.2)) is not None:
+            return err
+        return stream_events(body, prompt, text)
+    if (err := await simulate(LATENCY_MS)) is not None:
+        return err
+    return response_body(body, prompt, text)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if (err := await simulate(LATENCY_MS)) is not None:
+        return err
+    prompt = body["messages"][-1]["content"]
+    text = fake_completion(prompt)
+    return {
+        "id": f"chatcmpl_{int(time.time() * 1e6)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": text},
+        }],
+        "usage": usage_for(prompt, text),
+    }
+
+
+@app.get("/v1/models")
+async def models():
+    # Used by recommender.warm_up to open the connection pool
+    return {"object": "list", "data": [
+        {"id": m, "object": "model", "created": 0, "owned_by": "fake"}
+        for m in ("gpt-4.1", "gpt-4o-mini", "text-embedding-3-large")
+    ]}
@@ -0,0 +1,128 @@
+"""
+Track cold-start cost against a budget.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports the total import time plus the slowest direct dependencies. With
+--startup it also times what the FastAPI lifespan does before the first
+request (importing recommender and recommender.warm_up()); that needs the
+index on disk and, for the connection warm-up, an API key or fake LLM server.
+
+    python Benchmarks/import_budget.py
+    python Benchmarks/import_budget.py --budget-ms 250 --startup
+    python Benchmarks/import_budget.py --out Benchmarks/baselines/import_budget.json
+    python Benchmarks/import_budget.py --compare Benchmarks/baselines/import_budget.json
+
+Exits with status 1 when a budget is exceeded, so it can gate CI.
+Run from the Backend directory.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+rec = main.engine()
+engine_loaded = time.perf_counter()
+timings = rec.warm_up()
+done = time.perf_counter()
+print("STARTUP " + json.dumps({
+    "import_main_ms": (imported - start) * 1000.0,
+    "import_recommender_ms": (engine_loaded - imported) * 1000.0,
+    "warm_up_ms": (done - engine_loaded) * 1000.0,
+    "total_ms": (done - start) * 1000.0,
+    **timings,
+}))
+"""
+
+
+def import_times(module):
+    """(total ms, {direct dependency: cumulative ms}) for one fresh `import module`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    # Lines are printed children-first; the indentation of the name gives the depth
+    total, pending = 0.0, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        ms = int(cumulative) / 1000.0
+        if depth == 1:
+            pending[name.strip()] = ms
+        elif depth == 0:
+            if name.strip() == module:
+                return ms, pending
+            pending = {}
+    return total, pending
+
+
+def startup_times():
+    proc = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=BACKEND_DIR, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"Startup run failed:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "600")),
+                        help="Budget for importing --module")
+    parser.add_argument("--startup", action="store_true", help="Also time lifespan startup and warm-up")
+    parser.add_argument("--startup-budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "5000")))
+    parser.add_argument("--out", default=None, help="Write the report as JSON")
+    parser.add_argument("--compare", default=None, help="Report JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    modules = sorted({m for _, deps in runs for m in deps})
+    median = {m: float(np.median([deps.get(m, 0.0) for _, deps in runs])) for m in modules}
+    total = float(np.median([ms for ms, _ in runs]))
+
+    print(f"import {args.module}: {total:.1f} ms (median of {args.repeat}, budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(median.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    report = {"module": args.module, "import_ms": total, "dependencies_ms": median}
+    failed = total > args.budget_ms
+
+    if args.startup:
+        startup = startup_times()
+        report["startup"] = startup
+        print("\nstartup: " + ", ".join(f"{k}={v:.0f}" for k, v in startup.items()))
+        failed |= startup["total_ms"] > args.startup_budget_ms
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        limit = baseline["import_ms"] * (1 + args.tolerance)
+        print(f"\nbaseline import {baseline['import_ms']:.1f} ms; now {total:.1f} ms (limit {limit:.1f} ms)")
+        failed |= total > limit
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print("\n❌ Over budget" if failed else "\n✅ Within budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
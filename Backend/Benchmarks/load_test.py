@@ -0,0 +1,194 @@
+"""
+Load test for the /recommend serving path.
+
+Starts the fake OpenAI-compatible server and `main:app` under uvicorn,
+drives /recommend at increasing concurrency and reports throughput,
+p50/p95/p99 latency, error rate and similarity-fallback rate.
+
+    python Benchmarks/load_test.py --out Benchmarks/baselines/load_test.json
+    python Benchmarks/load_test.py --compare Benchmarks/baselines/load_test.json
+
+Run from the Backend directory. Exits non-zero when --compare finds a regression.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from catalog import load_sheet
+
+BENCH_DIR = os.path.join(BACKEND_DIR, "Benchmarks")
+DATASET = os.path.join(BACKEND_DIR, "Evaluations", "Gen_AI Dataset.xlsx")
+
+
+# -------------------------------
+# 1. Process management
+# -------------------------------
+def start_server(app, port, env, app_dir=BACKEND_DIR):
+    cmd = [sys.executable, "-m", "uvicorn", "--app-dir", app_dir, app,
+           "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env={**os.environ, **env})
+
+
+def wait_until_up(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+
+def stop(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# -------------------------------
+# 2. Load generation
+# -------------------------------
+def run_level(api_url, queries, concurrency, n_requests):
+    sessions = {}
+
+    def one(i):
+        # One keep-alive session per worker thread
+        s = sessions.setdefault(threading.get_ident(), requests.Session())
+        start = time.perf_counter()
+        try:
+            r = s.post(api_url, json={"query": queries[i % len(queries)]}, timeout=120)
+            ok = r.status_code == 200
+            fallback = r.headers.get("X-Recommend-Fallback") == "1"
+        except requests.RequestException:
+            ok, fallback = False, False
+        return (time.perf_counter() - start) * 1000.0, ok, fallback
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - start
+
+    lat = np.array([r[0] for r in results])
+    ok = np.array([r[1] for r in results])
+    fallback = np.array([r[2] for r in results])
+    ok_lat = lat[ok] if ok.any() else lat
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "throughput_rps": float(ok.sum() / wall),
+        "p50_ms": float(np.percentile(ok_lat, 50)),
+        "p95_ms": float(np.percentile(ok_lat, 95)),
+        "p99_ms": float(np.percentile(ok_lat, 99)),
+        "error_rate": float(1.0 - ok.mean()),
+        "fallback_rate": float(fallback[ok].mean()) if ok.any() else 0.0,
+    }
+
+
+# -------------------------------
+# 3. Baseline comparison
+# -------------------------------
+def compare(current, baseline, tolerance):
+    """Return human-readable regressions of `current` against `baseline`."""
+    base_levels = {l["concurrency"]: l for l in baseline["levels"]}
+    problems = []
+    for level in current["levels"]:
+        base = base_levels.get(level["concurrency"])
+        if not base:
+            continue
+        c = level["concurrency"]
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if level[key] > base[key] * (1 + tolerance):
+                problems.append(f"c={c}: {key} {base[key]:.0f} -> {level[key]:.0f}")
+        if level["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            problems.append(f"c={c}: throughput {base['throughput_rps']:.2f} -> {level['throughput_rps']:.2f} rps")
+        for key in ("error_rate", "fallback_rate"):
+            if level[key] > base[key] + tolerance / 10:
+                problems.append(f"c={c}: {key} {base[key]:.3f} -> {level[key]:.3f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32")
+    parser.add_argument("--requests-per-level", type=int, default=64)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--llm-port", type=int, default=9100)
+    parser.add_argument("--out", default=os.path.join(BENCH_DIR, "baselines", "load_test.json"))
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    queries = load_sheet(DATASET, "Train-Set")["Query"].dropna().unique().tolist()
+
+    llm = start_server("fake_llm_server:app", args.llm_port, {
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_ERROR_RATE": str(args.llm_error_rate),
+    }, app_dir=BENCH_DIR)
+    api = start_server("main:app", args.api_port, {
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+        "OPENAI_API_KEY": "fake-key",
+        "OPENAI_REPLAY_MODE": "off",
+        # Queries repeat across levels: measure the pipeline, not warm-cache hits
+        "WARM_CACHE": "0",
+    })
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs")
+        wait_until_up(f"http://127.0.0.1:{args.api_port}/health")
+        api_url = f"http://127.0.0.1:{args.api_port}/recommend"
+
+        levels = []
+        for c in [int(x) for x in args.concurrency.split(",")]:
+            level = run_level(api_url, queries, c, args.requests_per_level)
+            levels.append(level)
+            print(f"c={c:>3}  {level['throughput_rps']:7.2f} rps  p50={level['p50_ms']:7.0f}ms  "
+                  f"p95={level['p95_ms']:7.0f}ms  p99={level['p99_ms']:7.0f}ms  "
+                  f"err={level['error_rate']:.3f}  fallback={level['fallback_rate']:.3f}")
+    finally:
+        stop(api)
+        stop(llm)
+
+    result = {
+        "config": {
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_error_rate": args.llm_error_rate,
+            "requests_per_level": args.requests_per_level,
+        },
+        "levels": levels,
+    }
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = compare(result, baseline, args.tolerance)
+        if problems:
+            print("\nRegressions against baseline:")
+            for p in problems:
+                print(f"  - {p}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+    else:
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nBaseline saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Per-stage recall and timing for the retrieval cascade on the Train-Set.
+
+For every (N, M) pair: FAISS recall@N, recall of the M items kept by the
+local scorer (cascade.trim_candidates) and the trim time. With --rerank the
+LLM stage is run on the M survivors as well and its recall@10 reported.
+
+    python Benchmarks/tune_cascade.py --n 30,60,100 --m 10,15,20
+    python Benchmarks/tune_cascade.py --n 60 --m 15 --rerank --write
+
+Run from the Backend directory. --write stores the best (N, M) in the
+serving config as candidate_depth / trim_depth.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "Evaluations"))
+
+from metrics import group_relevant, evaluate, normalize_url
+from catalog import load_sheet
+from serving_config import get_setting, save_serving_config
+
+DATASET = os.path.join(BACKEND_DIR, "Evaluations", "Gen_AI Dataset.xlsx")
+
+
+def urls(items):
+    return [normalize_url(i.get("url", "")) for i in items]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", default="30,60,100")
+    parser.add_argument("--m", default="10,15,20,30")
+    parser.add_argument("--rerank", action="store_true")
+    parser.add_argument("--target", type=float, default=0.98,
+                        help="Fraction of recall@N the trimmed list must keep to be chosen")
+    parser.add_argument("--write", action="store_true")
+    args = parser.parse_args()
+
+    import recommender
+    from cascade import trim_candidates
+
+    ns = sorted(int(x) for x in args.n.split(","))
+    ms = sorted(int(x) for x in args.m.split(","))
+    gt = load_sheet(DATASET, "Train-Set")
+    relevant = group_relevant(gt, "Query", "Assessment_url")
+    retrieved = {q: recommender.retrieve(q, top_k=ns[-1]) for q in relevant}
+
+    rows = []
+    for n in ns:
+        first = {q: urls(items[:n]) for q, items in retrieved.items()}
+        recall_n = evaluate(relevant, first, ks=[n])[0].loc[f"recall@{n}", "mean"]
+        for m in (m for m in ms if m <= n):
+            trimmed, timings = {}, []
+            for q, items in retrieved.items():
+                start = time.perf_counter()
+                trimmed[q] = trim_candidates(q, items[:n], m, recommender.current_bundle().lexical_idf, get_setting("cascade_weights"))
+                timings.append((time.perf_counter() - start) * 1000.0)
+            recall_m = evaluate(relevant, {q: urls(v) for q, v in trimmed.items()}, ks=[m])[0].loc[f"recall@{m}", "mean"]
+            row = {"n": n, "m": m, "recall@N": recall_n, "recall_after_trim": recall_m,
+                   "trim_ms": float(np.median(timings))}
+            if args.rerank:
+                reranked, rerank_ms = {}, []
+                for q, items in trimmed.items():
+                    start = time.perf_counter()
+                    reranked[q] = urls(recommender.rerank(q, items, max_recs=10))
+                    rerank_ms.append((time.perf_counter() - start) * 1000.0)
+                row["recall@10_final"] = evaluate(relevant, reranked, ks=[10])[0].loc["recall@10", "mean"]
+                row["rerank_ms"] = float(np.median(rerank_ms))
+            rows.append(row)
+
+    table = pd.DataFrame(rows).set_index(["n", "m"])
+    print(table.to_string(float_format=lambda v: f"{v:.3f}"))
+
+    if args.write:
+        ok = table[table["recall_after_trim"] >= args.target * table["recall@N"]]
+        n, m = (ok.index[0] if len(ok) else table["recall_after_trim"].idxmax())
+        config = save_serving_config({"candidate_depth": int(n), "trim_depth": int(m)})
+        print(f"Serving config updated: {config}")
+
+
+if __name__ == "__main__":
+    main()
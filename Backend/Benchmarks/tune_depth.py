@@ -0,0 +1,91 @@
+"""
+Sweep the first-stage candidate depth N on the Train-Set.
+
+For every N it reports FAISS recall@N, the rerank prompt size in tokens and
+(optionally) the measured rerank latency, then writes the smallest N that
+keeps `--target` of the best achievable recall into the serving config read
+by recommender.get_recommendations.
+
+    python Benchmarks/tune_depth.py --depths 10,15,20,25,30,40,60
+    python Benchmarks/tune_depth.py --measure-latency --latency-queries 5
+
+Run from the Backend directory. Works with OPENAI_REPLAY_MODE=replay or a
+fake LLM server (OPENAI_BASE_URL) as well as the live API.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "Evaluations"))
+
+from metrics import group_relevant, evaluate, normalize_url
+from catalog import load_sheet
+from serving_config import save_serving_config
+
+DATASET = os.path.join(BACKEND_DIR, "Evaluations", "Gen_AI Dataset.xlsx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", default="5,10,15,20,25,30,40,50,60")
+    parser.add_argument("--target", type=float, default=0.98,
+                        help="Fraction of the best recall the chosen depth must keep")
+    parser.add_argument("--measure-latency", action="store_true")
+    parser.add_argument("--latency-queries", type=int, default=5)
+    parser.add_argument("--dry-run", action="store_true", help="Do not write the serving config")
+    parser.add_argument("--report", default=None, help="Write the sweep table as JSON")
+    args = parser.parse_args()
+
+    import recommender
+
+    depths = sorted(int(d) for d in args.depths.split(","))
+    max_depth = depths[-1]
+
+    gt = load_sheet(DATASET, "Train-Set")
+    relevant = group_relevant(gt, "Query", "Assessment_url")
+    queries = list(relevant)
+
+    # One embedding + one search per query at the largest depth; every
+    # smaller depth is a prefix of that ranking.
+    candidates = {q: recommender.retrieve(q, top_k=max_depth) for q in queries}
+    predicted = {q: [normalize_url(c.get("url", "")) for c in cands] for q, cands in candidates.items()}
+    summary, _ = evaluate(relevant, predicted, ks=depths)
+
+    rows = []
+    for n in depths:
+        tokens = [recommender.build_rerank_prompt(q, candidates[q][:n]).tokens for q in queries]
+        row = {"depth": n, "recall": float(summary.loc[f"recall@{n}", "mean"]),
+               "prompt_tokens": float(np.mean(tokens))}
+        if args.measure_latency:
+            timings = []
+            for q in queries[:args.latency_queries]:
+                start = time.perf_counter()
+                recommender.llm_rerank(q, candidates[q][:n])
+                timings.append((time.perf_counter() - start) * 1000.0)
+            row["rerank_ms"] = float(np.median(timings))
+        rows.append(row)
+
+    table = pd.DataFrame(rows).set_index("depth")
+    print(table.to_string(float_format=lambda v: f"{v:.3f}"))
+
+    best = table["recall"].max()
+    chosen = int(table.index[table["recall"] >= args.target * best][0])
+    print(f"\nBest recall {best:.3f}; smallest depth within {args.target:.0%}: {chosen}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"rows": rows, "chosen_depth": chosen}, f, indent=2)
+    if not args.dry_run:
+        config = save_serving_config({"candidate_depth": chosen, "rerank_depth": chosen})
+        print(f"Serving config updated: {config}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Train the local query encoder and gate it by query length.
+
+Fits local_encoder.LocalEncoder on the catalog texts with their stored
+vectors plus the query embeddings recorded by llm_replay (record mode), then
+compares it with the real embedding model on the Train-Set. Every query is
+also cut to its first 4, 8, 16, ... words so short, title-like queries are
+covered. Per length bucket it reports the top-k overlap of the FAISS results
+of both encoders, their cosine similarity, recall@10 against the labels, and
+encode time.
+
+    python Benchmarks/tune_local_encoder.py
+    python Benchmarks/tune_local_encoder.py --ridge 0.03 --k 10 --target 0.8 --write
+
+Train-Set queries (and their prefixes) are kept out of the training pairs.
+The encoder is saved to LOCAL_ENCODER_PATH; --write stores the longest length
+whose buckets all reach --target overlap as `local_encoder_max_words`.
+Run from the Backend directory.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "Evaluations"))
+
+from metrics import group_relevant, normalize_url
+from catalog import load_sheet
+from llm_replay import REPLAY_DIR
+from local_encoder import LocalEncoder, LOCAL_ENCODER_PATH, recorded_embeddings
+from serving_config import CONFIG, save_serving_config
+
+DATASET = os.path.join(BACKEND_DIR, "Evaluations", "Gen_AI Dataset.xlsx")
+
+
+def length_variants(query, lengths):
+    """The query cut to each length shorter than it, plus the full query."""
+    words = query.split()
+    return [" ".join(words[:n]) for n in lengths if n < len(words)] + [query]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ridge", type=float, default=0.1)
+    parser.add_argument("--query-weight", type=float, default=5.0,
+                        help="Sample weight of recorded queries relative to catalog texts")
+    parser.add_argument("--replay-dir", default=REPLAY_DIR)
+    parser.add_argument("--lengths", default="4,8,16,32,64", help="Word-count bucket edges")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--target", type=float, default=0.8, help="Mean top-k overlap a bucket must reach")
+    parser.add_argument("--out", default=LOCAL_ENCODER_PATH)
+    parser.add_argument("--write", action="store_true")
+    args = parser.parse_args()
+
+    # Real embeddings must come from the API, never from a previously trained encoder
+    CONFIG["local_encoder_max_words"] = None
+    import recommender
+    bundle = recommender.current_bundle()
+    lengths = sorted(int(x) for x in args.lengths.split(","))
+
+    gt = load_sheet(DATASET, "Train-Set")
+    relevant = group_relevant(gt, "Query", "Assessment_url")
+    held_out = {v for q in relevant for v in length_variants(q, lengths)}
+
+    # ---- Training pairs ----
+    texts = [m.get("jd", "") for m in bundle.metas]
+    vectors = [bundle.vectors()]
+    weights = [np.ones(len(texts), dtype=np.float32)]
+    logged, logged_vectors = recorded_embeddings(args.replay_dir, recommender.EMB_MODEL)
+    keep = [i for i, t in enumerate(logged) if t not in held_out and logged_vectors.shape[1] == bundle.index.d]
+    if keep:
+        texts += [logged[i] for i in keep]
+        vectors.append(logged_vectors[keep])
+        weights.append(np.full(len(keep), args.query_weight, dtype=np.float32))
+    print(f"Training on {len(bundle.metas)} catalog texts and {len(keep)} recorded queries")
+
+    start = time.perf_counter()
+    encoder = LocalEncoder.fit(texts, np.vstack(vectors), recommender.EMB_MODEL, np.concatenate(weights), args.ridge)
+    encoder.info["index_version"] = bundle.version
+    print(f"Fitted {encoder.info['n_features']} features in {time.perf_counter() - start:.1f} s")
+    encoder.save(args.out)
+    print(f"Saved local encoder to {args.out}")
+
+    # ---- Overlap against the real embeddings ----
+    rows = []
+    for query, rel in relevant.items():
+        for variant in length_variants(query, lengths):
+            start = time.perf_counter()
+            real = recommender.embed_query(variant, bundle)
+            real_ms = (time.perf_counter() - start) * 1000.0
+            start = time.perf_counter()
+            local = encoder.encode([variant])
+            local_ms = (time.perf_counter() - start) * 1000.0
+
+            _, real_ids = recommender.search(real, args.k, bundle)
+            _, local_ids = recommender.search(local, args.k, bundle)
+            real_pooled = real.mean(axis=0)
+            local_urls = {normalize_url(bundle.metas[i].get("url", "")) for i in local_ids if i >= 0}
+            real_urls = {normalize_url(bundle.metas[i].get("url", "")) for i in real_ids if i >= 0}
+            words = len(variant.split())
+            rows.append({
+                "bucket": next((n for n in lengths if words <= n), np.inf),
+                "overlap": len(set(real_ids) & set(local_ids)) / args.k,
+                "cosine": float(local[0] @ real_pooled / np.linalg.norm(real_pooled)),
+                "recall_real": len(real_urls & rel) / len(rel),
+                "recall_local": len(local_urls & rel) / len(rel),
+                "real_ms": real_ms,
+                "local_ms": local_ms,
+            })
+
+    table = pd.DataFrame(rows).groupby("bucket").agg(
+        queries=("overlap", "size"), overlap=("overlap", "mean"), cosine=("cosine", "mean"),
+        recall_real=("recall_real", "mean"), recall_local=("recall_local", "mean"),
+        real_ms=("real_ms", "median"), local_ms=("local_ms", "median"))
+    table.index.name = "max_words"
+    print(f"\nTop-{args.k} overlap with {recommender.EMB_MODEL}, by query length:")
+    print(table.to_string(float_format=lambda v: f"{v:.3f}"))
+
+    passing = 0
+    for bucket, overlap in table["overlap"].items():
+        if overlap < args.target or not np.isfinite(bucket):
+            break
+        passing = int(bucket)
+    print(f"\nLocal encoder reaches overlap {args.target} up to {passing or 'no'} words")
+
+    if args.write:
+        config = save_serving_config({"local_encoder_max_words": passing or None})
+        print(f"Serving config updated: {config}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Recall of MMR-diversified candidate lists against plain top-K on the Train-Set.
+
+For each K and lambda, the FAISS top-N is reduced to K items by MMR over the
+stored catalog vectors and compared with simply keeping the first K. A
+smaller K with equal recall means fewer rerank tokens for the same quality.
+
+    python Benchmarks/tune_mmr.py --n 60 --k 10,15,20,30 --lambdas 0.5,0.7,0.9
+
+Run from the Backend directory.
+"""
+import os
+import sys
+import argparse
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "Evaluations"))
+
+from metrics import group_relevant, evaluate, normalize_url
+from catalog import load_sheet
+
+DATASET = os.path.join(BACKEND_DIR, "Evaluations", "Gen_AI Dataset.xlsx")
+
+
+def recall(relevant, lists, k):
+    predicted = {q: [normalize_url(i.get("url", "")) for i in items] for q, items in lists.items()}
+    return float(evaluate(relevant, predicted, ks=[k])[0].loc[f"recall@{k}", "mean"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=60)
+    parser.add_argument("--k", default="10,15,20,30")
+    parser.add_argument("--lambdas", default="0.5,0.6,0.7,0.8,0.9")
+    args = parser.parse_args()
+
+    import recommender
+    from cascade import mmr_select
+
+    gt = load_sheet(DATASET, "Train-Set")
+    relevant = group_relevant(gt, "Query", "Assessment_url")
+    retrieved = {q: recommender.retrieve(q, top_k=args.n) for q in relevant}
+    vectors = recommender.catalog_vectors()
+
+    rows = []
+    for k in (int(x) for x in args.k.split(",")):
+        row = {"k": k, "top_k": recall(relevant, {q: v[:k] for q, v in retrieved.items()}, k)}
+        for lam in (float(x) for x in args.lambdas.split(",")):
+            diversified = {
+                q: mmr_select(items, vectors[[i["doc_id"] for i in items]], k, lam)
+                for q, items in retrieved.items()
+            }
+            row[f"mmr_{lam:g}"] = recall(relevant, diversified, k)
+        rows.append(row)
+
+    print(pd.DataFrame(rows).set_index("k").to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
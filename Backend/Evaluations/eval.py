@@ -1,7 +1,15 @@
+import os
+import sys
 import pandas as pd
 import ast
+import json
 import numpy as np
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import load_sheet
+from metrics import group_relevant, group_predictions, evaluate, normalize_url
+
 def recall_at_k(recommended, relevant, k):
     """Compute Recall@K for a single query."""
     recommended_top_k = recommended[:k]
@@ -12,31 +20,21 @@ def recall_at_k(recommended, relevant, k):
 
 def mean_recall_at_k(ground_truth_df, predictions_df, k=5):
     """Compute Mean Recall@K across all queries."""
-    recalls = []
-    
-    for _, row in ground_truth_df.iterrows():
-        query = row['query']
-        relevant = row['relevant_assessments']
-
-        # find corresponding predictions
-        pred_row = predictions_df[predictions_df['query'] == query]
-        if pred_row.empty:
-            recalls.append(0.0)
-            continue
-        
-        recommended = pred_row.iloc[0]['predictions']
-        recalls.append(recall_at_k(recommended, relevant, k))
-    
+    relevant = group_relevant(ground_truth_df, "query", "relevant_assessments", key=lambda x: x)
+    predicted = group_predictions(predictions_df, "query", "predictions", key=lambda x: x)
+
+    recalls = [recall_at_k(predicted.get(q, []), list(rel), k) for q, rel in relevant.items()]
     mean_recall = np.mean(recalls)
     return mean_recall, recalls
 
 if __name__ == "__main__":
     # === INPUT FILES ===
-    ground_truth_file = "Gen_AI Dataset.xlsx"  
-    predictions_file = "predictions.csv" 
+    ground_truth_file = "Gen_AI Dataset.xlsx"
+    predictions_file = "predictions.csv"
+    usage_file = "predictions_usage.json"  # written by generate_prediction.py
 
     # === LOAD FILES ===
-    ground_truth_df =pd.read_excel( ground_truth_file, sheet_name="Train-Set")
+    ground_truth_df = load_sheet(ground_truth_file, "Train-Set")
     predictions_df = pd.read_csv(predictions_file)
 
     # parse stringified lists if necessary
@@ -45,7 +43,29 @@ if __name__ == "__main__":
             if col in df.columns:
                 df[col] = df[col].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
 
-    for k in [1, 3, 5, 10]:
-        mean_recall, recalls = mean_recall_at_k(ground_truth_df, predictions_df, k)
-        print(f"Mean Recall@{k}: {mean_recall:.4f}")
+    # Both files may be in long format (one row per query/url pair)
+    gt_item = "relevant_assessments" if "relevant_assessments" in ground_truth_df.columns else "Assessment_url"
+    pred_item = "predictions" if "predictions" in predictions_df.columns else "URL"
+    gt_query = "query" if "query" in ground_truth_df.columns else "Query"
+    pred_query = "query" if "query" in predictions_df.columns else "Query"
+
+    relevant = group_relevant(ground_truth_df, gt_query, gt_item, key=normalize_url)
+    predicted = group_predictions(predictions_df, pred_query, pred_item, key=normalize_url)
+
+    summary, per_query = evaluate(relevant, predicted, ks=[1, 3, 5, 10], n_boot=1000)
+    print(f"Evaluated {len(per_query)} queries")
+    print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
 
+    # === LLM USAGE OF THE PREDICTION RUN ===
+    if os.path.exists(usage_file):
+        with open(usage_file) as f:
+            usage = json.load(f)
+        n = max(usage["queries"], 1)
+        print(f"\nLLM usage for {usage['queries']} queries: "
+              f"{usage['totals']['prompt_tokens'] / n:.0f} prompt + {usage['totals']['completion_tokens'] / n:.0f} "
+              f"completion tokens and ${usage['totals']['cost_usd'] / n:.5f} per query")
+        stages = pd.DataFrame(usage["stages"]).T
+        if len(stages):
+            print(stages[["calls", "prompt_tokens_per_call", "completion_tokens_per_call",
+                          "latency_ms_per_call", "ms_per_completion_token", "cost_usd"]]
+                  .to_string(float_format=lambda v: f"{v:.4g}"))
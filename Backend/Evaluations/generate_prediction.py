@@ -1,39 +1,46 @@
+import os
+import sys
+import json
 import pandas as pd
-import requests
-import time
 
-API_URL = "http://127.0.0.1:8000/recommend" 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender_client import RecommenderClient, RecommenderError
+from catalog import load_sheet
+from llm_usage import diff, totals
+
+API_URL = os.getenv("RECOMMENDER_API_URL", "http://127.0.0.1:8000")
 INPUT_EXCEL = "Gen_AI Dataset.xlsx"
 OUTPUT_CSV = "predictions.csv"
+# LLM usage of the run (from the server's /metrics), read by eval.py
+OUTPUT_USAGE = "predictions_usage.json"
+# Requests in flight at once (or batch calls, when the server has /recommend/batch)
+CONCURRENCY = int(os.getenv("PREDICT_CONCURRENCY", "4"))
 
-def get_recommendations(query: str):
-    """Send query to the recommendation API and get a list of URLs."""
-    try:
-        response = requests.post(API_URL, json={"query": query})
-        if response.status_code == 200:
-            data = response.json()
-            recs = data.get("recommended_assessments", [])
-            urls = [r.get("url", "") for r in recs if r.get("url")]
-            return urls
-        else:
-            print(f"Error {response.status_code} for query: {query}")
-            return []
-    except Exception as e:
-        print(f"Exception for query '{query}': {e}")
-        return []
+def get_recommendations(api: RecommenderClient, queries: list[str]):
+    """Send the queries to the recommendation API and get a list of URLs (or the error) per query."""
+    results = api.recommend_many(queries, concurrency=CONCURRENCY, return_errors=True)
+    return [recs if isinstance(recs, RecommenderError) else [r.get("url", "") for r in recs if r.get("url")]
+            for recs in results]
 
 def main():
-    df = pd.read_excel(INPUT_EXCEL, sheet_name = 'Test-Set')
+    df = load_sheet(INPUT_EXCEL, 'Test-Set')
     if "Query" not in df.columns:
         raise ValueError("Excel must have a column named 'query'")
 
     all_results = []
+    queries = df["Query"].tolist()
 
-    for i, row in df.iterrows():
-        query = row["Query"]
-        print(f"\n🔍 Query {i+1}: {query}")
+    with RecommenderClient(API_URL) as api:
+        before = api.metrics()["llm"]
+        predictions = get_recommendations(api, queries)
+        usage = diff(before, api.metrics()["llm"])
 
-        recommendations = get_recommendations(query)
+    for i, (query, recommendations) in enumerate(zip(queries, predictions)):
+        print(f"\n🔍 Query {i+1}: {query}")
+        if isinstance(recommendations, RecommenderError):
+            print(f"Failed: {recommendations}")
+            continue
         if not recommendations:
             print("No recommendations found.")
             continue
@@ -45,13 +52,16 @@ def main():
                 "URL": rec
             })
 
-        time.sleep(0.2)
-
     # Save results to CSV
     output_df = pd.DataFrame(all_results)
     output_df.to_csv(OUTPUT_CSV, index=False)
 
     print(f"\nSaved results to {OUTPUT_CSV}")
 
+    # Other traffic on the server during the run is counted too
+    with open(OUTPUT_USAGE, "w") as f:
+        json.dump({"queries": len(queries), "totals": totals(usage), "stages": usage}, f, indent=2)
+    print(f"Saved LLM usage to {OUTPUT_USAGE}")
+
 if __name__ == "__main__":
     main()
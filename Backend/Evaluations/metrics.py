@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_KS = (1, 3, 5, 10)
+
+
+def normalize_url(url):
+    """Reduce an SHL catalog URL to its product slug.
+
+    The Train-Set mixes `/solutions/products/...` and `/products/...` links
+    for the same product, so URLs are compared on their last path segment.
+    """
+    url = str(url).strip().lower()
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+# -------------------------------
+# 1. Group inputs once
+# -------------------------------
+def group_relevant(df, query_col="query", item_col="relevant_assessments", key=normalize_url):
+    """Map each query to its set of relevant item keys.
+
+    Accepts either one row per (query, url) pair - the layout of the Excel
+    Train-Set - or one row per query holding a list of urls.
+    """
+    exploded = df[[query_col, item_col]].explode(item_col).dropna()
+    keys = exploded[item_col].map(key)
+    return {q: set(items) for q, items in keys.groupby(exploded[query_col], sort=False)}
+
+
+def group_predictions(df, query_col="query", item_col="predictions", key=normalize_url):
+    """Map each query to its ranked list of predicted item keys (row order = rank)."""
+    exploded = df[[query_col, item_col]].explode(item_col).dropna()
+    keys = exploded[item_col].map(key)
+    return {q: list(dict.fromkeys(items)) for q, items in keys.groupby(exploded[query_col], sort=False)}
+
+
+# -------------------------------
+# 2. Hit matrix + all metrics in one pass
+# -------------------------------
+def hit_matrix(relevant, predicted, max_k):
+    """Build a (n_queries, max_k) boolean matrix of hits and the relevant counts.
+
+    Queries missing from `predicted` get an all-zero row, so they count as misses.
+    """
+    queries = list(relevant)
+    hits = np.zeros((len(queries), max_k), dtype=bool)
+    n_rel = np.zeros(len(queries), dtype=np.int64)
+    for row, q in enumerate(queries):
+        rel = relevant[q]
+        n_rel[row] = len(rel)
+        ranked = predicted.get(q, [])[:max_k]
+        hits[row, :len(ranked)] = [item in rel for item in ranked]
+    return queries, hits, n_rel
+
+
+def per_query_metrics(hits, n_rel, ks=DEFAULT_KS):
+    """Compute per-query Recall@K, Precision@K, MAP@K, nDCG@K and MRR.
+
+    Returns a dict of metric name -> 1-D array with one value per query.
+    """
+    max_k = hits.shape[1]
+    ranks = np.arange(1, max_k + 1)
+    h = hits.astype(np.float64)
+    cum_hits = np.cumsum(h, axis=1)
+    safe_rel = np.maximum(n_rel, 1).astype(np.float64)
+    has_rel = n_rel > 0
+
+    precision_at_rank = cum_hits / ranks
+    cum_ap = np.cumsum(precision_at_rank * h, axis=1)
+
+    discounts = 1.0 / np.log2(ranks + 1)
+    cum_dcg = np.cumsum(h * discounts, axis=1)
+    cum_ideal = np.cumsum(discounts)
+
+    out = {}
+    for k in ks:
+        k = min(k, max_k)
+        col = k - 1
+        out[f"recall@{k}"] = np.where(has_rel, cum_hits[:, col] / safe_rel, 0.0)
+        out[f"precision@{k}"] = cum_hits[:, col] / k
+        out[f"map@{k}"] = np.where(has_rel, cum_ap[:, col] / np.minimum(safe_rel, k), 0.0)
+        ideal = cum_ideal[np.minimum(n_rel, k) - 1]
+        out[f"ndcg@{k}"] = np.where(has_rel, cum_dcg[:, col] / np.where(has_rel, ideal, 1.0), 0.0)
+
+    first_hit = np.where(hits.any(axis=1), hits.argmax(axis=1) + 1, 0)
+    out["mrr"] = np.where(first_hit > 0, 1.0 / np.maximum(first_hit, 1), 0.0)
+    return out
+
+
+def bootstrap_ci(values, n_boot=1000, alpha=0.05, seed=0):
+    """Percentile bootstrap confidence interval for the mean of `values`."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return 0.0, 0.0
+    rng = np.random.default_rng(seed)
+    means = np.empty(n_boot)
+    # Resample in blocks so memory stays bounded for very large query sets
+    block = max(1, min(n_boot, 10_000_000 // len(values)))
+    for start in range(0, n_boot, block):
+        stop = min(start + block, n_boot)
+        idx = rng.integers(0, len(values), size=(stop - start, len(values)))
+        means[start:stop] = values[idx].mean(axis=1)
+    return float(np.quantile(means, alpha / 2)), float(np.quantile(means, 1 - alpha / 2))
+
+
+def evaluate(relevant, predicted, ks=DEFAULT_KS, n_boot=0, alpha=0.05, seed=0):
+    """Evaluate grouped predictions against grouped ground truth.
+
+    Returns a DataFrame indexed by metric with `mean` (and `ci_low`/`ci_high`
+    when `n_boot` > 0), plus the per-query metric frame.
+    """
+    ks = sorted(set(ks))
+    queries, hits, n_rel = hit_matrix(relevant, predicted, max(ks))
+    per_query = pd.DataFrame(per_query_metrics(hits, n_rel, ks), index=queries)
+
+    summary = per_query.mean().to_frame("mean")
+    if n_boot:
+        cis = [bootstrap_ci(per_query[m].to_numpy(), n_boot, alpha, seed) for m in per_query.columns]
+        summary["ci_low"] = [lo for lo, _ in cis]
+        summary["ci_high"] = [hi for _, hi in cis]
+    return summary, per_query
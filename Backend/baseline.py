@@ -4,7 +4,9 @@ import pickle
 import faiss
 import numpy as np
 import pandas as pd
-from openai import OpenAI
+from llm_replay import make_client
+from llm_usage import llm_call
+from catalog import load_sheet
 
 # === CONFIGURATION ===
 INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "data/faiss_index/index.faiss")
@@ -39,11 +41,11 @@ print(f"✅ Loaded {len(METAS)} metadata entries.")
 print(f"✅ FAISS index contains {index.ntotal} vectors.\n")
 
 # === EMBEDDING CLIENT ===
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = make_client(OPENAI_API_KEY)
 
 def embed_query(text: str) -> np.ndarray:
     """Embed a single query using OpenAI embeddings."""
-    response = client.embeddings.create(input=text, model=EMB_MODEL)
+    response = llm_call("embed", client.embeddings.create, input=text, model=EMB_MODEL)
     emb = np.array(response.data[0].embedding, dtype=np.float32)
     emb /= np.linalg.norm(emb)
     return emb.reshape(1, -1)
@@ -66,7 +68,7 @@ def retrieve(query_text, top_k=10):
 def main():
     print(f"📘 Reading Excel file: {EXCEL_PATH}")
 
-    df = pd.read_excel(EXCEL_PATH, sheet_name="Train-Set")
+    df = load_sheet(EXCEL_PATH, "Train-Set")
     df.columns = df.columns.str.strip().str.lower()
 
     if "query" not in df.columns:
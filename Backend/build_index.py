@@ -1,117 +1,163 @@
 import os
 import pandas as pd
 import pickle
-from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
-from langchain_core.documents import Document
 import faiss
-import tqdm
-
-# Paths to your CSVs
-FACT_SHEET_CSV = "./Scraping/shl_fact_sheets_text.csv"
-DETAILS_CSV = "./Scraping/shl_assessments_details.csv"
+import json
+import argparse
+import numpy as np
+from dedup import find_clusters, choose_canonical
+from catalog import build_catalog, save_catalog, CATALOG_PATH
+from index_bundle import write_manifest
+from passages import split_passages, truncate_normalize, build_passage_index, save_passage_index
 
 # Output directory
 OUTPUT_DIR = "./data/faiss_index"
+ALIASES_PATH = os.path.join(OUTPUT_DIR, "aliases.json")
 INDEX_PATH = os.path.join(OUTPUT_DIR, "index.faiss")
 META_PATH = os.path.join(OUTPUT_DIR, "index.pkl")
+EMB_MODEL = "text-embedding-3-large"
 
 # -------------------------------
-# 1. Load and merge data
+# 1. Build the typed catalog
 # -------------------------------
 def load_and_merge_data():
-    fact_df = pd.read_csv(FACT_SHEET_CSV)
-    details_df = pd.read_csv(DETAILS_CSV)
-
-    # Merge both datasets on URL
-    merged_df = pd.merge(details_df, fact_df, on="url", how="outer").fillna("")
-
-    # Combine all available text sources
-    merged_df["jd"] = merged_df.apply(
-        lambda row: (
-            (
-                row.get("description", "").strip() or row.get("fact_sheet_text", "").strip()
-            ).strip()
-        ),
-        axis=1
+    catalog = build_catalog()
+    save_catalog(catalog, CATALOG_PATH)
+    print(f"✅ Catalog with {len(catalog)} rows saved to: {CATALOG_PATH}")
+    return catalog
+
+
+def build_doc_texts(catalog):
+    """Create a semantically rich description for embedding, for every row at once."""
+    levels = catalog["job_levels"].map(", ".join)
+    texts = (
+        "Description: " + catalog["jd"]
+        + "\n    Suitable Job Levels: " + levels
+        + "\n    This assessment measures key skills, behaviors, and knowledge areas relevant to its category."
     )
-
-    # Safely keep only available columns
-    keep_cols = [col for col in ["assessment_name_x", "url", "jd",  'job_levels', 'languages', 'assessment_length','remote_testing_x','adaptive_x','test_type_x' ] if col in merged_df.columns]
-    merged_df = merged_df[keep_cols]
-
-    # Filter out empty text
-    merged_df = merged_df[merged_df["jd"].str.strip() != ""]
-
-    print(f"✅ Loaded {len(merged_df)} rows with columns: {keep_cols}")
-    return merged_df
-
+    return texts.str.strip().tolist()
 
 
-def build_doc_text(row):
-    """Create a semantically rich description for embedding."""
-    name = row.get("assessment_name_x", "")
-    desc = row.get("jd", "")
-    level = row.get("job_levels", "")
-    lang = row.get("languages", "")
-    duration = row.get("assessment_length", "")
-    remote = row.get("remote_testing_x", "")
-    adaptive = row.get("adaptive_x", "")
-    ttype = row.get("test_type_x", "")
+def build_metadatas(catalog):
+    return pd.DataFrame({
+        "assessment_name": catalog["assessment_name"],
+        "url": catalog["url"],
+        "test_type": catalog["test_types"],
+        "job_levels": catalog["job_levels"],
+        "duration": catalog["duration_minutes"].astype(object).where(catalog["duration_minutes"].notna(), None),
+        "remote_support": catalog["remote_testing"].astype(bool),
+        "adaptive_support": catalog["adaptive"].astype(bool),
+    }).to_dict("records")
 
-    # Turn structured data into readable context
-    text = f"""
-    Description: {desc}
-    Suitable Job Levels: {level}
-    This assessment measures key skills, behaviors, and knowledge areas relevant to its category.
-    """
-    return text.strip()
 # -------------------------------
 # 2. Build and save FAISS index
 # -------------------------------
-def ingest_to_faiss(merged_df):
+def compact_catalog(catalog, texts, metadatas, vectors):
+    """
+    Collapse duplicate rows (same product slug, or close names with MinHash/LSH
+    description similarity or embedding cosine) to one canonical row per
+    cluster and record the others as aliases.
+    """
+    slugs = catalog["url"].str.rstrip("/").str.rsplit("/", n=1).str[-1].tolist()
+    # Shingle the descriptions only; the boilerplate of the embedded texts makes every row look alike
+    clusters = find_clusters(catalog["jd"].tolist(), catalog["assessment_name"].tolist(), keys=slugs, vectors=vectors)
+
+    filled = (
+        (catalog[["assessment_name", "jd", "fact_sheet_text"]] != "").sum(axis=1)
+        + catalog[["test_types", "job_levels", "languages"]].apply(lambda col: col.str.len() > 0).sum(axis=1)
+        + catalog["duration_minutes"].notna()
+    )
+    completeness = filled.to_numpy(dtype=float) + catalog["jd"].str.len().to_numpy() / 1e6
+
+    keep, aliases = [], {}
+    for cluster in clusters:
+        canonical = choose_canonical(cluster, completeness)
+        keep.append(canonical)
+        others = [metadatas[i] for i in cluster if i != canonical]
+        if others:
+            metadatas[canonical]["aliases"] = [m["assessment_name"] for m in others]
+            aliases[metadatas[canonical]["url"]] = [
+                {"assessment_name": m["assessment_name"], "url": m["url"]} for m in others
+            ]
+    keep.sort()
+
+    with open(ALIASES_PATH, "w") as f:
+        json.dump(aliases, f, indent=2)
+    print(f"✅ Dedup: {len(texts)} rows -> {len(keep)} canonical entries "
+          f"({sum(len(v) for v in aliases.values())} aliases saved to {ALIASES_PATH})")
+    return (catalog.iloc[keep].reset_index(drop=True), [texts[i] for i in keep],
+            [metadatas[i] for i in keep], vectors[keep])
+
+def ingest_to_faiss(catalog, dedup=False):
     print("Creating FAISS index...")
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-large",
+        model=EMB_MODEL,
         api_key=os.getenv("OPENAI_API_KEY")  # use env var, not hardcoded key
     )
 
-    documents = []
-    for _, row in merged_df.iterrows():
-        metadata = {
-            "assessment_name": row.get("assessment_name_x", ""),
-            "url": row.get("url", ""),
-            "test_type": row.get("test_type_x", ""),
-            "job_levels": row.get("job_levels", "")
-        }
-        documents.append(Document(
-            page_content=build_doc_text(row),
-            metadata={
-                "assessment_name": row.get("assessment_name_x", ""),
-                "url": row.get("url", ""),
-                "test_type": row.get("test_type_x", ""),
-                "job_levels": row.get("job_levels", ""),
-                "duration": row.get("assessment_length", ""),
-                "remote_support": row.get("remote_testing_x", ""),
-                "adaptive_support": row.get("adaptive_x", ""),
-            }
-        ))
-    db = FAISS.from_documents(documents, embeddings)
+    texts = build_doc_texts(catalog)
+    metadatas = build_metadatas(catalog)
+    vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+
+    if dedup:
+        catalog, texts, metadatas, vectors = compact_catalog(catalog, texts, metadatas, vectors)
+        save_catalog(catalog, CATALOG_PATH)
+
+    # Inner product over normalized vectors = cosine similarity, which is
+    # what the serving code treats the search scores as
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(np.ascontiguousarray(vectors))
 
     # Save FAISS index manually
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    faiss.write_index(db.index, os.path.join(OUTPUT_DIR, "index.faiss"))
+    faiss.write_index(index, INDEX_PATH)
 
     # Save metadata manually (metadatas + texts)
-    with open(os.path.join(OUTPUT_DIR, "index.pkl"), "wb") as f:
+    with open(META_PATH, "wb") as f:
         pickle.dump({
-            "metadatas": [d.metadata for d in documents],
-            "texts": [d.page_content for d in documents]
+            "metadatas": metadatas,
+            "texts": texts
         }, f)
 
     print(f"✅ FAISS index and metadata saved to: {OUTPUT_DIR}")
+    return index, embeddings, catalog
+
+# -------------------------------
+# 2b. Optional multi-passage index
+# -------------------------------
+def ingest_passages(catalog, doc_index, embeddings):
+    """
+    Index every assessment as several passages: its summary (reusing the
+    vector already in the document index) plus fact-sheet chunks.
+    """
+    print("Creating passage index...")
+    parents, texts, vectors = [], [], []
+    doc_vectors = doc_index.reconstruct_n(0, doc_index.ntotal)
+
+    chunk_parents, chunk_texts = [], []
+    summaries = build_doc_texts(catalog)
+    for doc_id, fact_sheet in enumerate(catalog["fact_sheet_text"]):
+        passages = split_passages(summaries[doc_id], fact_sheet)
+        parents.append(doc_id)
+        texts.append(passages[0])
+        vectors.append(doc_vectors[doc_id])
+        for p in passages[1:]:
+            chunk_parents.append(doc_id)
+            chunk_texts.append(p)
+
+    if chunk_texts:
+        print(f"Embedding {len(chunk_texts)} fact-sheet passages...")
+        vectors.extend(embeddings.embed_documents(chunk_texts))
+        parents.extend(chunk_parents)
+        texts.extend(chunk_texts)
+
+    matrix = truncate_normalize(np.array(vectors, dtype=np.float32))
+    index = build_passage_index(matrix)
+    save_passage_index(index, parents, texts, EMB_MODEL, OUTPUT_DIR)
+    print(f"✅ Passage index with {index.ntotal} passages for {doc_index.ntotal} assessments saved to: {OUTPUT_DIR}")
 
 # -------------------------------
 # 3. Verify FAISS index integrity
@@ -141,11 +187,23 @@ def verify_faiss_integrity():
 # 4. Main script
 # -------------------------------
 def main():
-    merged_df = load_and_merge_data()
-    print(f"Loaded {len(merged_df)} assessments for ingestion.")
-    merged_df.to_csv('merged.csv', index=False)
-    ingest_to_faiss(merged_df)
+    parser = argparse.ArgumentParser(description="Build the FAISS index for the SHL catalog.")
+    parser.add_argument("--passages", action="store_true",
+                        help="Also build the multi-passage index over full fact-sheet text")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Collapse duplicate catalog rows (same slug, or close names and near-identical descriptions)")
+    args = parser.parse_args()
+
+    catalog = load_and_merge_data()
+    print(f"Loaded {len(catalog)} assessments for ingestion.")
+    doc_index, embeddings, catalog = ingest_to_faiss(catalog, dedup=args.dedup)
     verify_faiss_integrity()
+    if args.passages:
+        ingest_passages(catalog, doc_index, embeddings)
+
+    # Written last: a running service watching OUTPUT_DIR reloads once it appears
+    manifest = write_manifest(OUTPUT_DIR, EMB_MODEL, doc_index.d, doc_index.ntotal, passages=args.passages)
+    print(f"✅ Index version {manifest['version']} ready in {OUTPUT_DIR}")
 
 if __name__ == "__main__":
     main()
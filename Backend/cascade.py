@@ -0,0 +1,146 @@
+import re
+import math
+from collections import Counter
+
+import numpy as np
+
+# Cheap in-process second stage: trims the FAISS candidate list before the
+# LLM reranker using BM25 over name + description, simple metadata fit
+# (duration budget, job level) and the embedding similarity itself, and
+# optionally diversifies it with MMR over the stored catalog vectors.
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "i",
+    "in", "is", "it", "looking", "me", "my", "need", "of", "on", "or", "our",
+    "should", "that", "the", "their", "this", "to", "want", "we", "who", "will", "with",
+}
+
+JOB_LEVEL_TERMS = {
+    "graduate": "graduate",
+    "entry": "entry-level",
+    "junior": "entry-level",
+    "mid": "mid-professional",
+    "senior": "professional",
+    "manager": "manager",
+    "supervisor": "supervisor",
+    "director": "director",
+    "executive": "executive",
+}
+
+DEFAULT_WEIGHTS = {"similarity": 1.0, "lexical": 0.5, "metadata": 0.3}
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z0-9+#.]+", str(text).lower()) if t not in STOPWORDS]
+
+
+def build_idf(texts):
+    """BM25 IDF table over the whole catalog."""
+    n = len(texts)
+    df = Counter()
+    for text in texts:
+        df.update(set(tokenize(text)))
+    return {t: math.log(1 + (n - c + 0.5) / (c + 0.5)) for t, c in df.items()}
+
+
+def bm25_scores(query, docs, idf, k1=1.2, b=0.75):
+    q_terms = set(tokenize(query))
+    doc_tokens = [tokenize(d) for d in docs]
+    avg_len = np.mean([len(d) for d in doc_tokens]) if doc_tokens else 1.0
+    scores = np.zeros(len(docs))
+    for i, tokens in enumerate(doc_tokens):
+        tf = Counter(tokens)
+        norm = k1 * (1 - b + b * len(tokens) / max(avg_len, 1.0))
+        scores[i] = sum(
+            idf.get(t, 0.0) * tf[t] * (k1 + 1) / (tf[t] + norm)
+            for t in q_terms if t in tf
+        )
+    return scores
+
+
+def parse_duration_budget(query):
+    """Maximum assessment time the query asks for, in minutes, or None."""
+    text = str(query).lower()
+    minutes = re.findall(r"(\d+)\s*(?:-\s*\d+\s*)?(?:min|mins|minutes)\b", text)
+    hours = re.findall(r"(\d+(?:\.\d+)?)\s*(?:hr|hrs|hour|hours)\b", text)
+    budgets = [int(m) for m in minutes] + [int(float(h) * 60) for h in hours]
+    if not budgets and re.search(r"\ban hour\b", text):
+        budgets.append(60)
+    return max(budgets) if budgets else None
+
+
+def parse_item_minutes(duration):
+    match = re.search(r"(\d+)", str(duration or ""))
+    return int(match.group(1)) if match else None
+
+
+def metadata_scores(query, items):
+    """+1 per satisfied constraint, -1 when an item breaks the time budget."""
+    budget = parse_duration_budget(query)
+    q_tokens = set(tokenize(query))
+    levels = {label for term, label in JOB_LEVEL_TERMS.items() if term in q_tokens}
+
+    scores = np.zeros(len(items))
+    for i, item in enumerate(items):
+        minutes = parse_item_minutes(item.get("duration"))
+        if budget is not None and minutes is not None:
+            scores[i] += 1.0 if minutes <= budget else -1.0
+        if levels:
+            item_levels = item.get("job_levels", "")
+            if isinstance(item_levels, list):
+                item_levels = ", ".join(item_levels)
+            item_levels = str(item_levels).lower()
+            scores[i] += 1.0 if any(level in item_levels for level in levels) else 0.0
+    return scores
+
+
+def _minmax(x):
+    lo, hi = float(np.min(x)), float(np.max(x))
+    return (x - lo) / (hi - lo) if hi > lo else np.zeros_like(x)
+
+
+def cascade_scores(query, items, idf, weights=None):
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    sim = np.array([item.get("score", 0.0) for item in items], dtype=np.float64)
+    lex = bm25_scores(query, [f"{item.get('assessment_name', '')} {item.get('jd', '')}" for item in items], idf)
+    meta = metadata_scores(query, items)
+    return (
+        weights["similarity"] * _minmax(sim)
+        + weights["lexical"] * _minmax(lex)
+        + weights["metadata"] * meta / 2.0
+    )
+
+
+def trim_candidates(query, items, m, idf, weights=None):
+    """Keep the `m` best items by cascade score, best first."""
+    if not items or m >= len(items):
+        return list(items)
+    scores = cascade_scores(query, items, idf, weights)
+    order = np.argsort(-scores, kind="stable")[:m]
+    return [dict(items[i], cascade_score=float(scores[i])) for i in order]
+
+
+def mmr_select(items, vectors, k, lam=0.7):
+    """Maximal-marginal-relevance selection of `k` items.
+
+    `vectors` holds the normalized catalog vector of each item (same order),
+    relevance is the item's similarity `score` to the query. Each step picks
+    the item maximizing lam * relevance - (1 - lam) * max similarity to the
+    items already chosen, so near-identical variants stop crowding the list.
+    """
+    if not items or k >= len(items):
+        return list(items)
+    rel = np.array([item.get("score", 0.0) for item in items], dtype=np.float32)
+    sim = vectors @ vectors.T
+
+    selected = []
+    max_sim = np.zeros(len(items), dtype=np.float32)
+    available = np.ones(len(items), dtype=bool)
+    for _ in range(k):
+        mmr = lam * rel - (1 - lam) * max_sim
+        mmr[~available] = -np.inf
+        pick = int(np.argmax(mmr))
+        selected.append(pick)
+        available[pick] = False
+        max_sim = np.maximum(max_sim, sim[:, pick])
+    return [items[i] for i in selected]
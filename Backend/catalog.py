@@ -0,0 +1,94 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Typed, columnar catalog built once from the scraped CSVs.
+#
+# build_index and the evaluation scripts read this Parquet file instead of
+# re-parsing and re-merging the CSVs: durations are parsed to minutes,
+# remote/adaptive are real booleans and test types, job levels and
+# languages are lists, so nothing downstream needs per-row string handling.
+
+FACT_SHEET_CSV = "./Scraping/shl_fact_sheets_text.csv"
+DETAILS_CSV = "./Scraping/shl_assessments_details.csv"
+CATALOG_PATH = os.getenv("CATALOG_PATH", "data/catalog.parquet")
+
+CATALOG_SCHEMA = pa.schema([
+    ("assessment_name", pa.string()),
+    ("url", pa.string()),
+    ("jd", pa.string()),
+    ("fact_sheet_text", pa.string()),
+    ("test_types", pa.list_(pa.string())),
+    ("job_levels", pa.list_(pa.string())),
+    ("languages", pa.list_(pa.string())),
+    ("duration_minutes", pa.int32()),
+    ("remote_testing", pa.bool_()),
+    ("adaptive", pa.bool_()),
+])
+
+# Columns both CSVs carry; the details CSV wins, the fact-sheet CSV fills gaps
+SHARED_COLUMNS = ["assessment_name", "remote_testing", "adaptive", "test_type"]
+
+
+def _text(series):
+    return series.fillna("").astype(str).str.strip()
+
+
+def _split_list(series):
+    """'A, E, B,' -> ['A', 'E', 'B']"""
+    parts = _text(series).str.split(",")
+    return parts.map(lambda items: [p.strip() for p in items if p.strip()])
+
+
+def build_catalog(details_csv=DETAILS_CSV, fact_sheet_csv=FACT_SHEET_CSV):
+    details = pd.read_csv(details_csv)
+    facts = pd.read_csv(fact_sheet_csv, usecols=["url", "fact_sheet_text", *SHARED_COLUMNS])
+    df = details.merge(facts, on="url", how="outer", suffixes=("", "_fact"))
+    for col in SHARED_COLUMNS:
+        df[col] = df[col].fillna(df.pop(f"{col}_fact"))
+
+    description, fact_sheet = _text(df["description"]), _text(df["fact_sheet_text"])
+    catalog = pd.DataFrame({
+        "assessment_name": _text(df["assessment_name"]),
+        "url": _text(df["url"]),
+        # Scraped description, or the fact-sheet text when the page had none
+        "jd": description.where(description != "", fact_sheet),
+        "fact_sheet_text": fact_sheet,
+        "test_types": _split_list(df["test_type"]),
+        "job_levels": _split_list(df["job_levels"]),
+        "languages": _split_list(df["languages"]),
+        # "Approximate Completion Time in minutes = 30"; "= Untimed" stays null
+        "duration_minutes": df["assessment_length"].astype("string").str.extract(r"(\d+)")[0].astype("Int32"),
+        "remote_testing": df["remote_testing"].fillna(False).astype(bool),
+        "adaptive": df["adaptive"].fillna(False).astype(bool),
+    })
+    return catalog[catalog["jd"] != ""].reset_index(drop=True)
+
+
+def save_catalog(catalog, path=CATALOG_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(catalog, schema=CATALOG_SCHEMA, preserve_index=False)
+    pq.write_table(table, path)
+
+
+def load_catalog(path=CATALOG_PATH, columns=None):
+    """Catalog as a DataFrame with nullable int/bool dtypes and list cells."""
+    table = pq.read_table(path, columns=columns)
+    frame = table.to_pandas(types_mapper={pa.int32(): pd.Int32Dtype(), pa.bool_(): pd.BooleanDtype()}.get)
+    for col in ["test_types", "job_levels", "languages"]:
+        if col in frame.columns:
+            frame[col] = frame[col].map(list)
+    return frame
+
+
+def load_sheet(xlsx_path, sheet_name):
+    """
+    One sheet of an Excel workbook, read through a Parquet copy stored next
+    to it; the copy is refreshed whenever the workbook is newer.
+    """
+    cache = f"{os.path.splitext(xlsx_path)[0]}.{sheet_name}.parquet"
+    if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(xlsx_path):
+        pd.read_excel(xlsx_path, sheet_name=sheet_name).to_parquet(cache, index=False)
+    return pd.read_parquet(cache)
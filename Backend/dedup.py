@@ -0,0 +1,189 @@
+import re
+import hashlib
+from difflib import SequenceMatcher
+
+import numpy as np
+
+# Near-duplicate detection for the catalog, run at index build time.
+#
+# Two rows are merged when they point at the same product slug, or when
+# their names are close (name_similarity >= name_threshold) and either
+#   - MinHash/LSH over word shingles of their name + description estimates
+#     Jaccard >= jaccard_threshold, or
+#   - their embedding vectors have cosine >= cosine_threshold.
+# Names are compared token by token, ignoring case, punctuation, plurals,
+# small typos and filler words like "(New)", so "Business Communications
+# Test" and "Business Communication (New)" can merge. Text similarity alone
+# is not enough: the catalog has many distinct products with near-identical
+# descriptions whose names differ in one qualifier. Names that clearly differ
+# (each has a word the other lacks, or they differ in a number) are never
+# merged on similarity: Spoken English (US) / (U.K.), WriteX Sales /
+# Managerial, Sales Transformation 1.0 / 2.0, OPQ ... Profile / Report.
+# Each cluster keeps one canonical row (the most complete one) and records
+# the others as aliases.
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+_NAME_NOISE = re.compile(r"[^a-z0-9]+")
+# Words that do not tell two catalog products apart
+NAME_FILLER = {"new", "and", "the", "of", "for", "test", "assessment", "solution"}
+
+
+def _hash64(s):
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def name_key(name):
+    """Name with case, punctuation and spacing ignored."""
+    return _NAME_NOISE.sub(" ", str(name).lower()).strip()
+
+
+def name_tokens(name):
+    # Initialisms are spelled either way: "U.K." and "UK" are both "uk"
+    key = re.sub(r"\b([a-z]) (?=[a-z]\b)", r"\1", name_key(name))
+    return [t for t in key.split() if t not in NAME_FILLER]
+
+
+def _same_token(x, y):
+    if x == y:
+        return True
+    # Plurals and typos in longer words; numbers and short codes (US / UK, v1 / v2) must match exactly
+    if any(c.isdigit() for c in x + y) or min(len(x), len(y)) < 4:
+        return False
+    return x.rstrip("s") == y.rstrip("s") or SequenceMatcher(None, x, y).ratio() >= 0.85
+
+
+def compare_names(a, b):
+    """(token Jaccard of two names with fuzzy token matching, True if they clearly differ)."""
+    left, right = name_tokens(a), name_tokens(b)
+    if not left or not right:
+        return 0.0, False
+    unmatched = list(right)
+    only_left = []
+    for token in left:
+        match = next((u for u in unmatched if _same_token(token, u)), None)
+        if match is None:
+            only_left.append(token)
+        else:
+            unmatched.remove(match)
+    matched = len(left) - len(only_left)
+    similarity = matched / (len(left) + len(right) - matched)
+    extra = only_left + unmatched
+    conflict = bool(only_left and unmatched) or any(c.isdigit() for t in extra for c in t)
+    return similarity, conflict
+
+
+def shingles(text, k=5):
+    words = re.findall(r"\w+", str(text).lower())
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash_signatures(texts, num_perm=128, k=5, seed=1):
+    """(n_texts, num_perm) uint64 MinHash signatures."""
+    rng = np.random.default_rng(seed)
+    # a < 2^32 and h < 2^32 keep a * h below 2^64, so the uint64 arithmetic does not wrap
+    a = rng.integers(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    sigs = np.full((len(texts), num_perm), MAX_HASH, dtype=np.uint64)
+    for i, text in enumerate(texts):
+        sh = shingles(text, k)
+        if not sh:
+            continue
+        h = np.array([_hash64(s) & MAX_HASH for s in sh], dtype=np.uint64)
+        # (a * h + b) mod p, truncated to 32 bits, min over shingles
+        sigs[i] = (((np.outer(h, a) % MERSENNE_PRIME + b) % MERSENNE_PRIME) & MAX_HASH).min(axis=0)
+    return sigs
+
+
+def lsh_pairs(signatures, bands=32):
+    """Candidate pairs sharing at least one identical band."""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = {}
+        chunk = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(n):
+            buckets.setdefault(chunk[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return pairs
+
+
+def cosine_pairs(vectors, threshold, block=1024):
+    """Pairs of rows with cosine >= threshold, computed in blocks."""
+    v = np.asarray(vectors, dtype=np.float32)
+    v = v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+    pairs = set()
+    for start in range(0, len(v), block):
+        sims = v[start:start + block] @ v.T
+        for i, j in zip(*np.nonzero(sims >= threshold)):
+            i = int(i) + start
+            if i < j:
+                pairs.add((i, int(j)))
+    return pairs
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x, y):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def find_clusters(texts, names, keys=None, vectors=None, jaccard_threshold=0.8, cosine_threshold=0.97,
+                  name_threshold=0.8, num_perm=128, bands=32):
+    """
+    Group row indices into near-duplicate clusters (singletons included).
+    `texts` should be the descriptions only: names are compared on their own,
+    and shared boilerplate inflates the Jaccard estimate of unrelated rows.
+    """
+    n = len(texts)
+    uf = _UnionFind(n)
+
+    if keys is not None:
+        first = {}
+        for i, key in enumerate(keys):
+            if key:
+                uf.union(first.setdefault(key, i), i)
+
+    def same_name(i, j):
+        if name_key(names[i]) == name_key(names[j]):
+            return bool(name_key(names[i]))
+        similarity, conflict = compare_names(names[i], names[j])
+        return not conflict and similarity >= name_threshold
+
+    sigs = minhash_signatures(texts, num_perm)
+    # Rows without a description all share the empty signature
+    blank = {i for i, text in enumerate(texts) if not shingles(text)}
+    for i, j in lsh_pairs(sigs, bands):
+        if i not in blank and j not in blank and same_name(i, j) and np.mean(sigs[i] == sigs[j]) >= jaccard_threshold:
+            uf.union(i, j)
+
+    if vectors is not None:
+        for i, j in cosine_pairs(vectors, cosine_threshold):
+            if same_name(i, j):
+                uf.union(i, j)
+
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(uf.find(i), []).append(i)
+    return list(clusters.values())
+
+
+def choose_canonical(cluster, completeness):
+    """Most complete row wins; ties go to the earliest row."""
+    return max(cluster, key=lambda i: (completeness[i], -i))
@@ -0,0 +1,176 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from text_chunks import count_tokens, EMBEDDING_ENCODING
+from llm_usage import USAGE, record_request, usage_tokens
+
+# Micro-batching of embedding calls across concurrent requests.
+#
+# Requests hand their texts to a single scheduler thread, which waits up to
+# EMBED_BATCH_WAIT_MS after the first arrival (or until EMBED_BATCH_MAX
+# inputs / EMBED_BATCH_MAX_TOKENS tokens are queued) and hands everything to
+# a small pool that sends it as one embeddings.create(input=[...]) call, so
+# up to EMBED_BATCH_CONCURRENCY calls are in flight and one slow call does
+# not hold up the batches behind it. Vectors are handed back through
+# futures in submission order. Every upstream call first takes its request
+# and tokens from a token bucket sized to the account's embedding rate
+# limits, so bursts queue locally instead of coming back as 429s.
+#
+# Upstream calls time out after EMBED_TIMEOUT_S, and callers stop waiting
+# after EMBED_WAIT_TIMEOUT_S (queueing and throttling included), so a hung
+# call fails its requests instead of blocking them forever.
+#
+# The upstream call runs outside the requests' contexts, so its usage goes to
+# the process counters there and each request records its share of the
+# prompt tokens (by token count) when its vectors come back.
+
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "64"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "250000"))  # API limit is 300k per call
+EMBED_BATCH_CONCURRENCY = int(os.getenv("EMBED_BATCH_CONCURRENCY", "4"))
+EMBED_TIMEOUT_S = float(os.getenv("EMBED_TIMEOUT_S", "20"))
+EMBED_WAIT_TIMEOUT_S = float(os.getenv("EMBED_WAIT_TIMEOUT_S", "60"))
+OPENAI_EMBED_RPM = float(os.getenv("OPENAI_EMBED_RPM", "0"))  # 0 = no local limit
+OPENAI_EMBED_TPM = float(os.getenv("OPENAI_EMBED_TPM", "0"))
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` units per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1.0):
+        """Block until `amount` units are available, then take them; returns seconds waited."""
+        amount = min(amount, self.capacity)  # an oversized call waits for a full bucket
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return waited
+                delay = (amount - self.level) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets, matching OpenAI's limits."""
+
+    def __init__(self, rpm=OPENAI_EMBED_RPM, tpm=OPENAI_EMBED_TPM):
+        self.requests = TokenBucket(rpm / 60.0) if rpm else None
+        self.tokens = TokenBucket(tpm / 60.0) if tpm else None
+
+    def acquire(self, tokens):
+        waited = 0.0
+        if self.requests:
+            waited += self.requests.acquire(1)
+        if self.tokens:
+            waited += self.tokens.acquire(tokens)
+        return waited
+
+
+class EmbeddingBatcher:
+    def __init__(self, client, model, max_batch=EMBED_BATCH_MAX, max_wait_ms=EMBED_BATCH_WAIT_MS,
+                 max_tokens=EMBED_BATCH_MAX_TOKENS, limiter=None, concurrency=EMBED_BATCH_CONCURRENCY,
+                 timeout=EMBED_TIMEOUT_S, wait_timeout=EMBED_WAIT_TIMEOUT_S):
+        self.client = client
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_tokens = max_tokens
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout
+        self.wait_timeout = wait_timeout
+        self.queue = queue.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="embed-call")
+        self.stats = {"requests": 0, "upstream_calls": 0, "inputs": 0, "throttled_s": 0.0}
+        self._stats_lock = threading.Lock()
+        threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+
+    def embed(self, texts):
+        """Embed a list of texts; returns a (len(texts), d) float32 array."""
+        texts = list(texts)
+        future = Future()
+        self.queue.put((texts, sum(count_tokens(t, EMBEDDING_ENCODING) for t in texts), future))
+        try:
+            vectors, usage, latency_ms = future.result(timeout=self.wait_timeout)
+        except TimeoutError:
+            raise TimeoutError(f"No embedding after {self.wait_timeout:.0f} s") from None
+        record_request("embed", self.model, usage, latency_ms)
+        return vectors
+
+    def _collect(self, first):
+        """`first` plus whatever else arrives within the wait window; returns (batch, tokens, leftover)."""
+        batch = [first]
+        n_inputs, n_tokens = len(first[0]), first[1]
+        deadline = time.monotonic() + self.max_wait
+        while n_inputs < self.max_batch and n_tokens < self.max_tokens:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if n_inputs + len(item[0]) > self.max_batch or n_tokens + item[1] > self.max_tokens:
+                return batch, n_tokens, item  # does not fit: it opens the next batch
+            batch.append(item)
+            n_inputs += len(item[0])
+            n_tokens += item[1]
+        return batch, n_tokens, None
+
+    def _run(self):
+        leftover = None
+        while True:
+            batch, n_tokens, leftover = self._collect(leftover or self.queue.get())
+            self.pool.submit(self._send, batch, n_tokens)
+
+    def _send(self, batch, n_tokens):
+        inputs = [t for texts, _, _ in batch for t in texts]
+        try:
+            throttled = self.limiter.acquire(n_tokens)
+            start = time.perf_counter()
+            response = self.client.embeddings.create(input=inputs, model=self.model, timeout=self.timeout)
+            latency_ms = (time.perf_counter() - start) * 1000.0
+            vectors = np.array([d.embedding for d in response.data], dtype=np.float32)
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._stats_lock:
+            self.stats["throttled_s"] += throttled
+            self.stats["requests"] += len(batch)
+            self.stats["upstream_calls"] += 1
+            self.stats["inputs"] += len(inputs)
+        usage = getattr(response, "usage", None)
+        USAGE.record("embed", self.model, usage, latency_ms)
+
+        # Split the prompt tokens by each request's token count; rounding the
+        # running total keeps the shares summing to the call's tokens
+        prompt_tokens = usage_tokens(usage)[0]
+        weights = [n for _, n, _ in batch] if n_tokens else [1] * len(batch)
+        total, done, given, start = sum(weights), 0, 0, 0
+        for (texts, _, future), weight in zip(batch, weights):
+            done += weight
+            share = round(prompt_tokens * done / total) - given
+            given += share
+            future.set_result((vectors[start:start + len(texts)], {"prompt_tokens": share}, latency_ms))
+            start += len(texts)
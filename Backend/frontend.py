@@ -1,8 +1,13 @@
 import streamlit as st
-import requests
+from recommender_client import RecommenderClient, RecommenderError
 
 st.set_page_config(page_title="Smart Course Recommender", page_icon="🎓", layout="centered")
 
+@st.cache_resource
+def api():
+    # One client per server process, so reruns reuse its kept-alive connection
+    return RecommenderClient()
+
 st.title("🎓 Smart Career Course Recommender")
 st.markdown("Find the perfect balance of **technical** and **interpersonal** courses for your goals.")
 
@@ -11,21 +16,19 @@ query = st.text_area("Describe your goal or interest:", placeholder="e.g., I wan
 if st.button("Get Recommendations"):
     if query.strip():
         with st.spinner("Fetching recommendations..."):
-            response = requests.post(
-                "http://127.0.0.1:8000/recommend",
-                json={"query": query}
-            )
-            if response.status_code == 200:
-                data = response.json()
-                print(data)
+            try:
+                recs = api().recommend(query)
+            except RecommenderError as e:
+                print(e)
+                st.error("Error: Could not fetch recommendations.")
+            else:
+                print(recs)
                 st.success("Here are your personalized course recommendations:")
 
-                for i, rec in enumerate(data.get("recommended_assessments", []), start=1):
+                for i, rec in enumerate(recs, start=1):
                     st.markdown(f"### {i}. {rec['assessment_name']}")
                     st.markdown(f"**Category:** {rec.get('category', 'N/A')}")
                     st.write(rec['description'])
                     st.divider()
-            else:
-                st.error("Error: Could not fetch recommendations.")
     else:
         st.warning("Please enter a query first.")
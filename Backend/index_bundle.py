@@ -0,0 +1,258 @@
+import os
+import gc
+import json
+import time
+import hashlib
+import pickle
+import threading
+import weakref
+
+import faiss
+
+from passages import PassageIndex
+from cascade import build_idf
+from local_encoder import load_local_encoder, LOCAL_ENCODER_PATH
+from responses import ResponseFragments
+
+# Everything retrieval reads for one catalog build (FAISS index, metadata,
+# optional passage index, lexical IDF, reconstructed vectors, optional local
+# query encoder, pre-serialized response items) lives in one
+# IndexBundle so a new build can be swapped in as a unit.
+#
+# Requests take a reference to the current bundle once and use it until they
+# finish; a reload only rebinds HotSwap's reference, so in-flight requests
+# complete on the old bundle and its memory is released when the last of
+# them drops it.
+
+MANIFEST_FILE = "manifest.json"
+
+# Output dimension of the embedding models the index may be built with
+MODEL_DIMS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def read_manifest(index_dir):
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def content_hash(index_dir):
+    """Short sha1 of the build's files (all but the manifest and the local encoder fitted afterwards)."""
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(index_dir)):
+        path = os.path.join(index_dir, name)
+        if name.startswith(MANIFEST_FILE) or name == os.path.basename(LOCAL_ENCODER_PATH) or not os.path.isfile(path):
+            continue
+        digest.update(name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:8]
+
+
+def write_manifest(index_dir, model, dim, count, **extra):
+    """
+    Written last by build_index: its presence marks a complete bundle. The
+    version is the build time plus a hash of the files, so two builds in the
+    same second only share a version when their contents are identical (the
+    warm cache and the local encoder are keyed on it).
+    """
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{content_hash(index_dir)}"
+    manifest = {"version": version, "model": model, "dim": int(dim),
+                "count": int(count), "built_at": time.time(), **extra}
+    tmp = os.path.join(index_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(index_dir, MANIFEST_FILE))
+    return manifest
+
+
+def read_metas(meta_path):
+    with open(meta_path, "rb") as f:
+        data = pickle.load(f)
+
+    if isinstance(data, dict) and "metadatas" in data and "texts" in data:
+        metas = data["metadatas"]
+        for m, text in zip(metas, data["texts"]):
+            m["jd"] = text
+    else:
+        metas = data
+        for m in metas:
+            if "jd" not in m:
+                m["jd"] = ""
+    return metas
+
+
+def validate_bundle(index, metas, manifest, model, passages=None):
+    """Raise ValueError listing every way the files disagree with each other."""
+    errors = []
+    if index.ntotal != len(metas):
+        errors.append(f"index has {index.ntotal} vectors but metadata has {len(metas)} entries")
+    if manifest.get("count") is not None and manifest["count"] != index.ntotal:
+        errors.append(f"manifest count {manifest['count']} != index size {index.ntotal}")
+    if manifest.get("model") and manifest["model"] != model:
+        errors.append(f"index built with {manifest['model']} but queries are embedded with {model}")
+    expected_dim = manifest.get("dim") or MODEL_DIMS.get(model)
+    if expected_dim and index.d != expected_dim:
+        errors.append(f"index dimension {index.d} != expected {expected_dim} for {model}")
+    if passages is not None and passages.meta.get("parents") != len(metas):
+        errors.append(f"passage index covers {passages.meta.get('parents')} assessments, metadata has {len(metas)}")
+    if errors:
+        raise ValueError("Invalid index bundle: " + "; ".join(errors))
+
+
+class IndexBundle:
+    """One loaded and validated catalog build."""
+
+    def __init__(self, index, metas, manifest, passages=None, local_encoder=None):
+        self.index = index
+        self.metas = metas
+        self.manifest = manifest
+        self.passages = passages
+        self.local_encoder = local_encoder
+        self.version = manifest.get("version", "unversioned")
+        self.loaded_at = time.time()
+        # Catalog-wide IDF for the lexical cascade stage
+        self.lexical_idf = build_idf([f"{m.get('assessment_name', '')} {m.get('jd', '')}" for m in metas])
+        # Response JSON per doc_id, validated against the API schema once per load
+        self.fragments = ResponseFragments(metas)
+        self._vectors = None
+        self._vectors_lock = threading.Lock()
+
+    def vectors(self):
+        """Stored (normalized) catalog vectors, reconstructed from the index on first use."""
+        if self._vectors is None:
+            with self._vectors_lock:
+                if self._vectors is None:
+                    self._vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        return self._vectors
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "count": int(self.index.ntotal),
+            "dim": int(self.index.d),
+            "model": self.manifest.get("model"),
+            "passages": int(self.passages.index.ntotal) if self.passages is not None else 0,
+            "local_encoder": self.local_encoder.info if self.local_encoder is not None else None,
+            "loaded_at": self.loaded_at,
+        }
+
+
+def load_bundle(index_path, meta_path, model, use_passages=False, passage_dir=None, encoder_path=None):
+    index_dir = os.path.dirname(index_path)
+    manifest = read_manifest(index_dir)
+    index = faiss.read_index(index_path)
+    metas = read_metas(meta_path)
+
+    passage_dir = passage_dir or index_dir
+    passages = PassageIndex(passage_dir) if use_passages and PassageIndex.exists(passage_dir) else None
+
+    validate_bundle(index, metas, manifest, model, passages)
+    # A missing or mismatched encoder only disables the local path, it never rejects the bundle
+    local_encoder = load_local_encoder(encoder_path, model, index.d, manifest.get("version", "unversioned"))
+    return IndexBundle(index, metas, manifest, passages, local_encoder)
+
+
+class HotSwap:
+    """
+    Holds the current IndexBundle and replaces it without blocking readers.
+    Loading and validation happen off to the side; only the final reference
+    assignment is visible to requests, and it is atomic. The first bundle is
+    loaded on first use (normally by the service's warm-up).
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._reload_lock = threading.Lock()
+        self._bundle = None
+        self._listeners = []
+        self.status = {"state": "not_loaded", "error": None, "reloads": 0, "last_reload_at": None}
+
+    def current(self):
+        bundle = self._bundle
+        if bundle is None:
+            with self._reload_lock:
+                if self._bundle is None:
+                    self._bundle = self._loader()
+                    self.status["state"] = "ready"
+                bundle = self._bundle
+        return bundle
+
+    def on_swap(self, callback):
+        """Call `callback(new_bundle)` after every successful reload."""
+        self._listeners.append(callback)
+
+    @property
+    def loaded(self):
+        return self._bundle is not None
+
+    def reload(self):
+        """Load, validate and swap in a new bundle. Raises if it is invalid."""
+        with self._reload_lock:
+            self.status.update(state="loading", error=None)
+            start = time.perf_counter()
+            try:
+                bundle = self._loader()
+            except Exception as e:
+                self.status.update(state="failed", error=str(e))
+                kept = self._bundle.version if self._bundle is not None else None
+                print(f"⚠️ Index reload failed, keeping version {kept}: {e}")
+                raise
+
+            old, self._bundle = self._bundle, bundle
+            if old is not None:
+                weakref.finalize(old, print, f"♻️ Released index version {old.version}")
+                del old
+                gc.collect()
+            self.status.update(state="ready", reloads=self.status["reloads"] + 1, last_reload_at=time.time())
+            print(f"✅ Swapped in index version {bundle.version} ({bundle.index.ntotal} vectors) "
+                  f"in {(time.perf_counter() - start) * 1000.0:.0f} ms")
+        for callback in self._listeners:
+            try:
+                callback(bundle)
+            except Exception as e:
+                print(f"⚠️ Index swap listener failed: {e}")
+        return bundle
+
+    def reload_in_background(self):
+        """Start a reload thread; False if one is already running."""
+        if self._reload_lock.locked():
+            return False
+
+        def run():
+            try:
+                self.reload()
+            except Exception:
+                pass  # recorded in self.status
+
+        threading.Thread(target=run, name="index-reload", daemon=True).start()
+        return True
+
+    def watch(self, index_dir, interval=30.0):
+        """Reload whenever build_index writes a new manifest into index_dir."""
+        path = os.path.join(index_dir, MANIFEST_FILE)
+
+        def mtime():
+            return os.path.getmtime(path) if os.path.exists(path) else None
+
+        def loop():
+            seen = mtime()
+            while True:
+                time.sleep(interval)
+                current = mtime()
+                if current is not None and current != seen:
+                    seen = current
+                    print(f"🔄 New index manifest detected in {index_dir}, reloading...")
+                    try:
+                        self.reload()
+                    except Exception:
+                        pass  # recorded in self.status
+
+        threading.Thread(target=loop, name="index-watch", daemon=True).start()
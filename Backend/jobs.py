@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+import ipaddress
+from urllib.parse import urlparse
+
+# Asynchronous jobs for slow requests (job-posting URLs, large query batches).
+#
+# Submitting writes the job to a local sqlite database and queues it; a fixed
+# pool of worker threads takes jobs highest priority first (FIFO within a
+# priority). Results are stored with the job for polling and, when the job
+# has a callback URL, POSTed there. Jobs still queued or running when the
+# process stops are picked up again on the next start.
+
+JOBS_DB = os.getenv("JOBS_DB", "data/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "1000"))
+# Callbacks only go to loopback addresses plus these extra hosts
+JOB_CALLBACK_HOSTS = {h.strip() for h in os.getenv("JOB_CALLBACK_HOSTS", "").split(",") if h.strip()}
+JOB_CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT", "5"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    callback_url TEXT,
+    callback_status TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority DESC, created_at);
+"""
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+def callback_allowed(url):
+    """
+    Only loopback targets (or JOB_CALLBACK_HOSTS), so jobs cannot be used to
+    reach the internal network. Link-local addresses (cloud metadata) are
+    refused even when listed.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return False
+    host = parsed.hostname
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return host == "localhost" or host in JOB_CALLBACK_HOSTS
+    if ip.is_link_local:
+        return False
+    return ip.is_loopback or host in JOB_CALLBACK_HOSTS
+
+
+class JobStore:
+    """sqlite-backed job records; one connection shared under a lock."""
+
+    def __init__(self, path=JOBS_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def create(self, kind, payload, priority=0, callback_url=None):
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, priority, payload, callback_url, created_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, priority, json.dumps(payload), callback_url, time.time()),
+        )
+        return job_id
+
+    def get(self, job_id):
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._to_dict(rows[0]) if rows else None
+
+    def list(self, status=None, limit=50):
+        if status:
+            rows = self._execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit))
+        else:
+            rows = self._execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [self._to_dict(r, with_result=False) for r in rows]
+
+    def count(self, status):
+        return self._execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,))[0][0]
+
+    def pending(self):
+        """Jobs to (re)queue at startup: queued ones plus those interrupted mid-run."""
+        self._execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        rows = self._execute("SELECT id, priority, created_at FROM jobs WHERE status = 'queued'")
+        return [(r["id"], r["priority"], r["created_at"]) for r in rows]
+
+    def start(self, job_id):
+        """Mark queued -> running; False if the job was cancelled or already taken."""
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id))
+            return cur.rowcount == 1
+
+    def finish(self, job_id, result=None, error=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            ("failed" if error else "done", json.dumps(result) if result is not None else None, error,
+             time.time(), job_id),
+        )
+
+    def cancel(self, job_id):
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id))
+            return cur.rowcount == 1
+
+    def set_callback_status(self, job_id, status):
+        self._execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (status, job_id))
+
+    @staticmethod
+    def _to_dict(row, with_result=True):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        result = job.pop("result")
+        if with_result:
+            job["result"] = json.loads(result) if result else None
+        return job
+
+
+class JobRunner:
+    """Priority queue plus a fixed pool of worker threads running `handler(kind, payload)`."""
+
+    def __init__(self, handler, store=None, workers=JOB_WORKERS, limit=JOB_QUEUE_LIMIT):
+        self.handler = handler
+        self.store = store or JobStore()
+        self.workers = workers
+        self.limit = limit
+        self.queue = queue.PriorityQueue()
+        self.started = False
+
+    def _enqueue(self, job_id, priority, created_at):
+        # Higher priority first, then oldest first
+        self.queue.put((-priority, created_at, job_id))
+
+    def start(self):
+        if self.started:
+            return
+        self.started = True
+        resumed = self.store.pending()
+        for job_id, priority, created_at in resumed:
+            self._enqueue(job_id, priority, created_at)
+        if resumed:
+            print(f"🔁 Resuming {len(resumed)} unfinished jobs")
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, kind, payload, priority=0, callback_url=None):
+        if self.queue.qsize() >= self.limit:
+            raise QueueFull(f"Job queue is full ({self.limit} jobs waiting)")
+        if callback_url and not callback_allowed(callback_url):
+            raise ValueError("callback_url must point to a local address")
+        job_id = self.store.create(kind, payload, priority, callback_url)
+        self._enqueue(job_id, priority, time.time())
+        return job_id
+
+    def _work(self):
+        while True:
+            _, _, job_id = self.queue.get()
+            if not self.store.start(job_id):
+                continue  # cancelled, or a duplicate entry from resuming
+            job = self.store.get(job_id)
+            try:
+                result = self.handler(job["kind"], job["payload"])
+                self.store.finish(job_id, result=result)
+            except Exception as e:
+                print(f"⚠️ Job {job_id} failed: {e}")
+                self.store.finish(job_id, error=str(e))
+            if job.get("callback_url"):
+                self._callback(job_id, job["callback_url"])
+
+    def _callback(self, job_id, url):
+        import requests
+        try:
+            r = requests.post(url, json=self.store.get(job_id), timeout=JOB_CALLBACK_TIMEOUT)
+            self.store.set_callback_status(job_id, str(r.status_code))
+        except Exception as e:
+            self.store.set_callback_status(job_id, f"error: {e}")
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from types import SimpleNamespace
+
+# ---------------- CONFIG ----------------
+# off    -> plain OpenAI client (default, production)
+# record -> call OpenAI and save every response under OPENAI_REPLAY_DIR
+# replay -> never touch the network; answer from the saved fixtures
+REPLAY_MODE = os.getenv("OPENAI_REPLAY_MODE", "off").lower()
+REPLAY_DIR = os.getenv("OPENAI_REPLAY_DIR", "data/replay")
+# recorded | none | fixed:MS | normal:MEAN_MS,STD_MS | lognormal:MEDIAN_MS,SIGMA
+REPLAY_LATENCY = os.getenv("OPENAI_REPLAY_LATENCY", "recorded")
+REPLAY_SEED = int(os.getenv("OPENAI_REPLAY_SEED", "0"))
+
+
+class ReplayMiss(KeyError):
+    """Raised in replay mode when no fixture was recorded for a request."""
+
+
+# ---------------- FIXTURE STORE ----------------
+def request_key(endpoint: str, kwargs: dict) -> str:
+    payload = json.dumps({"endpoint": endpoint, **kwargs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FixtureStore:
+    """One JSON file per (endpoint, request) pair, so fixtures diff cleanly in git."""
+
+    def __init__(self, root=REPLAY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, endpoint, key):
+        return os.path.join(self.root, f"{endpoint.replace('.', '_')}-{key[:24]}.json")
+
+    def load(self, endpoint, key):
+        path = self._path(endpoint, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, endpoint, key, request, response, latency_ms):
+        path = self._path(endpoint, key)
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "endpoint": endpoint,
+                    "request": request,
+                    "response": response,
+                    "latency_ms": latency_ms,
+                }, f, indent=1, default=str)
+
+
+# ---------------- SYNTHETIC LATENCY ----------------
+class LatencyModel:
+    """Samples the delay applied to a replayed call."""
+
+    def __init__(self, spec=REPLAY_LATENCY, seed=REPLAY_SEED):
+        self.kind, _, params = spec.partition(":")
+        self.params = [float(p) for p in params.split(",") if p]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_ms(self, recorded_ms: float) -> float:
+        with self._lock:
+            if self.kind == "none":
+                return 0.0
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "normal":
+                mean, std = self.params
+                return max(0.0, self._rng.gauss(mean, std))
+            if self.kind == "lognormal":
+                median, sigma = self.params
+                return median * self._rng.lognormvariate(0.0, sigma)
+        return recorded_ms or 0.0
+
+
+# ---------------- CLIENT WRAPPER ----------------
+def _to_namespace(obj):
+    """Turn a recorded JSON payload back into attribute-accessible objects."""
+    if isinstance(obj, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return [_to_namespace(v) for v in obj]
+    return obj
+
+
+def _dump(response):
+    data = response.model_dump(mode="json") if hasattr(response, "model_dump") else response
+    # `output_text` is a computed property on Responses objects, not a field
+    if hasattr(response, "output_text"):
+        data["output_text"] = response.output_text
+    return data
+
+
+class _Endpoint:
+    def __init__(self, owner, name, real_fn):
+        self._owner = owner
+        self._name = name
+        self._real_fn = real_fn
+
+    def create(self, **kwargs):
+        return self._owner._call(self._name, self._real_fn, kwargs)
+
+
+class ReplayClient:
+    """Drop-in stand-in for the parts of `OpenAI` the recommenders use.
+
+    Exposes `embeddings.create`, `responses.create` and
+    `chat.completions.create`. In record mode every call is forwarded to the
+    real client and saved; in replay mode calls are answered from disk after
+    a synthetic delay drawn from `LatencyModel`.
+    """
+
+    def __init__(self, mode=REPLAY_MODE, real_client=None, store=None, latency=None):
+        self.mode = mode
+        self.real = real_client
+        self.store = store or FixtureStore()
+        self.latency = latency or LatencyModel()
+
+        real = real_client
+        self.embeddings = _Endpoint(self, "embeddings", real.embeddings.create if real else None)
+        self.responses = _Endpoint(self, "responses", real.responses.create if real else None)
+        self.chat = SimpleNamespace(completions=_Endpoint(
+            self, "chat.completions", real.chat.completions.create if real else None
+        ))
+
+    def _call(self, endpoint, real_fn, kwargs):
+        key = request_key(endpoint, kwargs)
+        if kwargs.get("stream"):
+            return self._stream(endpoint, key, real_fn, kwargs)
+
+        if self.mode == "replay":
+            fixture = self.store.load(endpoint, key)
+            if fixture is None:
+                raise ReplayMiss(f"No recorded {endpoint} response for request {key[:12]}")
+            time.sleep(self.latency.sample_ms(fixture.get("latency_ms", 0.0)) / 1000.0)
+            return _to_namespace(fixture["response"])
+
+        start = time.perf_counter()
+        response = real_fn(**kwargs)
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        self.store.save(endpoint, key, kwargs, _dump(response), latency_ms)
+        return response
+
+    def _stream(self, endpoint, key, real_fn, kwargs):
+        """Streaming calls: record each event with its arrival offset, replay with scaled gaps."""
+        if self.mode == "replay":
+            fixture = self.store.load(endpoint, key)
+            if fixture is None:
+                raise ReplayMiss(f"No recorded {endpoint} stream for request {key[:12]}")
+            recorded = fixture.get("latency_ms", 0.0)
+            scale = self.latency.sample_ms(recorded) / recorded if recorded else 0.0
+            previous = 0.0
+            for event in fixture["response"]:
+                time.sleep(max(0.0, event["t_ms"] - previous) * scale / 1000.0)
+                previous = event["t_ms"]
+                yield _to_namespace(event["event"])
+            return
+
+        start = time.perf_counter()
+        events = []
+        stream = real_fn(**kwargs)
+        try:
+            for event in stream:
+                events.append({"t_ms": (time.perf_counter() - start) * 1000.0, "event": _dump(event)})
+                yield event
+        finally:
+            # Consumers may stop early; keep what they actually saw
+            if hasattr(stream, "close"):
+                stream.close()
+            latency_ms = events[-1]["t_ms"] if events else 0.0
+            self.store.save(endpoint, key, kwargs, events, latency_ms)
+
+
+def make_client(api_key=None):
+    """Build the OpenAI client for the configured OPENAI_REPLAY_MODE."""
+    if REPLAY_MODE == "replay":
+        return ReplayClient("replay")
+
+    from openai import OpenAI
+    real = OpenAI(api_key=api_key)
+    if REPLAY_MODE == "record":
+        return ReplayClient("record", real_client=real)
+    return real
+
+
+def llm_available(api_key=None) -> bool:
+    """LLM stages can run with a real key or from recorded fixtures."""
+    return bool(api_key) or REPLAY_MODE == "replay"
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Token, latency and cost accounting for every OpenAI call.
+#
+# Calls go through llm_call(stage, client.x.create, **kwargs), which reads the
+# `usage` block of the response and adds it to process-wide counters keyed by
+# (stage, model), and to the current request's counters when one is being
+# tracked (track_request). Calls made on a pool thread for several requests
+# at once (the embedding batcher) record the process counters there and hand
+# each waiting request its share to record_request in its own context. The
+# service exposes the process counters on GET /metrics; the benchmarks and
+# evaluation scripts put them in their reports, so a prompt that grows shows
+# up as more prompt tokens per call, more latency and more cost.
+
+# USD per 1M tokens: (input, output). Override or extend with LLM_PRICES='{"model": [in, out]}'
+PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-ada-002": (0.10, 0.0),
+}
+PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+
+COUNTERS = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens", "latency_ms", "cost_usd")
+
+_request = contextvars.ContextVar("llm_usage_request", default=None)
+
+
+def _field(obj, name):
+    if obj is None:
+        return None
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def usage_tokens(usage):
+    """(prompt, completion, cached) tokens from a Responses, Chat Completions or Embeddings usage block."""
+    prompt = _field(usage, "input_tokens") or _field(usage, "prompt_tokens") or 0
+    completion = _field(usage, "output_tokens") or _field(usage, "completion_tokens") or 0
+    details = _field(usage, "input_tokens_details") or _field(usage, "prompt_tokens_details")
+    return int(prompt), int(completion), int(_field(details, "cached_tokens") or 0)
+
+
+def cost_usd(model, prompt_tokens, completion_tokens):
+    price_in, price_out = PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+
+
+class UsageStats:
+    """Counters per (stage, model); safe to update from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage, model, usage, latency_ms):
+        prompt, completion, cached = usage_tokens(usage)
+        delta = (1, prompt, completion, cached, latency_ms, cost_usd(model, prompt, completion))
+        with self._lock:
+            row = self._stages.setdefault((stage, model or "unknown"), dict.fromkeys(COUNTERS, 0))
+            for name, value in zip(COUNTERS, delta):
+                row[name] += value
+
+    def snapshot(self):
+        """{"stage/model": counters plus per-call and per-token figures}."""
+        with self._lock:
+            rows = {f"{stage}/{model}": dict(row) for (stage, model), row in self._stages.items()}
+        return {key: with_rates(row) for key, row in sorted(rows.items())}
+
+    def totals(self):
+        return totals(self.snapshot())
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+def with_rates(row):
+    calls = row["calls"] or 1
+    return {
+        **row,
+        "prompt_tokens_per_call": row["prompt_tokens"] / calls,
+        "completion_tokens_per_call": row["completion_tokens"] / calls,
+        "latency_ms_per_call": row["latency_ms"] / calls,
+        # Generation speed; None for embedding calls, which produce no output tokens
+        "ms_per_completion_token": row["latency_ms"] / row["completion_tokens"] if row["completion_tokens"] else None,
+        "ms_per_1k_prompt_tokens": 1000.0 * row["latency_ms"] / row["prompt_tokens"] if row["prompt_tokens"] else None,
+    }
+
+
+def totals(snapshot):
+    return {name: sum(row[name] for row in snapshot.values()) for name in COUNTERS}
+
+
+def diff(before, after):
+    """Usage between two snapshots (e.g. from GET /metrics?format=json before and after a run)."""
+    rows = {}
+    for key, row in after.items():
+        prev = before.get(key, {})
+        delta = {name: row[name] - prev.get(name, 0) for name in COUNTERS}
+        if delta["calls"]:
+            rows[key] = with_rates(delta)
+    return rows
+
+
+USAGE = UsageStats()
+
+
+def llm_call(stage, create, **kwargs):
+    """Run `create(**kwargs)` (an OpenAI `*.create` method) and account its usage under `stage`."""
+    start = time.perf_counter()
+    response = create(**kwargs)
+    record(stage, kwargs.get("model"), getattr(response, "usage", None), (time.perf_counter() - start) * 1000.0)
+    return response
+
+
+def record(stage, model, usage, latency_ms):
+    USAGE.record(stage, model, usage, latency_ms)
+    record_request(stage, model, usage, latency_ms)
+
+
+def record_request(stage, model, usage, latency_ms):
+    """Add usage to the current request's counters only (the process counters already have it)."""
+    request = _request.get()
+    if request is not None:
+        request.record(stage, model, usage, latency_ms)
+
+
+@contextmanager
+def track_request():
+    """Collect the usage of the calls made inside the block (and threads started with its context)."""
+    stats = UsageStats()
+    token = _request.set(stats)
+    try:
+        yield stats
+    finally:
+        _request.reset(token)
+
+
+def prometheus(snapshot):
+    """Snapshot in the Prometheus text exposition format."""
+    lines = []
+    metrics = [
+        ("llm_calls_total", "calls", 1, "LLM API calls"),
+        ("llm_prompt_tokens_total", "prompt_tokens", 1, "Prompt (input) tokens"),
+        ("llm_completion_tokens_total", "completion_tokens", 1, "Completion (output) tokens"),
+        ("llm_cached_tokens_total", "cached_tokens", 1, "Prompt tokens served from the provider cache"),
+        ("llm_latency_seconds_total", "latency_ms", 1e-3, "Wall time spent in LLM calls"),
+        ("llm_cost_usd_total", "cost_usd", 1, "Estimated spend from PRICES"),
+    ]
+    for name, field, scale, help_text in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for key, row in snapshot.items():
+            stage, model = key.split("/", 1)
+            lines.append(f'{name}{{stage="{stage}",model="{model}"}} {row[field] * scale:.6g}')
+    return "\n".join(lines) + "\n"
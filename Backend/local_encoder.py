@@ -0,0 +1,184 @@
+import os
+import re
+import glob
+import json
+import zlib
+
+import numpy as np
+
+# Network-free query encoder.
+#
+# For short queries (role titles, a handful of skills) the embedding API
+# round trip is most of the latency of the non-LLM path. This encoder maps
+# hashed TF-IDF features (words, word bigrams, character trigrams) linearly
+# into the embedding space of the index. The projection is a ridge
+# regression fitted offline on the catalog texts with their stored vectors
+# plus recorded query embeddings (llm_replay fixtures).
+#
+# With far fewer examples than features the regression is solved in its dual
+# form, W = Xᵀα with α = (XXᵀ + λ·diag(1/w))⁻¹(Y - ȳ). Only the sparse
+# training features and α are stored, so encoding a query is one sparse dot
+# product against the training rows followed by one (n x dim) product.
+#
+# Benchmarks/tune_local_encoder.py trains it, reports top-k overlap with the
+# real embeddings on the Train-Set per query length, and can write the
+# serving config `local_encoder_max_words` cut-off under which it is used.
+
+LOCAL_ENCODER_PATH = os.getenv("LOCAL_ENCODER_PATH", "data/faiss_index/local_encoder.npz")
+HASH_BITS = 20
+_TOKEN = re.compile(r"[a-z0-9+#]+")
+
+
+def features(text):
+    """{hashed feature id: count} for one text."""
+    words = _TOKEN.findall(str(text).lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    mask = (1 << HASH_BITS) - 1
+    counts = {}
+    for g in grams:
+        h = zlib.crc32(g.encode("utf-8")) & mask
+        counts[h] = counts.get(h, 0) + 1
+    return counts
+
+
+def recorded_embeddings(replay_dir, model):
+    """(texts, vectors) from embedding calls saved by llm_replay in record mode."""
+    texts, vectors = [], []
+    for path in sorted(glob.glob(os.path.join(replay_dir, "embeddings-*.json"))):
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        request = fixture.get("request", {})
+        if request.get("model") != model:
+            continue
+        inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        for text, item in zip(inputs, fixture["response"]["data"]):
+            texts.append(str(text))
+            vectors.append(item["embedding"])
+    return texts, np.asarray(vectors, dtype=np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+
+class LocalEncoder:
+    """Ridge projection from hashed TF-IDF features to normalized embeddings."""
+
+    def __init__(self, vocab, idf, indptr, rows, values, alpha, mean, model, info=None):
+        self.vocab = vocab      # sorted hashed feature ids seen in training
+        self.idf = idf
+        # Training features, column-compressed: rows/values of feature j live in indptr[j]:indptr[j+1]
+        self.indptr = indptr
+        self.rows = rows
+        self.values = values
+        self.alpha = alpha      # (n_train, dim) dual coefficients
+        self.mean = mean        # (dim,) intercept
+        self.model = model
+        self.info = info or {}
+
+    @property
+    def dim(self):
+        return self.alpha.shape[1]
+
+    def _tfidf(self, text, vocab, idf):
+        """(positions into vocab, l2-normalized weights) for the known features of `text`."""
+        counts = features(text)
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        pos = np.minimum(np.searchsorted(vocab, ids), len(vocab) - 1)
+        known = vocab[pos] == ids
+        pos = pos[known]
+        weights = (1.0 + np.log(tf[known])) * idf[pos]
+        norm = np.linalg.norm(weights)
+        return pos, (weights / norm if norm > 0 else weights).astype(np.float32)
+
+    def covers(self, text):
+        """True if `text` has any feature seen in training; otherwise encode() would return the mean."""
+        return len(self._tfidf(text, self.vocab, self.idf)[0]) > 0
+
+    def encode(self, texts):
+        """One normalized embedding row per text."""
+        kernel = np.zeros((len(texts), len(self.alpha)), dtype=np.float32)
+        for i, text in enumerate(texts):
+            pos, weights = self._tfidf(text, self.vocab, self.idf)
+            for j, w in zip(pos, weights):
+                lo, hi = self.indptr[j], self.indptr[j + 1]
+                kernel[i, self.rows[lo:hi]] += w * self.values[lo:hi]
+        emb = kernel @ self.alpha + self.mean
+        return (emb / np.linalg.norm(emb, axis=1, keepdims=True)).astype(np.float32)
+
+    @classmethod
+    def fit(cls, texts, vectors, model, weights=None, ridge=0.1, block=8192):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        weights = np.ones(len(texts), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+        n = len(texts)
+
+        counts = [features(t) for t in texts]
+        vocab = np.unique(np.fromiter((h for c in counts for h in c), dtype=np.int64))
+        df = np.zeros(len(vocab), dtype=np.float32)
+        for c in counts:
+            df[np.searchsorted(vocab, np.fromiter(c.keys(), dtype=np.int64, count=len(c)))] += 1
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+
+        # Training rows as (row, column, value) triples, then sorted by column
+        enc = cls(vocab, idf, None, None, None, None, None, model)
+        parts = [enc._tfidf(t, vocab, idf) for t in texts]
+        rows = np.concatenate([np.full(len(p), i, dtype=np.int32) for i, (p, _) in enumerate(parts)])
+        cols = np.concatenate([p for p, _ in parts])
+        vals = np.concatenate([v for _, v in parts])
+        order = np.argsort(cols, kind="stable")
+        rows, cols, vals = rows[order], cols[order], vals[order]
+        indptr = np.searchsorted(cols, np.arange(len(vocab) + 1))
+
+        # Gram matrix XXᵀ, densifying one block of feature columns at a time
+        gram = np.zeros((n, n), dtype=np.float64)
+        for start in range(0, len(vocab), block):
+            lo, hi = indptr[start], indptr[min(start + block, len(vocab))]
+            dense = np.zeros((n, block), dtype=np.float32)
+            dense[rows[lo:hi], cols[lo:hi] - start] = vals[lo:hi]
+            gram += dense @ dense.T
+
+        mean = (weights[:, None] * vectors).sum(axis=0) / weights.sum()
+        alpha = np.linalg.solve(gram + ridge * np.diag(1.0 / weights), vectors - mean).astype(np.float32)
+
+        info = {"n_train": n, "n_features": int(len(vocab)), "ridge": ridge}
+        return cls(vocab, idf, indptr.astype(np.int64), rows, vals, alpha, mean.astype(np.float32), model, info)
+
+    def save(self, path=LOCAL_ENCODER_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, vocab=self.vocab, idf=self.idf, indptr=self.indptr, rows=self.rows,
+                            values=self.values, alpha=self.alpha, mean=self.mean,
+                            meta=np.array(json.dumps({"model": self.model, **self.info})))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=LOCAL_ENCODER_PATH):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(data["vocab"], data["idf"], data["indptr"], data["rows"], data["values"],
+                       data["alpha"], data["mean"], meta.pop("model"), meta)
+
+
+def load_local_encoder(path, model, dim, index_version=None):
+    """The encoder at `path` if it exists and was fitted on this index build, else None."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        encoder = LocalEncoder.load(path)
+    except Exception as e:
+        print(f"⚠️ Could not load local query encoder {path}: {e}")
+        return None
+    if encoder.model != model or encoder.dim != dim:
+        print(f"⚠️ Ignoring local query encoder {path}: trained for {encoder.model} ({encoder.dim}-d), "
+              f"index is {model} ({dim}-d)")
+        return None
+    if index_version is not None and encoder.info.get("index_version") != index_version:
+        print(f"⚠️ Ignoring local query encoder {path}: fitted on index version "
+              f"{encoder.info.get('index_version')}, index is {index_version}")
+        return None
+    return encoder
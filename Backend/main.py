@@ -1,13 +1,88 @@
 # main.py
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, HttpUrl
-from recommender import get_recommendations
-import requests
-from readability import Document
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from tracing import span, request_trace, SETTINGS as PROFILING
+from responses import RecommendResponse, to_item, render, add_fields
+from serving_config import get_setting
+import llm_usage
 import os
+import json
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="SHL Assessment Recommender")
+# Admin endpoints need X-Admin-Token: ADMIN_TOKEN. Without a token they are
+# refused, unless ADMIN_OPEN=1 opens them (local development only)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_OPEN = os.getenv("ADMIN_OPEN", "0") == "1"
+# Load the index and open the LLM connection before accepting traffic
+WARM_UP = os.getenv("WARM_UP", "1") == "1"
+# /recommend/batch limits: queries per call, and how many run at once
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "32"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Serve recurring queries from precomputed responses (warm_cache.py)
+WARM_CACHE = os.getenv("WARM_CACHE", "1") == "1"
+
+def engine():
+    """
+    The recommender module. Importing it pulls in faiss, numpy and openai,
+    so it happens in the lifespan handler rather than when main is imported.
+    """
+    import recommender
+    return recommender
+
+_job_runner = None
+
+def job_runner():
+    """The /jobs worker pool and sqlite store, created on first use."""
+    global _job_runner
+    if _job_runner is None:
+        from jobs import JobRunner
+        _job_runner = JobRunner(run_job)
+    return _job_runner
+
+_warm_cache = None
+
+def warm_cache():
+    """The precomputed-response cache and the query log feeding it, created on first use."""
+    global _warm_cache
+    if _warm_cache is None:
+        from warm_cache import WarmCache, QueryLog
+        _warm_cache = WarmCache(QueryLog())
+        _warm_cache.load()
+    return _warm_cache
+
+def extractor():
+    """page_extract (lxml, readability, requests), imported on first use."""
+    import page_extract
+    return page_extract
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start = time.perf_counter()
+    rec = await run_in_threadpool(engine)
+    if WARM_UP:
+        await run_in_threadpool(rec.warm_up)
+        await run_in_threadpool(extractor().warm_pool)
+    if rec.INDEX_WATCH_SECONDS > 0:
+        rec.watch_index(rec.INDEX_WATCH_SECONDS)
+    job_runner().start()
+    if WARM_CACHE:
+        cache = warm_cache()
+        rec.INDEXES.on_swap(cache.on_index_swap)
+        # Recompute unless the saved entries were built on the index being served
+        if WARM_UP and not cache.covers(rec.current_bundle().version):
+            cache.refresh_in_background()
+    print(f"🚀 Ready in {(time.perf_counter() - start) * 1000.0:.0f} ms")
+    yield
+    if WARM_CACHE:
+        warm_cache().log.save()
+
+app = FastAPI(title="SHL Assessment Recommender", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,60 +98,330 @@ class RecommendRequest(BaseModel):
     max_recs: int = 5
     use_llm_rerank: bool = False
 
-class RecommendationItem(BaseModel):
-    assessment_name: str
-    url: HttpUrl
-    short_reason: str | None = None
-    relevance_score: float
+class BatchRecommendRequest(BaseModel):
+    queries: list[str]
 
-class RecommendResponse(BaseModel):
-    recommendations: list[RecommendationItem]
+class JSONBytesResponse(JSONResponse):
+    """Body already encoded as JSON (see responses.render); sent without re-encoding."""
+    def render(self, content) -> bytes:
+        return content
 
 @app.get("/health")
 def health():
     return {"status": "healthy"}
 
 def fetch_text_from_url(url: str) -> str:
+    pages = extractor()
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        doc = Document(r.text)
-        summary = doc.summary()  # HTML snippet
-        # Strip tags
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(summary, "html.parser")
-        return soup.get_text(separator="\n", strip=True)
+        return pages.fetch_page_text(url)
+    except pages.PageTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"Failed to fetch URL: {e}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {e}")
 
-@app.post("/recommend")
-def recommend(req: RecommendRequest):
-    print(f"🔑 OPENAI key detected in environment? {bool(os.getenv('OPENAI_API_KEY'))}")
+def resolve_query_text(req: RecommendRequest) -> str:
     if not req.query and not req.url:
         raise HTTPException(status_code=400, detail="Provide either 'query' or 'url'.")
-    
+
     text = req.query or ""
     if req.url:
         text = fetch_text_from_url(str(req.url))
-    
+    return text
+
+def check_queries(queries: list[str]):
+    """Batch size and content checks shared by /recommend/batch and /jobs."""
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUERIES} queries per batch.")
+    if any(not q.strip() for q in queries):
+        raise HTTPException(status_code=400, detail="Queries must not be empty.")
+
+def format_item(r: dict) -> dict:
+    # Format output exactly as required (responses.RecommendationItem)
+    return to_item(r).model_dump()
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/recommend", response_model=RecommendResponse, response_class=JSONBytesResponse)
+def recommend(req: RecommendRequest, x_profile: str | None = Header(default=None),
+              x_admin_token: str | None = Header(default=None)):
+    """
+    Send `X-Profile: 1` to get a per-stage trace in the response (`trace` field
+    and Server-Timing header); `X-Profile: flamegraph` also samples the stack
+    and writes collapsed stacks to PROFILE_DIR when flamegraphs are enabled in
+    /admin/profiling or the request carries the admin token.
+
+    Items are written from the fragments pre-serialized at index load. The
+    LLM tokens and estimated cost of the request are in the X-LLM-Usage header.
+    Recurring text queries are answered from the warm cache (X-Warm-Cache: hit).
+    """
+    print(f"🔑 OPENAI key detected in environment? {bool(os.getenv('OPENAI_API_KEY'))}")
+    with request_trace("recommend", x_profile, allow_flamegraph=is_admin(x_admin_token)) as trace:
+        text = resolve_query_text(req)
+
+        max_recs = 10
+        cache = warm_cache() if WARM_CACHE and req.query and not req.url else None
+
+        try:
+            rec = engine()
+            bundle = rec.current_bundle()
+            body = None
+            if cache is not None:
+                cache.log.record(text)
+                with span("warm_cache"):
+                    body = cache.get(text, bundle.version)
+
+            if body is not None:
+                usage = llm_usage.totals({})
+                headers = {"X-Recommend-Fallback": "0", "X-Warm-Cache": "hit",
+                           "X-LLM-Usage": "prompt_tokens=0, completion_tokens=0, cost_usd=0.000000"}
+            else:
+                stats = {}
+                recs = rec.get_recommendations(text, max_recs=max_recs, use_llm=True, stats=stats)
+                fallback = any(r.get("short_reason") == rec.FALLBACK_REASON for r in recs)
+                usage = stats["usage"]
+                headers = {
+                    "X-Recommend-Fallback": "1" if fallback else "0",
+                    "X-LLM-Usage": f"prompt_tokens={usage['prompt_tokens']}, completion_tokens={usage['completion_tokens']}, "
+                                   f"cost_usd={usage['cost_usd']:.6f}",
+                }
+                # doc_ids index the bundle that served the request; after a reload, encode items directly
+                fragments = bundle.fragments if rec.current_bundle() is bundle else None
+                with span("serialize"):
+                    body = render(recs, fragments)
+                if cache is not None:
+                    headers["X-Warm-Cache"] = "miss"
+                    # Read-through: keep the answer for warm-set queries and queries that turned hot
+                    if not fallback and fragments is not None and cache.wants(text):
+                        cache.put(text, body, bundle.version)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    if trace is not None:
+        headers["Server-Timing"] = trace.server_timing()
+        headers["X-Trace-Id"] = trace.id
+        body = add_fields(body, {"trace": trace.to_dict(), "usage": usage})
+    return JSONBytesResponse(body, headers=headers)
+
+@app.post("/recommend/stream")
+def recommend_stream(req: RecommendRequest):
+    """
+    Server-sent events: `retrieval` with the similarity ranking as soon as
+    FAISS search finishes, one `item` per LLM-reranked assessment as the model
+    produces it, then `done` with the final list (or `error`).
+    """
+    text = resolve_query_text(req)
     max_recs = 10
-    
+
+    def events():
+        try:
+            for kind, payload in engine().stream_recommendations(text, max_recs=max_recs, use_llm=True):
+                if kind == "item":
+                    yield sse_event(kind, format_item(payload))
+                else:
+                    yield sse_event(kind, {"recommended_assessments": [format_item(r) for r in payload]})
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/recommend/batch", response_class=JSONBytesResponse)
+def recommend_batch(req: BatchRecommendRequest):
+    """
+    Several text queries in one round trip (used by recommender_client).
+    Returns {"results": [{"recommended_assessments": [...], "query": ...}]}
+    in request order; a query that is empty or fails carries an `error` instead.
+    """
+    if not req.queries:
+        raise HTTPException(status_code=400, detail="Provide at least one query.")
+    if len(req.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUERIES} queries per batch.")
+
+    rec = engine()
+    bundle = rec.current_bundle()
+    cache = warm_cache() if WARM_CACHE else None
+
+    def failed(query, error):
+        return json.dumps({"recommended_assessments": [], "query": query, "error": error}).encode("utf-8")
+
+    def one(query):
+        if not query.strip():
+            return failed(query, "Empty query.")
+        if cache is not None:
+            body = cache.get(query, bundle.version)
+            if body is not None:
+                return add_fields(body, {"query": query})
+        try:
+            recs = rec.get_recommendations(query, max_recs=10, use_llm=True)
+        except Exception as e:
+            return failed(query, str(e))
+        fragments = bundle.fragments if rec.current_bundle() is bundle else None
+        return add_fields(render(recs, fragments), {"query": query})
+
+    with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(req.queries))) as pool:
+        results = list(pool.map(one, req.queries))
+    return JSONBytesResponse(b'{"results":[' + b",".join(results) + b"]}")
+
+@app.get("/metrics")
+def metrics(format: str = "prometheus"):
+    """
+    LLM usage per stage and model since startup: calls, prompt / completion /
+    cached tokens, latency and estimated cost. Prometheus text by default;
+    `?format=json` adds per-call and per-token figures.
+    """
+    snapshot = llm_usage.USAGE.snapshot()
+    if format == "json":
+        return {"llm": snapshot, "totals": llm_usage.totals(snapshot)}
+    return PlainTextResponse(llm_usage.prometheus(snapshot), media_type="text/plain; version=0.0.4")
+
+def is_admin(token: str | None) -> bool:
+    if ADMIN_TOKEN:
+        return secrets.compare_digest(token or "", ADMIN_TOKEN)
+    return ADMIN_OPEN
+
+def check_admin(token: str | None):
+    if ADMIN_TOKEN:
+        if not is_admin(token):
+            raise HTTPException(status_code=403, detail="Invalid admin token.")
+    elif not ADMIN_OPEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set ADMIN_TOKEN (or ADMIN_OPEN=1).")
+
+@app.get("/admin/index")
+def index_status(x_admin_token: str | None = Header(default=None)):
+    check_admin(x_admin_token)
+    rec = engine()
+    return {"current": rec.current_bundle().describe(), "reload": rec.INDEXES.status}
+
+@app.get("/admin/warm-cache")
+def warm_cache_status(x_admin_token: str | None = Header(default=None)):
+    check_admin(x_admin_token)
+    cache = warm_cache()
+    return {**cache.status, "warm_queries": sorted(cache.queries)}
+
+class WarmCacheRequest(BaseModel):
+    queries: list[str] | None = None
+
+@app.post("/admin/warm-cache", status_code=202)
+def refresh_warm_cache(req: WarmCacheRequest | None = None, x_admin_token: str | None = Header(default=None)):
+    """
+    Recompute the warm set (or the given `queries`) in the background. This
+    also happens on its own after every index swap.
+    """
+    check_admin(x_admin_token)
+    limit = get_setting("warm_top_n")
+    # Every query runs the full pipeline including the LLM rerank
+    if req and req.queries and len(req.queries) > limit:
+        raise HTTPException(status_code=413, detail=f"At most {limit} queries (warm_top_n) per refresh.")
+    cache = warm_cache()
+    cache.refresh_in_background(req.queries if req else None)
+    return {"status": "refreshing"}
+
+@app.post("/admin/reload-index", status_code=202)
+def reload_index_endpoint(x_admin_token: str | None = Header(default=None)):
+    """
+    Load the index bundle currently on disk in the background and swap it in
+    once it validates; requests already running finish on the old index.
+    Poll GET /admin/index for the outcome.
+    """
+    check_admin(x_admin_token)
+    rec = engine()
+    started = rec.reload_index(background=True)
+    return {"status": "reloading" if started else "already_reloading", "current": rec.current_bundle().describe()}
+
+class ProfilingSettings(BaseModel):
+    enabled: bool | None = None
+    flamegraph: bool | None = None
+    sample_rate: float | None = None
+
+@app.get("/admin/profiling")
+def get_profiling(x_admin_token: str | None = Header(default=None)):
+    check_admin(x_admin_token)
+    return PROFILING
+
+@app.post("/admin/profiling")
+def set_profiling(settings: ProfilingSettings, x_admin_token: str | None = Header(default=None)):
+    """Trace requests without the X-Profile header (a sample_rate fraction of them)."""
+    check_admin(x_admin_token)
+    PROFILING.update({k: v for k, v in settings.model_dump().items() if v is not None})
+    return PROFILING
+
+# -------------------------------
+# Asynchronous jobs
+# -------------------------------
+class JobRequest(BaseModel):
+    query: str | None = None
+    url: HttpUrl | None = None
+    queries: list[str] | None = None
+    priority: int = 0
+    callback_url: str | None = None
+
+def run_job(kind: str, payload: dict) -> dict:
+    """Worker-side handler for /jobs (see jobs.JobRunner)."""
+    rec = engine()
+    if kind == "batch":
+        def one(query):
+            # A failing query is reported in its result, as in /recommend/batch
+            try:
+                recs = rec.get_recommendations(query, max_recs=10, use_llm=True)
+            except Exception as e:
+                return {"query": query, "recommended_assessments": [], "error": str(e)}
+            return {"query": query, "recommended_assessments": [format_item(r) for r in recs]}
+
+        return {"results": [one(q) for q in payload["queries"]]}
+    text = payload.get("query") or fetch_text_from_url(payload["url"])
+    recs = rec.get_recommendations(text, max_recs=10, use_llm=True)
+    return {"recommended_assessments": [format_item(r) for r in recs]}
+
+@app.post("/jobs", status_code=202)
+def submit_job(req: JobRequest):
+    """
+    Queue a recommendation (`query` or `url`) or a batch (`queries`) and
+    return its id at once. Poll GET /jobs/{id}, or pass a local
+    `callback_url` to have the finished job POSTed there. Higher `priority`
+    runs first.
+    """
+    from jobs import QueueFull
+    if req.queries:
+        # Every query is a full embed + LLM rerank: same cap as /recommend/batch
+        check_queries(req.queries)
+        kind, payload = "batch", {"queries": req.queries}
+    elif (req.query and req.query.strip()) or req.url:
+        kind, payload = "recommend", {"query": req.query, "url": str(req.url) if req.url else None}
+    else:
+        raise HTTPException(status_code=400, detail="Provide 'query', 'url' or 'queries'.")
+
     try:
-        recs = get_recommendations(text, max_recs=max_recs, use_llm=True)
-        # Format output exactly as required
-        out = []
-        for r in recs:
-            out.append({
-                "url": r.get("url"),
-                "assessment_name": r.get("assessment_name"),
-                "adaptive_support": r.get("adaptive_support", "No"),
-                "description": r.get("jd", ""),
-                "duration": r.get("duration", ""),
-                "remote_support": r.get("remote_support", "No"),
-                "test_type": r.get("test_type", []),
-            })
-        return {"recommended_assessments": out}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        job_id = job_runner().submit(kind, payload, priority=req.priority, callback_url=req.callback_url)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_id": job_id, "status": "queued", "poll": f"/jobs/{job_id}"}
+
+@app.get("/jobs")
+def list_jobs(status: str | None = None, limit: int = 50, x_admin_token: str | None = Header(default=None)):
+    """Every caller's jobs, payloads included, so admin only; GET /jobs/{id} is the public read."""
+    check_admin(x_admin_token)
+    return {"jobs": job_runner().store.list(status, min(limit, 500))}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_runner().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return job
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    runner = job_runner()
+    if runner.store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    if not runner.store.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Only queued jobs can be cancelled.")
+    return {"job_id": job_id, "status": "cancelled"}
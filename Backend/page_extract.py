@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from tracing import span
+
+# Job-posting text for URL queries.
+#
+# Pages are downloaded with a streaming GET capped at MAX_PAGE_BYTES, and the
+# extracted text is cached in memory (LRU) and on disk keyed by URL. Entries
+# younger than PAGE_CACHE_TTL are served without a request; older ones are
+# revalidated with If-None-Match / If-Modified-Since so an unchanged page
+# costs a 304 and no parsing. The disk cache is swept every
+# PAGE_CACHE_SWEEP_EVERY writes (and on the first one after startup): files
+# older than PAGE_CACHE_MAX_AGE are deleted, then all but the newest
+# PAGE_CACHE_MAX_FILES.
+#
+# Parsing runs in a small process pool so large career pages do not hold the
+# GIL on request threads. A cheap lxml pass handles well-structured job
+# boards (schema.org JobPosting JSON-LD, or a known description container);
+# anything else falls back to readability. A worker still busy after
+# EXTRACT_TIMEOUT cannot be cancelled, so the pool is torn down (its
+# processes killed) and a fresh one is started on next use.
+
+MAX_PAGE_BYTES = int(os.getenv("MAX_PAGE_BYTES", str(3 * 1024 * 1024)))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "15"))
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "data/page_cache")
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "256"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "3600"))
+PAGE_CACHE_MAX_FILES = int(os.getenv("PAGE_CACHE_MAX_FILES", "5000"))
+PAGE_CACHE_MAX_AGE = float(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+PAGE_CACHE_SWEEP_EVERY = 100
+FAST_PATH_MIN_CHARS = 300
+USER_AGENT = "Mozilla/5.0 (compatible; SHL-Recommender/1.0)"
+
+# Description containers used by common ATS / job-board page templates
+JOB_CONTAINERS = [
+    '//*[@itemprop="description"]',
+    '//*[@id="job-description" or @id="jobDescriptionText" or @id="job_description"]',
+    '//*[contains(@class, "job-description") or contains(@class, "jobDescription")]',
+    '//*[contains(@class, "posting-page")]',                    # Lever
+    '//*[@id="content" and .//*[contains(@class, "app-title")]]',  # Greenhouse
+    '//*[@data-automation-id="jobPostingDescription"]',          # Workday
+    '//*[contains(@class, "description__text")]',                # LinkedIn
+]
+
+
+class PageTooLarge(ValueError):
+    pass
+
+
+# -------------------------------
+# Extraction (runs in worker processes)
+# -------------------------------
+def _element_text(el):
+    return "\n".join(t.strip() for t in el.itertext() if t.strip())
+
+
+def _html_text(fragment):
+    import lxml.html
+    if not fragment or not fragment.strip():
+        return ""
+    return _element_text(lxml.html.fragment_fromstring(fragment, create_parent="div"))
+
+
+def _job_posting_ld(doc):
+    """schema.org JobPosting from JSON-LD blocks, or None."""
+    for script in doc.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text_content())
+        except ValueError:
+            continue
+        nodes = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for node in nodes:
+            types = node.get("@type") if isinstance(node, dict) else None
+            if types == "JobPosting" or (isinstance(types, list) and "JobPosting" in types):
+                return node
+    return None
+
+
+def fast_extract(html):
+    """lxml-only extraction for structured job pages; returns "" when unsure."""
+    import lxml.html
+    doc = lxml.html.document_fromstring(html)
+
+    posting = _job_posting_ld(doc)
+    if posting and posting.get("description"):
+        text = _html_text(str(posting["description"]))
+        title = str(posting.get("title", "")).strip()
+        return f"{title}\n{text}" if title else text
+
+    for bad in doc.xpath("//script|//style|//noscript"):
+        bad.drop_tree()
+    for xpath in JOB_CONTAINERS:
+        for el in doc.xpath(xpath):
+            text = _element_text(el)
+            if len(text) >= FAST_PATH_MIN_CHARS:
+                return text
+    return ""
+
+
+def readability_extract(html):
+    from readability import Document
+    return _html_text(Document(html).summary())
+
+
+def extract_text(html):
+    """(text, extractor) with the lxml fast path first, then readability."""
+    try:
+        text = fast_extract(html)
+    except Exception:
+        text = ""
+    if len(text) >= FAST_PATH_MIN_CHARS:
+        return text, "lxml"
+    return readability_extract(html), "readability"
+
+
+# -------------------------------
+# Process pool
+# -------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def extraction_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers import only this module, never a forked copy of the server's threads
+            _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def recycle_pool(pool):
+    """Kill the workers of `pool` (e.g. one stuck on a page) and start a fresh pool on next use."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # Extractions still running on it fail with BrokenProcessPool
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_in_pool(html):
+    """extract_text in a worker process, giving up after EXTRACT_TIMEOUT."""
+    pool = extraction_pool()
+    future = pool.submit(extract_text, html)
+    try:
+        return future.result(timeout=EXTRACT_TIMEOUT)
+    except TimeoutError:
+        print(f"⚠️ Extraction took over {EXTRACT_TIMEOUT:.0f} s; restarting the extraction pool.")
+        recycle_pool(pool)
+        raise TimeoutError(f"Page extraction timed out after {EXTRACT_TIMEOUT:.0f} s") from None
+
+
+def warm_pool():
+    """Start the worker processes and import lxml/readability in them."""
+    pool = extraction_pool()
+    list(pool.map(extract_text, ["<html><body><p>warm up</p></body></html>"] * EXTRACT_WORKERS))
+
+
+# -------------------------------
+# Download + cache
+# -------------------------------
+def download(url, etag=None, last_modified=None):
+    """
+    Streaming GET with a size cap. Returns (status, html, etag, last_modified);
+    html is None on 304 Not Modified.
+    """
+    import requests
+
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with requests.get(url, headers=headers, timeout=FETCH_TIMEOUT, stream=True) as r:
+        if r.status_code == 304:
+            return 304, None, etag, last_modified
+        r.raise_for_status()
+        if int(r.headers.get("Content-Length") or 0) > MAX_PAGE_BYTES:
+            raise PageTooLarge(f"Page is larger than {MAX_PAGE_BYTES} bytes")
+
+        chunks, size = [], 0
+        for chunk in r.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > MAX_PAGE_BYTES:
+                raise PageTooLarge(f"Page is larger than {MAX_PAGE_BYTES} bytes")
+            chunks.append(chunk)
+
+        charset = r.encoding if "charset" in r.headers.get("Content-Type", "").lower() else "utf-8"
+        html = b"".join(chunks).decode(charset or "utf-8", errors="replace")
+        return r.status_code, html, r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+
+class PageCache:
+    """Extracted text per URL: in-memory LRU in front of one JSON file per URL."""
+
+    def __init__(self, root=PAGE_CACHE_DIR, size=PAGE_CACHE_SIZE, max_files=PAGE_CACHE_MAX_FILES,
+                 max_age=PAGE_CACHE_MAX_AGE):
+        self.root = root
+        self.size = size
+        self.max_files = max_files
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Writes until the next disk sweep; 0 sweeps on the first write
+        self._until_sweep = 0
+
+    def _path(self, url):
+        return os.path.join(self.root, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url):
+        with self.lock:
+            if url in self.entries:
+                self.entries.move_to_end(url)
+                return self.entries[url]
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            entry = json.load(f)
+        self._remember(url, entry)
+        return entry
+
+    def put(self, url, entry):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self._path(url)}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(url))
+        self._remember(url, entry)
+        with self.lock:
+            self._until_sweep -= 1
+            sweep = self._until_sweep <= 0
+            if sweep:
+                self._until_sweep = PAGE_CACHE_SWEEP_EVERY
+        if sweep:
+            self.sweep()
+
+    def sweep(self):
+        """Delete cache files older than `max_age`, then all but the `max_files` newest."""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+                if now - mtime > self.max_age:
+                    os.remove(entry.path)
+                else:
+                    files.append((mtime, entry.path))
+            except OSError:
+                pass
+        files.sort(reverse=True)
+        for _, path in files[self.max_files:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, url, entry):
+        with self.lock:
+            self.entries[url] = entry
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+PAGE_CACHE = PageCache()
+
+
+def fetch_page_text(url):
+    """Text of the job posting at `url`, from cache when still valid."""
+    cached = PAGE_CACHE.get(url)
+    if cached and time.time() - cached["fetched_at"] < PAGE_CACHE_TTL:
+        return cached["text"]
+
+    try:
+        with span("fetch", cached=bool(cached)):
+            status, html, etag, last_modified = download(
+                url, cached.get("etag") if cached else None, cached.get("last_modified") if cached else None)
+    except PageTooLarge:
+        raise
+    except Exception as e:
+        if cached:
+            print(f"⚠️ Revalidating {url} failed ({e}); serving cached text.")
+            return cached["text"]
+        raise
+
+    if status == 304:
+        PAGE_CACHE.put(url, {**cached, "fetched_at": time.time()})
+        return cached["text"]
+
+    with span("readability"):
+        text, extractor = extract_in_pool(html)
+
+    PAGE_CACHE.put(url, {"url": url, "text": text, "extractor": extractor, "etag": etag,
+                         "last_modified": last_modified, "fetched_at": time.time()})
+    return text
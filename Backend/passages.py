@@ -0,0 +1,109 @@
+import os
+import json
+import pickle
+
+import faiss
+import numpy as np
+
+from text_chunks import chunk_text
+
+# Multi-vector document index: several passages per assessment (its summary
+# plus chunks of the PDF fact sheet), mapped back to the parent assessment
+# through an int32 passage -> parent id array.
+#
+# Memory budget: passage vectors keep only the first PASSAGE_DIM dimensions
+# of the text-embedding-3-large vector (re-normalized; the model is trained so
+# truncated prefixes remain usable embeddings) and are stored as fp16, i.e.
+# 2 KB per passage at 1024 dims. Flat search over that stays in the low
+# milliseconds up to PASSAGE_FLAT_LIMIT passages; above it an HNSW graph is
+# built instead so search cost grows logarithmically.
+
+PASSAGE_DIR = os.getenv("PASSAGE_DIR", "data/faiss_index")
+PASSAGE_INDEX_FILE = "passages.faiss"
+PASSAGE_PARENTS_FILE = "passage_parents.npy"
+PASSAGE_META_FILE = "passages.json"
+PASSAGE_TEXTS_FILE = "passages.pkl"
+
+PASSAGE_DIM = int(os.getenv("PASSAGE_DIM", "1024"))
+PASSAGE_FLAT_LIMIT = int(os.getenv("PASSAGE_FLAT_LIMIT", "50000"))
+PASSAGE_TOKENS = 200
+PASSAGE_OVERLAP = 32
+
+
+def truncate_normalize(vectors, dim=PASSAGE_DIM):
+    v = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32)[:, :dim])
+    faiss.normalize_L2(v)
+    return v
+
+
+def split_passages(summary, fact_sheet_text, max_tokens=PASSAGE_TOKENS, overlap=PASSAGE_OVERLAP):
+    """Summary passage first, then the fact sheet in token-bounded chunks."""
+    passages = [summary.strip()] if summary and summary.strip() else []
+    if fact_sheet_text and str(fact_sheet_text).strip():
+        passages.extend(chunk_text(" ".join(str(fact_sheet_text).split()), max_tokens, overlap))
+    return passages
+
+
+def build_passage_index(vectors):
+    n, d = vectors.shape
+    if n <= PASSAGE_FLAT_LIMIT:
+        index = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexHNSWSQ(d, faiss.ScalarQuantizer.QT_fp16, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 80
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def save_passage_index(index, parents, texts, model, out_dir=PASSAGE_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    faiss.write_index(index, os.path.join(out_dir, PASSAGE_INDEX_FILE))
+    np.save(os.path.join(out_dir, PASSAGE_PARENTS_FILE), np.asarray(parents, dtype=np.int32))
+    with open(os.path.join(out_dir, PASSAGE_TEXTS_FILE), "wb") as f:
+        pickle.dump(texts, f)
+    with open(os.path.join(out_dir, PASSAGE_META_FILE), "w") as f:
+        json.dump({
+            "count": int(index.ntotal),
+            "dim": int(index.d),
+            "model": model,
+            "parents": int(np.max(parents)) + 1 if len(parents) else 0,
+            "index_type": type(index).__name__,
+        }, f, indent=2)
+
+
+class PassageIndex:
+    """Loaded passage index plus the passage -> parent mapping."""
+
+    def __init__(self, out_dir=PASSAGE_DIR):
+        with open(os.path.join(out_dir, PASSAGE_META_FILE)) as f:
+            self.meta = json.load(f)
+        self.index = faiss.read_index(os.path.join(out_dir, PASSAGE_INDEX_FILE))
+        self.parents = np.load(os.path.join(out_dir, PASSAGE_PARENTS_FILE), mmap_mode="r")
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = 64
+        if self.index.ntotal != len(self.parents):
+            raise ValueError(f"Passage index has {self.index.ntotal} vectors but {len(self.parents)} parent ids")
+
+    @staticmethod
+    def exists(out_dir=PASSAGE_DIR):
+        return os.path.exists(os.path.join(out_dir, PASSAGE_INDEX_FILE))
+
+    def search(self, q_emb, top_k, passages_per_parent=4):
+        """
+        Search passages with one or more query vectors and aggregate hits per
+        parent by max score. Returns (scores, parent_ids) sorted best first.
+        """
+        q = truncate_normalize(q_emb, self.index.d)
+        D, I = self.index.search(q, top_k * passages_per_parent)
+        valid = I >= 0
+        scores, parents = D[valid], np.asarray(self.parents)[I[valid]]
+
+        # Max score per parent: sort by (parent, -score), keep each parent's first row
+        order = np.lexsort((-scores, parents))
+        parents, scores = parents[order], scores[order]
+        first = np.unique(parents, return_index=True)[1]
+        parents, scores = parents[first], scores[first]
+
+        best = np.argsort(-scores)[:top_k]
+        return scores[best], parents[best]
@@ -0,0 +1,227 @@
+import hashlib
+
+from serving_config import get_setting
+from text_chunks import count_tokens, truncate_tokens
+from rerank_protocol import ranking_instructions, format_candidate
+
+# Versioned LLM prompts with per-stage token budgets.
+#
+# Every prompt the recommenders send is a template registered here and built
+# with compile_prompt(name, query, items, **fields). The query is cut to the
+# prompt's query share, then the candidate list is fitted into what is left
+# of the budget:
+#   1. full candidate lines with `text_chars` of description each;
+#   2. the compact field encoding (rerank_protocol COMPACT_LAYOUT);
+#   3. shorter descriptions, scaled to the overshoot, down to `min_text_chars`;
+#   4. dropping candidates from the tail (they are in retrieval order).
+# So a prompt never grows past its budget however long the catalog texts or
+# the pasted job description are. Budgets can be overridden per prompt with
+# the serving config `prompt_budgets`, e.g. {"rerank": 4000}.
+#
+# Bump `version` whenever the wording of a template changes. The prompt id
+# ("rerank/v1-<hash of the template>") changes with it, so anything keyed on
+# it (result caches, replay fixtures, benchmark reports) is invalidated.
+
+
+class Prompt:
+    """A named template and the token budget it is compiled into."""
+
+    def __init__(self, name, version, template, budget, query_tokens=1500,
+                 text_key="jd", text_chars=300, min_text_chars=40):
+        self.name = name
+        self.version = version
+        self.template = template
+        self.budget = budget
+        self.query_tokens = query_tokens
+        self.text_key = text_key
+        self.text_chars = text_chars
+        self.min_text_chars = min_text_chars
+        source = template
+        if "{instructions}" in template:
+            source += ranking_instructions(False) + ranking_instructions(True)
+        self.id = f"{name}/v{version}-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]}"
+
+
+class CompiledPrompt:
+    """Prompt text plus how it was fitted into its budget."""
+
+    def __init__(self, prompt, text, tokens, budget, items=None, text_chars=None, compact=False,
+                 query_trimmed=False):
+        self.prompt = prompt
+        self.text = text
+        self.tokens = tokens
+        self.budget = budget
+        # The candidates actually shown, numbered 0..n-1 in the prompt
+        self.items = items if items is not None else []
+        self.text_chars = text_chars
+        self.compact = compact
+        self.query_trimmed = query_trimmed
+
+    @property
+    def id(self):
+        return self.prompt.id
+
+    def attrs(self):
+        """Span attributes describing the compiled prompt."""
+        return {"prompt": self.id, "prompt_tokens": self.tokens, "candidates": len(self.items),
+                "text_chars": self.text_chars, "compact": self.compact, "query_trimmed": self.query_trimmed}
+
+
+PROMPTS = {}
+
+
+def register(prompt):
+    PROMPTS[prompt.name] = prompt
+    return prompt
+
+
+def prompt_versions():
+    """{prompt name: prompt id} for everything registered."""
+    return {name: p.id for name, p in sorted(PROMPTS.items())}
+
+
+def prompt_budget(name):
+    return int((get_setting("prompt_budgets") or {}).get(name) or PROMPTS[name].budget)
+
+
+def _fit(prompt, items, room):
+    """(items shown, text_chars, compact, candidate block) for the token `room` left by the template."""
+    chars = prompt.text_chars
+    for compact in (False, True):
+        while True:
+            lines = [format_candidate(i, item, prompt.text_key, chars, compact) for i, item in enumerate(items)]
+            tokens = count_tokens("\n".join(lines))
+            if tokens <= room(compact):
+                return items, chars, compact, "\n".join(lines)
+            if not compact or chars <= prompt.min_text_chars:
+                break
+            # Descriptions are most of a line: shrink them in proportion to the overshoot
+            chars = max(prompt.min_text_chars, min(chars - 20, int(chars * room(compact) / tokens)))
+
+    # Still over budget at the shortest descriptions: keep as many leading candidates as fit
+    budget, kept = room(True), []
+    for line in lines:
+        budget -= count_tokens(line) + 1
+        if budget < 0:
+            break
+        kept.append(line)
+    return items[:len(kept)], chars, True, "\n".join(kept)
+
+
+def compile_prompt(name, query, items=None, **fields):
+    """Build prompt `name` for `query` (and candidate `items`) within its token budget."""
+    prompt = PROMPTS[name]
+    budget = prompt_budget(name)
+    query = str(query)
+    trimmed = truncate_tokens(query, min(prompt.query_tokens, budget // 2))
+
+    if items is None:
+        text = prompt.template.format(query=trimmed, **fields)
+        return CompiledPrompt(prompt, text, count_tokens(text), budget, query_trimmed=trimmed != query)
+
+    def render(block, compact):
+        return prompt.template.format(query=trimmed, instructions=ranking_instructions(compact),
+                                      candidates=block, **fields)
+
+    fixed = {compact: count_tokens(render("", compact)) for compact in (False, True)}
+    shown, chars, compact, block = _fit(prompt, list(items), lambda c: budget - fixed[c])
+    text = render(block, compact)
+    return CompiledPrompt(prompt, text, count_tokens(text), budget, shown, chars, compact, trimmed != query)
+
+
+# ---------------- recommender.py ----------------
+register(Prompt("classify", 1, """
+You are an expert at mapping job description queries to SHL test categories. According to the job requirement, analyze what all assessments are required.
+
+Available test type codes:
+A = Ability
+B = Biodata/Situational
+C = Competency
+D = Development
+E = Assessment Exercise
+K = Knowledge & Skills
+P = Personality & Behavior
+S = Simulation
+
+Return ONLY valid JSON like:
+{{"relevant_test_types": ["K", "P"]}}
+
+Query: "{query}"
+""", budget=1500, query_tokens=1200))
+
+register(Prompt("rerank", 1, """
+You are an expert recommender system for SHL assessments.
+Rerank the following assessments by relevance to the user's hiring query. Consider the duration and job level. If it is not given but jd highly matches with the requirement, give it a priority. Also focus on the skills it offer using test_type. If more than one jd looks similar, pick the one with more relevance with respect to other factors like test type, job level, adaptive support or remote support.
+
+{instructions}
+
+User Query:
+\"\"\"{query}\"\"\"
+
+Assessments:
+{candidates}
+""", budget=6000))
+
+# ---------------- rag_recommender.py ----------------
+register(Prompt("infer_constraints", 1, """
+You are an expert at analyzing job descriptions and hiring requirements.
+
+For the following job description or query, detect:
+1. Job level (e.g., graduate, junior, mid-level, senior)
+2. Recommended maximum assessment duration in minutes
+
+Return JSON ONLY, like:
+{{"job_level": "graduate", "max_duration": 45}}
+
+Job description / query:
+\"\"\"{query}\"\"\"
+""", budget=1500, query_tokens=1200))
+
+register(Prompt("rag_rerank", 1, """
+You are an SHL assessment recommender.
+Given a job description and candidate assessments, select and rank the top {max_recs} relevant ones.
+
+{instructions}
+
+JOB DESCRIPTION:
+{query}
+
+ASSESSMENT CANDIDATES:
+{candidates}
+""", budget=5000, text_key="text", text_chars=200))
+
+# ---------------- test.py ----------------
+register(Prompt("classify_domains", 1, """
+You are an expert in HR assessment taxonomy.
+
+Given the following hiring query, identify which SHL test domains are relevant.
+
+Test Type Map:
+- A = Ability/Aptitude
+- B = Biodata/Situational
+- C = Competency
+- D = Development/360
+- E = Assessment/Exercise
+- K = Knowledge/Skills
+- P = Personality/Behavior
+- S = Simulation
+
+Query:
+\"\"\"{query}\"\"\"
+
+Return only a JSON list of the detected domain codes, for example: ["K", "P"]
+""", budget=1500, query_tokens=1200))
+
+register(Prompt("domain_rerank", 1, """
+You are an expert recommender system for SHL assessments. Determine the best assessements. Rerank the following assessments by how relevant they are to the hiring query below.
+Detected job types for this query: {domains}. Determine the best assessments based on the job level, job types and time duration.
+Ensure a balanced mix of assessments from different detected domains (e.g., technical + behavioral).
+
+{instructions}
+
+User Query:
+\"\"\"{query}\"\"\"
+
+Assessments:
+{candidates}
+""", budget=6000))
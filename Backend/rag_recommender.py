@@ -3,8 +3,12 @@ import json
 import pickle
 import faiss
 import numpy as np
-from openai import OpenAI
 import re
+from llm_replay import make_client, llm_available
+from llm_usage import llm_call
+from serving_config import get_setting
+from rerank_protocol import parse_ranking, join_ranking
+from prompts import compile_prompt
 
 # ---------------- CONFIG ----------------
 INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "data/faiss_index/index.faiss")
@@ -34,12 +38,13 @@ else:
 print(f"Loaded {len(METAS)} metadata entries")
 print(f"Index has {index.ntotal} vectors; metadata has {len(METAS)} entries.")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = make_client(OPENAI_API_KEY)
 
 # ---------------- EMBEDDING ----------------
 def embed_query(text: str) -> np.ndarray:
     """Embed query using OpenAI embedding model"""
-    response = client.embeddings.create(
+    response = llm_call(
+        "embed", client.embeddings.create,
         input=text,
         model=EMB_MODEL
     )
@@ -80,26 +85,15 @@ def infer_job_level_and_duration(query: str):
     - max_duration in minutes
     Returns: (job_level:str or None, max_duration:int or None)
     """
-    prompt = f"""
-You are an expert at analyzing job descriptions and hiring requirements.
-
-For the following job description or query, detect:
-1. Job level (e.g., graduate, junior, mid-level, senior)
-2. Recommended maximum assessment duration in minutes
-
-Return JSON ONLY, like:
-{{"job_level": "graduate", "max_duration": 45}}
-
-Job description / query:
-\"\"\"{query}\"\"\"
-"""
+    prompt = compile_prompt("infer_constraints", query).text
     try:
         # Try Responses API
         try:
-            res = client.responses.create(model="gpt-4o-mini", input=prompt)
+            res = llm_call("infer_constraints", client.responses.create, model="gpt-4o-mini", input=prompt)
             text = res.output_text.strip()
         except TypeError:
-            resp = client.chat.completions.create(
+            resp = llm_call(
+                "infer_constraints", client.chat.completions.create,
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0,
@@ -127,64 +121,39 @@ def rerank_llm(query, items, max_recs=10):
     if not items:
         return []
 
-    short_catalog = [
-        {
-            "assessment_name": i.get("assessment_name", ""),
-            "url": i.get("url", ""),
-            "summary": (i.get("text") or "")[:200],
-        }
-        for i in items
-    ]
-
-    prompt = f"""
-You are an SHL assessment recommender.
-Given a job description and candidate assessments, select and rank the top {max_recs} relevant ones.
-
-Return ONLY valid JSON array like:
-[
-  {{
-    "assessment_name": "string",
-    "url": "string",
-    "reason": "short justification",
-    "relevance_score": 0.0 to 1.0
-  }}
-]
-
-JOB DESCRIPTION:
-{query}
-
-ASSESSMENT CANDIDATES:
-{json.dumps(short_catalog, indent=2)}
-"""
+    compiled = compile_prompt("rag_rerank", query, items, max_recs=max_recs)
+    prompt = compiled.text
+    # Only the candidates that fitted the token budget were numbered in the prompt
+    items = compiled.items
 
     try:
         # Try Responses API first
         try:
-            res = client.responses.create(model="gpt-4o-mini", input=prompt)
+            res = llm_call("rerank", client.responses.create, model="gpt-4o-mini", input=prompt)
             text = res.output_text.strip()
         except TypeError:
             # Fallback to chat completions
-            resp = client.chat.completions.create(
+            resp = llm_call(
+                "rerank", client.chat.completions.create,
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0,
             )
             text = resp.choices[0].message.content.strip()
 
-        match = re.search(r"(\[.*\]|\{.*\})", text, re.DOTALL)
-        data = json.loads(match.group(1)) if match else []
-
-        if isinstance(data, dict) and "recommendations" in data:
-            recs = data["recommendations"]
-        elif isinstance(data, list):
-            recs = data
-        else:
-            recs = []
-
-        if not recs:
+        ranked = join_ranking(parse_ranking(text), items, max_recs=max_recs, reason_key="reason")
+        if not ranked:
             raise ValueError("No valid recommendations from LLM")
 
-        return recs[:max_recs]
+        return [
+            {
+                "assessment_name": r.get("assessment_name", ""),
+                "url": r.get("url", ""),
+                "reason": r["reason"],
+                "relevance_score": r["relevance_score"],
+            }
+            for r in ranked
+        ]
 
     except Exception as e:
         print(f"⚠️ LLM rerank fallback: {e}")
@@ -205,14 +174,14 @@ def get_recommendations(query_text, max_recs=5, use_llm=True):
     print(f"🧭 Inferred job_level: {job_level}, max_duration: {max_duration} minutes")
 
     # Step 2: retrieve candidates
-    candidates = retrieve_candidates(query_text, top_k=max_recs*3, job_level=job_level, max_duration=max_duration)
+    candidates = retrieve_candidates(query_text, top_k=get_setting("candidate_depth"), job_level=job_level, max_duration=max_duration)
     # print(cand)
     if not candidates:
         print("⚠️ No candidates found for this query/filters.")
         return []
 
     # Step 3: rerank with LLM
-    if use_llm and OPENAI_API_KEY:
+    if use_llm and llm_available(OPENAI_API_KEY):
         try:
             print("🤖 Using LLM reranker for final selection...")
             return rerank_llm(query_text, candidates, max_recs=max_recs)
@@ -1,40 +1,99 @@
 import os
 import json
-import pickle
-import faiss
 import numpy as np
-from openai import OpenAI
-import openai
 import re
+import math
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from llm_replay import make_client, llm_available, REPLAY_MODE
+from embed_batcher import EmbeddingBatcher, EMBED_BATCHING
+from serving_config import get_setting
+from text_chunks import chunk_text, count_tokens
+from cascade import trim_candidates, mmr_select
+from index_bundle import HotSwap, load_bundle
+from tracing import span, in_current_context
+from llm_usage import llm_call, record as record_usage, track_request
+from passages import PASSAGE_DIR
+from local_encoder import LOCAL_ENCODER_PATH
+from rerank_protocol import parse_ranking, join_ranking, RankingStreamParser
+from prompts import compile_prompt
 
 INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "data/faiss_index/index.faiss")
 META_PATH = os.getenv("META_PATH", "data/faiss_index/index.pkl")
 EMB_MODEL = os.getenv("EMB_MODEL", "text-embedding-3-large")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-print(f"Loading FAISS index from {INDEX_PATH}")
-index = faiss.read_index(INDEX_PATH)
+INDEX_WATCH_SECONDS = float(os.getenv("INDEX_WATCH_SECONDS", "0"))
 
-print(f"Loading metadata from {META_PATH}")
-with open(META_PATH, "rb") as f:
-    data = pickle.load(f)
+def load_index_bundle():
+    """Load and validate the index, metadata and optional passage index as one bundle."""
+    print(f"Loading FAISS index from {INDEX_PATH}")
+    print(f"Loading metadata from {META_PATH}")
+    bundle = load_bundle(INDEX_PATH, META_PATH, EMB_MODEL, use_passages=get_setting("passage_search"),
+                         passage_dir=PASSAGE_DIR, encoder_path=LOCAL_ENCODER_PATH)
+    print(f"Loaded {len(bundle.metas)} metadata entries")
+    print(f"Index has {bundle.index.ntotal} vectors; metadata has {len(bundle.metas)} entries.")
+    if bundle.passages is not None:
+        p = bundle.passages
+        print(f"Passage index has {p.index.ntotal} passages ({p.meta['index_type']}, dim {p.index.d})")
+    if bundle.local_encoder is not None:
+        print(f"Local query encoder loaded ({bundle.local_encoder.info.get('n_train')} training texts)")
+    return bundle
 
-if isinstance(data, dict) and "metadatas" in data and "texts" in data:
-    METAS = data["metadatas"]
-    TEXTS = data["texts"]
-    for i, m in enumerate(METAS):
-        m["jd"] = TEXTS[i]
-else:
-    METAS = data
-    for m in METAS:
-        if "jd" not in m:
-            m["jd"] = ""
+INDEXES = HotSwap(load_index_bundle)
 
-print(f"Loaded {len(METAS)} metadata entries")
-print(f"Index has {index.ntotal} vectors; metadata has {len(METAS)} entries.")
+def current_bundle():
+    """The index bundle new requests should use; hold on to it for the whole request."""
+    return INDEXES.current()
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+def reload_index(background=True):
+    """Swap in the bundle currently on disk (see index_bundle.HotSwap)."""
+    return INDEXES.reload_in_background() if background else INDEXES.reload()
+
+def watch_index(interval=INDEX_WATCH_SECONDS):
+    INDEXES.watch(os.path.dirname(INDEX_PATH), interval)
+
+def warm_up():
+    """
+    Do the one-off work of a first request before traffic arrives: load the
+    index bundle and touch every stored vector, load the tokenizer, and open
+    the HTTPS connection to the LLM endpoint. Returns timings in ms.
+    """
+    timings = {}
+    start = time.perf_counter()
+    bundle = current_bundle()
+    timings["index_load_ms"] = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    probe = np.zeros((1, bundle.index.d), dtype=np.float32)
+    bundle.index.search(probe, 1)  # a flat scan reads every vector page
+    if bundle.passages is not None:
+        bundle.passages.index.search(probe[:, :bundle.passages.index.d], 1)
+    timings["index_touch_ms"] = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    chunk_text("warm up")
+    timings["tokenizer_ms"] = (time.perf_counter() - start) * 1000.0
+
+    # Any cheap authenticated call leaves a kept-alive TLS connection in the client's pool
+    models = getattr(client, "models", None)
+    if models is not None and llm_available(OPENAI_API_KEY):
+        start = time.perf_counter()
+        try:
+            models.list()
+        except Exception as e:
+            print(f"⚠️ Could not pre-open the LLM connection: {e}")
+        timings["llm_connect_ms"] = (time.perf_counter() - start) * 1000.0
+
+    print("🔥 Warm-up done: " + ", ".join(f"{k}={v:.0f}" for k, v in timings.items()))
+    return timings
+
+client = make_client(OPENAI_API_KEY)
+
+# Recorded fixtures are keyed by exact request input, so batching (which mixes
+# concurrent queries into one input list) is only used against the live API
+EMBEDDER = EmbeddingBatcher(client, EMB_MODEL) if EMBED_BATCHING and REPLAY_MODE == "off" else None
 
 TEST_TYPE_MAP = {
     "ability": "A",
@@ -54,6 +113,9 @@ TEST_TYPE_MAP = {
     "simulation": "S",
 }
 
+# Reason attached to items ranked by embedding similarity instead of the LLM
+FALLBACK_REASON = "Based on embedding similarity (fallback)."
+
 def normalize_test_type(t: str):
     t = t.lower().strip()
     for key, code in TEST_TYPE_MAP.items():
@@ -61,27 +123,88 @@ def normalize_test_type(t: str):
             return code
     return "UNK"
 
-def embed_query(text: str) -> np.ndarray:
-    """Embed query using OpenAI embedding model"""
-    response = client.embeddings.create(
-        input=text,
-        model=EMB_MODEL
+def use_local_encoder(text: str, bundle) -> bool:
+    """
+    Short enough for the local encoder (serving config `local_encoder_max_words`),
+    and made of words it has seen? A query with no known feature would get the
+    same (mean) embedding as every other one, so it goes to the API.
+    """
+    max_words = get_setting("local_encoder_max_words")
+    return (bool(max_words) and bundle.local_encoder is not None and len(str(text).split()) <= max_words
+            and bundle.local_encoder.covers(text))
+
+def embed_query(text: str, bundle=None) -> np.ndarray:
+    """
+    Embed query using OpenAI embedding model. Long texts (e.g. fetched job
+    postings) are split into token-bounded chunks embedded in one batched
+    call; returns one normalized row per chunk. With micro-batching on, the
+    chunks share an upstream call with other requests arriving at the same time.
+    Queries under the local encoder's length cut-off are embedded in-process.
+    """
+    bundle = bundle or current_bundle()
+    if use_local_encoder(text, bundle):
+        with span("embed", local=True):
+            return bundle.local_encoder.encode([text])
+
+    chunks = chunk_text(
+        text,
+        max_tokens=get_setting("query_chunk_tokens"),
+        overlap=get_setting("query_chunk_overlap"),
+        max_chunks=get_setting("max_query_chunks"),
     )
-    emb = np.array(response.data[0].embedding, dtype=np.float32)
-    emb = emb / np.linalg.norm(emb)  # Normalize for cosine sim
-    return emb.reshape(1, -1)
+    with span("embed", chunks=len(chunks)):
+        if EMBEDDER is not None:
+            emb = EMBEDDER.embed(chunks)
+        else:
+            response = llm_call(
+                "embed", client.embeddings.create,
+                input=chunks[0] if len(chunks) == 1 else chunks,
+                model=EMB_MODEL
+            )
+            emb = np.array([d.embedding for d in response.data], dtype=np.float32)
+    emb = emb / np.linalg.norm(emb, axis=1, keepdims=True)  # Normalize for cosine sim
+    return emb
 
-def retrieve(query_text, top_k=20):
-    q_emb = embed_query(query_text)
-    D, I = index.search(q_emb, top_k)
+def search(q_emb, top_k, bundle=None):
+    """
+    FAISS search for one or more query vectors. With several chunk vectors,
+    the union of per-chunk hits is rescored exactly against every chunk and
+    pooled per document (max or mean, per the serving config). When the
+    passage index is enabled, passage hits are aggregated per assessment instead.
+    Returns (scores, ids) sorted best first.
+    """
+    bundle = bundle or current_bundle()
+    if bundle.passages is not None:
+        return bundle.passages.search(q_emb, top_k)
+
+    D, I = bundle.index.search(q_emb, top_k)
+    if len(q_emb) == 1:
+        return D[0], I[0]
+
+    ids = np.unique(I[I >= 0])
+    per_chunk = bundle.vectors()[ids] @ q_emb.T
+    pooled = per_chunk.mean(axis=1) if get_setting("chunk_pooling") == "mean" else per_chunk.max(axis=1)
+    order = np.argsort(-pooled)[:top_k]
+    return pooled[order], ids[order]
+
+def retrieve(query_text, top_k=20, bundle=None):
+    bundle = bundle or current_bundle()
+    q_emb = embed_query(query_text, bundle)
+    with span("search", top_k=top_k):
+        D, I = search(q_emb, top_k, bundle)
     out = []
-    for score, idx in zip(D[0], I[0]):
-        if idx < 0 or idx >= len(METAS): continue
-        meta = METAS[idx].copy()
+    for score, idx in zip(D, I):
+        if idx < 0 or idx >= len(bundle.metas): continue
+        meta = bundle.metas[idx].copy()
         meta["score"] = float(score)
+        meta["doc_id"] = int(idx)
         out.append(meta)
     return sorted(out, key=lambda x: x["score"], reverse=True)
 
+def catalog_vectors(bundle=None):
+    """Stored (normalized) catalog vectors of the current index bundle."""
+    return (bundle or current_bundle()).vectors()
+
 TEST_TYPE_DESCRIPTIONS = """
 A: Ability & Aptitude – reasoning, numerical, or problem-solving.
 B: Biodata & Situational Judgement – background or judgment-based.
@@ -94,148 +217,156 @@ S: Simulations – realistic job simulations or scenario exercises.
 """
 
 def classify_query_domains(query: str):
-    prompt = f"""
-You are an expert at mapping job description queries to SHL test categories. According to the job requirement, analyze what all assessments are required.
-
-Available test type codes:
-A = Ability
-B = Biodata/Situational
-C = Competency
-D = Development
-E = Assessment Exercise
-K = Knowledge & Skills
-P = Personality & Behavior
-S = Simulation
-
-Return ONLY valid JSON like:
-{{"relevant_test_types": ["K", "P"]}}
-
-Query: "{query}"
-"""
+    prompt = compile_prompt("classify", query)
     try:
-        # ---- Try new SDK first ----
-        try:
-            response = client.responses.create(
-                model="gpt-4o-mini",
-                input=prompt,
-                temperature=0,
-                response_format={"type": "json_object"}
-            )
-            data = json.loads(response.output_text)
-        except TypeError:
-            # ---- Fallback for older SDK ----
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
-            )
-            text = resp.choices[0].message.content.strip()
-            data = json.loads(text[text.find("{"):text.rfind("}") + 1])
+        with span("classify", **prompt.attrs()):
+            # ---- Try new SDK first ----
+            try:
+                response = llm_call(
+                    "classify", client.responses.create,
+                    model="gpt-4o-mini",
+                    input=prompt.text,
+                    temperature=0,
+                    response_format={"type": "json_object"}
+                )
+                data = json.loads(response.output_text)
+            except TypeError:
+                # ---- Fallback for older SDK ----
+                resp = llm_call(
+                    "classify", client.chat.completions.create,
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": prompt.text}],
+                    temperature=0
+                )
+                text = resp.choices[0].message.content.strip()
+                data = json.loads(text[text.find("{"):text.rfind("}") + 1])
 
-        return data.get("relevant_test_types", ["K"])
+            return data.get("relevant_test_types", ["K"])
     except Exception as e:
         print("⚠️ LLM classification failed, fallback to ['K']:", e)
         return ["K"]
 
-from openai import OpenAI
-import json, os
+def build_rerank_prompt(query_text, retrieved_items):
+    """Build the rerank prompt for a candidate list (a prompts.CompiledPrompt)."""
+    return compile_prompt("rerank", query_text, retrieved_items)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def rerank_call(query_text, retrieved_items):
+    """Run one rerank prompt and return the parsed (id, score, reason) entries."""
+    prompt = build_rerank_prompt(query_text, retrieved_items)
+    with span("rerank", **prompt.attrs()):
+        response = llm_call(
+            "rerank", client.responses.create,
+            model='gpt-4.1',
+            input=prompt.text
+        )
+    with span("parse"):
+        # Ids past the candidates that fitted the budget were never shown
+        return [e for e in parse_ranking(response.output_text) if e[0] < len(prompt.items)]
 
 def llm_rerank(query_text, retrieved_items, max_recs=10):
     """
     Use LLM to rerank retrieved items based on relevance to the query.
     """
-    # Create compact input summary for the LLM
-    catalog_summary = [
-        {
-            "assessment_name": i.get("assessment_name"),
-            "test_type": i.get("test_type"),
-            "url": i.get("url"),
-            "jd": (i.get("jd") or "")[:300],
-            "time_duration": i.get("duration"),
-            "job_level": i.get("job_levels"),
-            "remote_support": i.get("remote_support", ""),
-            "adaptive_support": i.get("adaptive_support", ""),
-        }
-        for i in retrieved_items
-    ]
-    prompt = f"""
-You are an expert recommender system for SHL assessments.
-Rerank the following assessments by relevance to the user's hiring query. Consider the duration and job level. If it is not given but jd highly matches with the requirement, give it a priority. Also focus on the skills it offer using test_type. If more than one jd looks similar, pick the one with more relevance with respect to other factors like test type, job level, adaptive support or remote support.
-For each, output:
-- assessment_name
-- url
-- jd
-- duration
-- job level
-- remote support
-- adaptive support
-- test type
-- short_reason (1-2 sentences)
-- relevance_score (float between 0 and 1)
-
-Return ONLY valid JSON list, nothing else.
-Example:
-[
-  {{
-    "assessment_name": "Java Developer (Advanced)",
-    "url": "https://www.shl.com/products/java-advanced/",
-    "adaptive_support": "Yes",
-    "description": Job is about Java developer,
-    "duration": 10 mins,
-    "remote_support": "Yes",
-    "test_type": K, A,
-    "short_reason": "Tests advanced Java skills relevant to the query.",
-    "relevance_score": 0.95
-  }}
-]
-
-User Query:
-\"\"\"{query_text}\"\"\"
-
-Assessments:
-{json.dumps(catalog_summary, indent=2)}
-"""
-
     try:
-        response = client.responses.create(
-            model='gpt-4.1',
-            input=prompt
-        )
-        text = response.output_text.strip()
-
-        # Try to directly parse JSON
-        try:
-            parsed = json.loads(text)
-        except json.JSONDecodeError:
-            # Try to extract valid JSON substring
-            match = re.search(r"\[.*\]", text, re.DOTALL)
-            if match:
-                parsed = json.loads(match.group(0))
-            else:
-                raise ValueError(f"Cannot parse JSON from reranker output: {text[:200]}")
-        reranked = sorted(parsed, key=lambda x: x.get("relevance_score", 0), reverse=True)
-        return reranked[:max_recs]
+        ranking = rerank_call(query_text, retrieved_items)
+        reranked = join_ranking(ranking, retrieved_items, max_recs=max_recs)
+        if not reranked:
+            raise ValueError("Reranker returned no known candidate ids")
+        return reranked
 
     except Exception as e:
         print(f"LLM rerank failed: {e}")
         fallback = retrieved_items[:max_recs]
         for f in fallback:
-            f["short_reason"] = "Based on embedding similarity (fallback)."
+            f["short_reason"] = FALLBACK_REASON
             f["relevance_score"] = 0.0
         return fallback
 
-def get_recommendations(query_text, max_recs=5, use_llm=True):
-    candidates = retrieve(  query_text, top_k=30)
-    if use_llm and OPENAI_API_KEY:
+def sharded_rerank(query_text, retrieved_items, max_recs=10, shards=None, merge=None):
+    """
+    Rerank candidates in several smaller prompts run in parallel, then merge.
+
+    Candidates are dealt round-robin so every shard gets a similar mix of
+    strong and weak matches. merge="tournament" runs one short final rerank
+    over each shard's winners; merge="score" sorts all items by their
+    per-shard min-max calibrated scores without a further LLM call.
+    """
+    shards = max(1, min(shards or get_setting("rerank_shards"), len(retrieved_items)))
+    merge = merge or get_setting("shard_merge")
+    parts = [retrieved_items[i::shards] for i in range(shards)]
+
+    def rerank_shard(part):
         try:
-            print("Using LLM reranker...")
-            return llm_rerank(query_text,candidates, max_recs=max_recs)
+            return join_ranking(rerank_call(query_text, part), part)
         except Exception as e:
-            print("LLM rerank failed:", e)
+            print(f"Shard rerank failed, keeping similarity order: {e}")
+            return [dict(x, short_reason=FALLBACK_REASON, relevance_score=0.0) for x in part]
 
-    print("Using similarity-based fallback.")
+    with ThreadPoolExecutor(max_workers=shards) as pool:
+        ranked_parts = list(pool.map(in_current_context(rerank_shard), parts))
+
+    if merge == "tournament":
+        winners_per_shard = get_setting("shard_winners") or math.ceil(1.5 * max_recs / shards)
+        finalists = [x for part in ranked_parts for x in part[:winners_per_shard]]
+        return llm_rerank(query_text, finalists, max_recs=max_recs)
+
+    merged = []
+    for part in ranked_parts:
+        scores = [x["relevance_score"] for x in part]
+        lo, hi = (min(scores), max(scores)) if scores else (0.0, 0.0)
+        for x in part:
+            calibrated = (x["relevance_score"] - lo) / (hi - lo) if hi > lo else x["relevance_score"]
+            merged.append((calibrated, x["relevance_score"], x))
+    merged.sort(key=lambda t: (t[0], t[1]), reverse=True)
+    return [x for _, _, x in merged[:max_recs]]
+
+def rerank(query_text, retrieved_items, max_recs=10):
+    """Dispatch to the rerank mode selected in the serving config."""
+    if get_setting("rerank_mode") == "sharded":
+        return sharded_rerank(query_text, retrieved_items, max_recs=max_recs)
+    return llm_rerank(query_text, retrieved_items, max_recs=max_recs)
+
+def stream_rerank(query_text, retrieved_items, max_recs=10):
+    """
+    Stream LLM reranking, yielding each reranked item as soon as the model emits it.
+    """
+    prompt = build_rerank_prompt(query_text, retrieved_items)
+    parser = RankingStreamParser()
+    seen = set()
+    start = time.perf_counter()
+    usage, streamed = None, []
+    stream = client.responses.create(
+        model='gpt-4.1',
+        input=prompt.text,
+        stream=True
+    )
+    try:
+        for event in stream:
+            kind = getattr(event, "type", "")
+            if kind == "response.completed":
+                usage = getattr(getattr(event, "response", None), "usage", None)
+            if kind != "response.output_text.delta":
+                continue
+            streamed.append(event.delta)
+            for entry in parser.feed(event.delta):
+                if entry[0] in seen:
+                    continue
+                for item in join_ranking([entry], prompt.items):
+                    seen.add(entry[0])
+                    yield item
+                if len(seen) >= max_recs:
+                    return
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+        # Usage only arrives with response.completed; a stream closed early is counted locally
+        if usage is None:
+            usage = {"input_tokens": prompt.tokens, "output_tokens": count_tokens("".join(streamed))}
+        record_usage("rerank_stream", "gpt-4.1", usage, (time.perf_counter() - start) * 1000.0)
+
+def similarity_ranking(candidates, max_recs=5):
+    """Rank candidates by embedding similarity alone."""
     sorted_c = sorted(candidates, key=lambda x: x["score"], reverse=True)[:max_recs]
     return [
         {
@@ -246,12 +377,93 @@ def get_recommendations(query_text, max_recs=5, use_llm=True):
             "duration": c.get("duration", ""),
             "remote_support": c.get("remote_support", "No"),
             "test_type": c.get("test_type", []),
-            "short_reason": "",
-            "relevance_score": max(0.0, min(1.0, (c["score"] + 1) / 2))
+            "short_reason": FALLBACK_REASON,
+            "relevance_score": max(0.0, min(1.0, (c["score"] + 1) / 2)),
+            "doc_id": c.get("doc_id"),
         }
         for c in sorted_c
     ]
 
+def select_candidates(query_text, stats=None):
+    """
+    First stages of the cascade: FAISS top-N, then an optional in-process
+    trim to M (cascade.trim_candidates) and optional MMR diversification
+    (cascade.mmr_select) before anything reaches the LLM.
+    Per-stage timings and sizes are written into `stats` when given.
+    """
+    stats = stats if stats is not None else {}
+    # One bundle for the whole request, even if a reload swaps in a new one meanwhile
+    bundle = current_bundle()
+    stats["index_version"] = bundle.version
+    start = time.perf_counter()
+    candidates = retrieve(query_text, top_k=get_setting("candidate_depth"), bundle=bundle)
+    stats["retrieve_ms"] = (time.perf_counter() - start) * 1000.0
+    stats["n_retrieved"] = len(candidates)
+
+    trim_depth = get_setting("trim_depth")
+    if trim_depth:
+        start = time.perf_counter()
+        with span("trim"):
+            candidates = trim_candidates(query_text, candidates, trim_depth, bundle.lexical_idf, get_setting("cascade_weights"))
+        stats["trim_ms"] = (time.perf_counter() - start) * 1000.0
+        stats["n_trimmed"] = len(candidates)
+
+    if get_setting("diversify") == "mmr":
+        start = time.perf_counter()
+        with span("mmr"):
+            vectors = bundle.vectors()[[c["doc_id"] for c in candidates]]
+            candidates = mmr_select(candidates, vectors, get_setting("mmr_depth") or get_setting("rerank_depth"),
+                                    get_setting("mmr_lambda"))
+        stats["mmr_ms"] = (time.perf_counter() - start) * 1000.0
+        stats["n_diversified"] = len(candidates)
+    return candidates
+
+def get_recommendations(query_text, max_recs=5, use_llm=True, stats=None):
+    """Recommendations for one query; `stats` also receives this request's LLM usage totals."""
+    stats = stats if stats is not None else {}
+    with track_request() as usage:
+        try:
+            return _recommend(query_text, max_recs, use_llm, stats)
+        finally:
+            stats["usage"] = usage.totals()
+
+def _recommend(query_text, max_recs, use_llm, stats):
+    candidates = select_candidates(query_text, stats)
+    if use_llm and llm_available(OPENAI_API_KEY):
+        try:
+            print("Using LLM reranker...")
+            start = time.perf_counter()
+            results = rerank(query_text, candidates[:get_setting("rerank_depth")], max_recs=max_recs)
+            stats["rerank_ms"] = (time.perf_counter() - start) * 1000.0
+            return results
+        except Exception as e:
+            print("LLM rerank failed:", e)
+
+    print("Using similarity-based fallback.")
+    return similarity_ranking(candidates, max_recs)
+
+def stream_recommendations(query_text, max_recs=5, use_llm=True):
+    """
+    Progressive variant of get_recommendations. Yields (event, payload) pairs:
+    ("retrieval", items) as soon as FAISS search finishes, ("item", item) for
+    each item the LLM reranks, and finally ("done", items).
+    """
+    candidates = select_candidates(query_text)
+    yield "retrieval", similarity_ranking(candidates, max_recs)
+
+    reranked = []
+    if use_llm and llm_available(OPENAI_API_KEY):
+        try:
+            for item in stream_rerank(query_text, candidates[:get_setting("rerank_depth")], max_recs=max_recs):
+                reranked.append(item)
+                yield "item", item
+        except Exception as e:
+            print(f"LLM rerank stream failed: {e}")
+
+    if not reranked:
+        reranked = similarity_ranking(candidates, max_recs)
+    yield "done", sorted(reranked, key=lambda x: x["relevance_score"], reverse=True)
+
 if __name__ == "__main__":
     query = input("Enter a job description or role title: ").strip()
     print("\nRetrieving top recommendations...\n")
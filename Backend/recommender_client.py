@@ -0,0 +1,282 @@
+import os
+import time
+import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+# Client for the recommender API, used by the Streamlit frontend and the
+# evaluation scripts.
+#
+# One client keeps one pool of kept-alive connections, so repeated calls skip
+# the TCP/TLS handshake; create it once and reuse it. 429 and 5xx answers and
+# connection errors are retried with full-jitter exponential backoff
+# (honouring Retry-After). recommend_many runs a bounded number of requests
+# at once, or sends the queries through POST /recommend/batch when the server
+# has it, falling back to single calls when it does not. A query that fails
+# (inside a batch or on its own) is printed and gives an empty list, or its
+# RecommenderError with return_errors=True.
+#
+#     with RecommenderClient() as api:
+#         items = api.recommend("Java developer who collaborates with business teams")
+#         results = api.recommend_many(queries, concurrency=8)
+#
+#     async with AsyncRecommenderClient() as api:
+#         results = await api.recommend_many(queries)
+
+API_URL = os.getenv("RECOMMENDER_API_URL", "http://127.0.0.1:8000")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RecommenderError(RuntimeError):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def retry_delay(attempt, backoff, max_backoff, response=None):
+    """Seconds to wait before retry number `attempt` (0-based)."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), max_backoff)
+        except ValueError:
+            pass
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+def _items(data):
+    return data.get("recommended_assessments", [])
+
+
+def _batch_item(result):
+    """Items of one /recommend/batch result, or its RecommenderError."""
+    if result.get("error"):
+        return RecommenderError(str(result["error"]))
+    return _items(result)
+
+
+def _error(response):
+    try:
+        detail = response.json().get("detail", response.text)
+    except ValueError:
+        detail = response.text
+    return RecommenderError(f"HTTP {response.status_code}: {detail}", response.status_code)
+
+
+class _Base:
+    def __init__(self, base_url=API_URL, timeout=120.0, max_connections=16, retries=3,
+                 backoff=0.5, max_backoff=10.0, use_batch=True, batch_size=16):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # None until the first batch call tells us whether the server has /recommend/batch
+        self.batch_supported = None if use_batch else False
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _payload(query, url):
+        if not query and not url:
+            raise ValueError("Provide either query or url")
+        return {"query": query} if query else {"url": url}
+
+    def _chunks(self, queries):
+        return [queries[i:i + self.batch_size] for i in range(0, len(queries), self.batch_size)]
+
+    @staticmethod
+    def _settle(queries, results, return_errors):
+        """Report failed queries; they become [] unless `return_errors`."""
+        settled = []
+        for query, result in zip(queries, results):
+            if isinstance(result, RecommenderError):
+                print(f"Error for query '{query[:60]}': {result}")
+                if not return_errors:
+                    result = []
+            settled.append(result)
+        return settled
+
+
+class RecommenderClient(_Base):
+    """Blocking client; thread-safe, so recommend_many shares its pool across threads."""
+
+    def __init__(self, base_url=API_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.http = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+
+    def _post(self, path, payload):
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.http.post(path, json=payload)
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise RecommenderError(f"{path} failed: {e}") from e
+                time.sleep(retry_delay(attempt, self.backoff, self.max_backoff))
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                time.sleep(retry_delay(attempt, self.backoff, self.max_backoff, response))
+                continue
+            if response.status_code != 200:
+                raise _error(response)
+            return response.json()
+
+    def health(self):
+        return self.http.get("/health").json()
+
+    def metrics(self):
+        """LLM usage counters of the server (GET /metrics?format=json)."""
+        return self.http.get("/metrics", params={"format": "json"}).json()
+
+    def recommend(self, query=None, url=None):
+        """Recommended assessments (list of dicts) for a text query or a job-posting URL."""
+        return _items(self._post("/recommend", self._payload(query, url)))
+
+    def recommend_batch(self, queries):
+        """
+        One /recommend/batch call; None if the server has no batch endpoint.
+        A query that failed on the server gives its RecommenderError.
+        """
+        try:
+            data = self._post("/recommend/batch", {"queries": list(queries)})
+        except RecommenderError as e:
+            if e.status_code in (404, 405):
+                self.batch_supported = False
+                return None
+            raise
+        self.batch_supported = True
+        return [_batch_item(r) for r in data["results"]]
+
+    def recommend_many(self, queries, concurrency=4, return_errors=False):
+        """
+        Results for every query, in order. A failed query is printed and gives
+        an empty list, or its RecommenderError when `return_errors` is set.
+        """
+        queries = list(queries)
+
+        def single(query):
+            try:
+                return self.recommend(query)
+            except RecommenderError as e:
+                return e
+            except ValueError as e:
+                return RecommenderError(str(e))
+
+        def batch(chunk):
+            if self.batch_supported is not False:
+                try:
+                    results = self.recommend_batch(chunk)
+                    if results is not None:
+                        return results
+                except RecommenderError as e:
+                    print(f"Batch call failed ({e}); sending queries one by one")
+            return [single(q) for q in chunk]
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            if self.batch_supported is False:
+                results = list(pool.map(single, queries))
+            else:
+                chunks = self._chunks(queries)
+                # Probe with the first chunk so a missing endpoint is found once, not per chunk
+                first = batch(chunks[0]) if chunks else []
+                rest = pool.map(batch, chunks[1:])
+                results = first + [r for part in rest for r in part]
+        return self._settle(queries, results, return_errors)
+
+    def close(self):
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncRecommenderClient(_Base):
+    """asyncio client with the same interface; concurrency is bounded by a semaphore."""
+
+    def __init__(self, base_url=API_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.http = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+
+    async def _post(self, path, payload):
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.http.post(path, json=payload)
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise RecommenderError(f"{path} failed: {e}") from e
+                await asyncio.sleep(retry_delay(attempt, self.backoff, self.max_backoff))
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                await asyncio.sleep(retry_delay(attempt, self.backoff, self.max_backoff, response))
+                continue
+            if response.status_code != 200:
+                raise _error(response)
+            return response.json()
+
+    async def health(self):
+        return (await self.http.get("/health")).json()
+
+    async def metrics(self):
+        return (await self.http.get("/metrics", params={"format": "json"})).json()
+
+    async def recommend(self, query=None, url=None):
+        return _items(await self._post("/recommend", self._payload(query, url)))
+
+    async def recommend_batch(self, queries):
+        try:
+            data = await self._post("/recommend/batch", {"queries": list(queries)})
+        except RecommenderError as e:
+            if e.status_code in (404, 405):
+                self.batch_supported = False
+                return None
+            raise
+        self.batch_supported = True
+        return [_batch_item(r) for r in data["results"]]
+
+    async def recommend_many(self, queries, concurrency=4, return_errors=False):
+        queries = list(queries)
+        limit = asyncio.Semaphore(max(1, concurrency))
+
+        async def single(query):
+            async with limit:
+                try:
+                    return await self.recommend(query)
+                except RecommenderError as e:
+                    return e
+                except ValueError as e:
+                    return RecommenderError(str(e))
+
+        async def batch(chunk):
+            if self.batch_supported is not False:
+                async with limit:
+                    try:
+                        results = await self.recommend_batch(chunk)
+                    except RecommenderError as e:
+                        print(f"Batch call failed ({e}); sending queries one by one")
+                        results = None
+                if results is not None:
+                    return results
+            return list(await asyncio.gather(*(single(q) for q in chunk)))
+
+        if self.batch_supported is False:
+            results = list(await asyncio.gather(*(single(q) for q in queries)))
+        else:
+            chunks = self._chunks(queries)
+            first = await batch(chunks[0]) if chunks else []
+            rest = await asyncio.gather(*(batch(c) for c in chunks[1:]))
+            results = first + [r for part in rest for r in part]
+        return self._settle(queries, results, return_errors)
+
+    async def close(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,173 @@
+import re
+import json
+
+# Compact rerank protocol shared by every recommender variant.
+#
+# Candidates are numbered in the prompt and the LLM answers with
+# [id, relevance_score, short_reason] triples only; all metadata is joined
+# back locally by id. This keeps output tokens (which dominate LLM latency)
+# small and avoids matching answers back to candidates by name.
+
+LAYOUT = "[id] name | test types | duration | job levels | remote | adaptive | description"
+# Used when a prompt runs over its token budget (prompts.py)
+COMPACT_LAYOUT = "[id] name | test types | minutes | job levels | R = remote, A = adaptive | description"
+COMPACT_LEVELS = 3
+
+RANKING_RULES = """Return ONLY a JSON array of [id, relevance_score, "short reason"] entries, best first.
+relevance_score is a float between 0 and 1 and the reason is at most 12 words.
+Use only the numeric ids shown. No commentary, no markdown.
+Example: [[3, 0.93, "Tests core Java skills"], [0, 0.71, "Measures teamwork"]]"""
+
+
+def ranking_instructions(compact=False):
+    return f"Each candidate is listed as:\n{COMPACT_LAYOUT if compact else LAYOUT}\n\n{RANKING_RULES}"
+
+
+RANKING_INSTRUCTIONS = ranking_instructions()
+
+
+def _field(value, default="-"):
+    if value is None or value == "":
+        return default
+    if isinstance(value, (list, tuple)):
+        return ", ".join(map(str, value)) or default
+    return str(value).strip().rstrip(",")
+
+
+def _compact_fields(item):
+    minutes = re.search(r"\d+", str(item.get("duration") or ""))
+    levels = [lv.strip() for lv in _field(item.get("job_levels"), "").split(",") if lv.strip()]
+    if len(levels) > COMPACT_LEVELS:
+        levels = levels[:COMPACT_LEVELS] + [f"+{len(levels) - COMPACT_LEVELS}"]
+    flags = [flag for flag, key in (("R", "remote_support"), ("A", "adaptive_support"))
+             if str(item.get(key) or "").strip().lower() in ("yes", "true", "1", "y")]
+    return [minutes.group() if minutes else "-", ", ".join(levels) or "-", " ".join(flags) or "-"]
+
+
+def format_candidate(idx, item, text_key="jd", text_chars=300, compact=False):
+    # Index texts start with a "Description:" label that only costs tokens here
+    text = " ".join(str(item.get(text_key) or "").split()).removeprefix("Description: ")[:text_chars]
+    if compact:
+        return " | ".join([f"[{idx}] {_field(item.get('assessment_name'))}", _field(item.get("test_type")),
+                           *_compact_fields(item), text or "-"])
+    return " | ".join([
+        f"[{idx}] {_field(item.get('assessment_name'))}",
+        _field(item.get("test_type")),
+        _field(item.get("duration")),
+        _field(item.get("job_levels")),
+        f"remote: {_field(item.get('remote_support'))}",
+        f"adaptive: {_field(item.get('adaptive_support'))}",
+        text or "-",
+    ])
+
+
+def format_candidates(items, text_key="jd", text_chars=300, compact=False):
+    """Render candidates as one numbered line each."""
+    return "\n".join(format_candidate(i, item, text_key, text_chars, compact) for i, item in enumerate(items))
+
+
+def _coerce_entry(entry):
+    """Normalize one ranking entry to (id, score, reason), or None if malformed."""
+    if isinstance(entry, dict):
+        entry = [entry.get("id"), entry.get("relevance_score", entry.get("score", 0)),
+                 entry.get("short_reason", entry.get("reason", ""))]
+    if not isinstance(entry, (list, tuple)) or not entry:
+        return None
+    try:
+        idx = int(entry[0])
+        score = float(entry[1]) if len(entry) > 1 else 0.0
+    except (TypeError, ValueError):
+        return None
+    reason = str(entry[2]) if len(entry) > 2 else ""
+    return idx, score, reason
+
+
+def parse_ranking(text):
+    """Parse the LLM answer into a list of (id, score, reason) tuples."""
+    text = text.strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r"\[.*\]", text, re.DOTALL)
+        if not match:
+            raise ValueError(f"Cannot parse JSON from reranker output: {text[:200]}")
+        data = json.loads(match.group(0))
+    if isinstance(data, dict):
+        data = data.get("ranking") or data.get("recommendations") or []
+    return [e for e in (_coerce_entry(x) for x in data) if e is not None]
+
+
+def join_ranking(ranking, items, max_recs=None, score_key="relevance_score", reason_key="short_reason"):
+    """Attach scores and reasons to copies of `items`, in ranked order.
+
+    Unknown and repeated ids are dropped.
+    """
+    seen = set()
+    out = []
+    for idx, score, reason in sorted(ranking, key=lambda e: e[1], reverse=True):
+        if idx in seen or not 0 <= idx < len(items):
+            continue
+        seen.add(idx)
+        item = dict(items[idx])
+        item[score_key] = max(0.0, min(1.0, score))
+        item[reason_key] = reason
+        out.append(item)
+    return out[:max_recs] if max_recs else out
+
+
+class RankingStreamParser:
+    """Incrementally parse a streamed ranking array.
+
+    `feed` takes the next chunk of model output and returns the entries whose
+    closing bracket has arrived, so reranked items can be forwarded while the
+    rest of the answer is still being generated. Anything before the opening
+    `[` (e.g. a markdown fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buf = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+    def feed(self, chunk):
+        entries = []
+        for ch in chunk:
+            if self._done:
+                break
+            if self._depth >= 2:
+                self._buf.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"' and self._depth >= 1:
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+                if self._depth == 2:
+                    self._buf = [ch]
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 1:
+                    entry = self._parse("".join(self._buf))
+                    if entry is not None:
+                        entries.append(entry)
+                    self._buf = []
+                elif self._depth == 0:
+                    self._done = True
+        return entries
+
+    @staticmethod
+    def _parse(text):
+        try:
+            return _coerce_entry(json.loads(text))
+        except json.JSONDecodeError:
+            return None
@@ -0,0 +1,93 @@
+import re
+import json
+
+from pydantic import BaseModel
+from typing import Literal
+
+# Response schema for recommendation endpoints, and its pre-serialized form.
+#
+# Every catalog item is validated against RecommendationItem and rendered to
+# JSON bytes once, when its index bundle is loaded (ResponseFragments). A
+# response is then the fragments of the ranked doc_ids joined into a fixed
+# envelope, so /recommend does no per-item dict building or JSON encoding.
+# Items without a doc_id from the serving bundle fall back to validating and
+# encoding on the spot, so the schema holds either way.
+
+
+class RecommendationItem(BaseModel):
+    url: str
+    assessment_name: str
+    adaptive_support: Literal["Yes", "No"]
+    description: str
+    duration: int | None
+    remote_support: Literal["Yes", "No"]
+    test_type: list[str]
+
+
+class RecommendResponse(BaseModel):
+    recommended_assessments: list[RecommendationItem]
+
+
+def _yes_no(value):
+    if isinstance(value, str):
+        return "Yes" if value.strip().lower() in ("yes", "true", "1", "y") else "No"
+    return "Yes" if value else "No"
+
+
+def _minutes(value):
+    # Old index pickles store durations as text ("30", "Approximate Completion Time in minutes = 30", "")
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if value != value else int(value)
+    match = re.search(r"\d+", str(value))
+    return int(match.group()) if match else None
+
+
+def _codes(value):
+    if isinstance(value, str):
+        return [t.strip() for t in value.split(",") if t.strip()]
+    return [str(t) for t in (value or [])]
+
+
+def to_item(meta):
+    """Validated response item for one catalog metadata dict (any index build's layout)."""
+    return RecommendationItem(
+        url=str(meta.get("url", "")),
+        assessment_name=str(meta.get("assessment_name", "")),
+        adaptive_support=_yes_no(meta.get("adaptive_support")),
+        description=str(meta.get("jd", meta.get("description", "")) or ""),
+        duration=_minutes(meta.get("duration")),
+        remote_support=_yes_no(meta.get("remote_support")),
+        test_type=_codes(meta.get("test_type")),
+    )
+
+
+def item_fragment(meta):
+    return to_item(meta).model_dump_json().encode("utf-8")
+
+
+class ResponseFragments:
+    """Pre-serialized RecommendationItem JSON for every item of one index bundle."""
+
+    def __init__(self, metas):
+        self.fragments = [item_fragment(m) for m in metas]
+
+    def get(self, item):
+        doc_id = item.get("doc_id")
+        if isinstance(doc_id, int) and 0 <= doc_id < len(self.fragments):
+            return self.fragments[doc_id]
+        return item_fragment(item)
+
+
+def render(items, fragments=None):
+    """JSON body {"recommended_assessments": [...]} as bytes."""
+    parts = (fragments.get(i) if fragments is not None else item_fragment(i) for i in items)
+    return b'{"recommended_assessments":[' + b",".join(parts) + b"]}"
+
+
+def add_fields(body, fields):
+    """Append top-level keys to a rendered JSON object body."""
+    extra = b"".join(b"," + json.dumps(k).encode("utf-8") + b":" + json.dumps(v).encode("utf-8")
+                     for k, v in fields.items())
+    return body[:-1] + extra + b"}"
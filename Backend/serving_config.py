@@ -0,0 +1,77 @@
+import os
+import json
+
+# Tunables shared by every recommender variant. Values in the JSON file
+# (written by Benchmarks/tune_depth.py and friends) override the defaults.
+SERVING_CONFIG_PATH = os.getenv("SERVING_CONFIG_PATH", "data/serving_config.json")
+
+DEFAULTS = {
+    # FAISS candidates fetched per query
+    "candidate_depth": 30,
+    # Candidates passed on to the LLM reranker
+    "rerank_depth": 30,
+    # Long queries are embedded as chunks of this many tokens (one batched
+    # call) and the per-chunk scores pooled with "max" or "mean"
+    "query_chunk_tokens": 512,
+    "query_chunk_overlap": 64,
+    "max_query_chunks": 16,
+    "chunk_pooling": "max",
+    # Queries of at most this many words are embedded by the local encoder
+    # (Benchmarks/tune_local_encoder.py) instead of the API; None disables it
+    "local_encoder_max_words": None,
+    # Search the multi-passage index (build_index.py --passages) and
+    # aggregate passage hits per assessment instead of the summary index
+    "passage_search": False,
+    # Cascade: trim the FAISS candidates to this many with the local scorer
+    # (BM25 + metadata + similarity) before reranking; None disables the stage
+    "trim_depth": None,
+    "cascade_weights": {"similarity": 1.0, "lexical": 0.5, "metadata": 0.3},
+    # "mmr" diversifies the candidates over the stored catalog vectors
+    # before reranking, keeping mmr_depth items (None -> rerank_depth)
+    "diversify": None,
+    "mmr_lambda": 0.7,
+    "mmr_depth": None,
+    # Warm cache (warm_cache.py): these queries plus the most frequent logged
+    # ones with at least warm_min_hits hits, warm_top_n in total, are
+    # precomputed and served without running the pipeline
+    "warm_queries": [],
+    "warm_top_n": 50,
+    "warm_min_hits": 3,
+    # Per-prompt token budget overrides, e.g. {"rerank": 4000} (defaults in prompts.py)
+    "prompt_budgets": {},
+    # "single" prompt or "sharded" parallel prompts
+    "rerank_mode": "single",
+    "rerank_shards": 3,
+    # "tournament" (final LLM pass over shard winners) or "score"
+    "shard_merge": "tournament",
+    # Winners each shard sends to the tournament; None -> ceil(1.5 * max_recs / shards)
+    "shard_winners": None,
+}
+
+
+def load_serving_config(path=SERVING_CONFIG_PATH):
+    config = dict(DEFAULTS)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    return config
+
+
+def save_serving_config(updates, path=SERVING_CONFIG_PATH):
+    """Merge `updates` into the JSON config file, keeping unrelated keys."""
+    current = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            current = json.load(f)
+    current.update(updates)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    return current
+
+
+CONFIG = load_serving_config()
+
+
+def get_setting(key):
+    return CONFIG.get(key, DEFAULTS.get(key))
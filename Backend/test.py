@@ -4,8 +4,11 @@ import json
 import pickle
 import faiss
 import numpy as np
-from openai import OpenAI
-from langchain_openai import OpenAIEmbeddings
+from llm_replay import make_client
+from llm_usage import llm_call
+from serving_config import get_setting
+from rerank_protocol import parse_ranking, join_ranking
+from prompts import compile_prompt
 
 # -----------------------------------------------------
 # CONFIGURATION
@@ -15,8 +18,7 @@ META_PATH = "data/faiss_index/index.pkl"
 EMBED_MODEL = "text-embedding-3-large"
 LLM_MODEL = "gpt-4.1"
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-embedder = OpenAIEmbeddings(model=EMBED_MODEL, api_key=os.getenv("OPENAI_API_KEY"))
+client = make_client(os.getenv("OPENAI_API_KEY"))
 
 
 # -----------------------------------------------------
@@ -46,8 +48,9 @@ index, METAS, TEXTS = load_faiss()
 # EMBEDDING + RETRIEVAL
 # -----------------------------------------------------
 def embed_query(text: str):
-    emb = embedder.embed_query(text)
-    return np.array(emb).reshape(1, -1)
+    response = llm_call("embed", client.embeddings.create, input=text, model=EMBED_MODEL)
+    emb = np.array(response.data[0].embedding, dtype=np.float32)
+    return emb.reshape(1, -1)
 
 
 def retrieve(query_text, top_k=50):
@@ -66,6 +69,14 @@ def retrieve(query_text, top_k=50):
     return results
 
 
+def test_type_codes(item):
+    """Test type codes as a list; older indexes store them as 'A, E, B'."""
+    types = item.get("test_type", [])
+    if isinstance(types, str):
+        types = [t.strip() for t in types.split(",") if t.strip()]
+    return types
+
+
 # -----------------------------------------------------
 # LLM CLASSIFICATION
 # -----------------------------------------------------
@@ -73,29 +84,10 @@ def classify_domains(query_text):
     """
     Use LLM to infer which SHL test domains (A, K, P, etc.) apply to the job description.
     """
-    prompt = f"""
-You are an expert in HR assessment taxonomy.
-
-Given the following hiring query, identify which SHL test domains are relevant.
-
-Test Type Map:
-- A = Ability/Aptitude
-- B = Biodata/Situational
-- C = Competency
-- D = Development/360
-- E = Assessment/Exercise
-- K = Knowledge/Skills
-- P = Personality/Behavior
-- S = Simulation
-
-Query:
-\"\"\"{query_text}\"\"\"
-
-Return only a JSON list of the detected domain codes, for example: ["K", "P"]
-"""
+    prompt = compile_prompt("classify_domains", query_text).text
 
     try:
-        response = client.responses.create(model=LLM_MODEL, input=prompt)
+        response = llm_call("classify", client.responses.create, model=LLM_MODEL, input=prompt)
         text = response.output_text.strip()
 
         # Try parsing JSON directly
@@ -123,51 +115,23 @@ def llm_rerank(query_text, retrieved_items, detected_domains=None, min_recs=5, m
     Always return between min_recs and max_recs items.
     """
     domains_str = ", ".join(detected_domains) if detected_domains else "N/A"
-    prompt = f"""
-You are an expert recommender system for SHL assessments. Determine the best assessements. Rerank the following assessments by how relevant they are to the hiring query below.
-Detected job types for this query: {domains_str}. Determine the best assessments based on the job level, job types and time duration.
-Ensure a balanced mix of assessments from different detected domains (e.g., technical + behavioral). 
-
-For each recommendation, output:
-- assessment_name
-- url
-- short_reason (1–2 sentences)
-- relevance_score (float between 0 and 1)
-
-Return ONLY a valid JSON array. No commentary, no markdown.
-
-User Query:
-\"\"\"{query_text}\"\"\"
-
-Assessments:
-{json.dumps(retrieved_items[:25], indent=2)}
-"""
+    candidates = retrieved_items[:get_setting("rerank_depth")]
+    compiled = compile_prompt("domain_rerank", query_text, candidates, domains=domains_str)
+    prompt = compiled.text
+    candidates = compiled.items
 
     try:
-        response = client.responses.create(model=LLM_MODEL, input=prompt)
-        text = response.output_text.strip()
-        ranked = json.loads(text)
-        final_results = []
-
-        for r in ranked:
-            name = r.get("assessment_name", "").lower()
-            match = next(
-                (d for d in retrieved_items if d.get("assessment_name", "").lower() == name),
-                None
-            )
-            if match:
-                match["short_reason"] = r.get("short_reason", "")
-                match["relevance_score"] = r.get("relevance_score", 0)
-                final_results.append(match)
+        response = llm_call("rerank", client.responses.create, model=LLM_MODEL, input=prompt)
+        final_results = join_ranking(parse_ranking(response.output_text), candidates)
 
         # Ensure coverage for missed domains
-        covered_types = {str(r.get("test_type", "")).upper() for r in final_results}
+        covered_types = {t.upper() for r in final_results for t in test_type_codes(r)}
         missing = [d for d in (detected_domains or []) if d not in covered_types]
         if missing:
             print(f"⚠️ LLM missed domains {missing}, adding backups.")
             for m in missing:
                 extra = next(
-                    (x for x in retrieved_items if str(x.get("test_type", "")).upper() == m),
+                    (x for x in retrieved_items if m in {t.upper() for t in test_type_codes(x)}),
                     None
                 )
                 if extra:
@@ -205,7 +169,7 @@ if __name__ == "__main__":
     detected_domains = classify_domains(query)
     print(f"🧭 Detected domains: {detected_domains}")
 
-    retrieved = retrieve(query, top_k=60)
+    retrieved = retrieve(query, top_k=get_setting("candidate_depth"))
     reranked = llm_rerank(query, retrieved, detected_domains, min_recs=5, max_recs=10)
 
     print("\n================= RESULTS =================")
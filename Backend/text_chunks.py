@@ -0,0 +1,74 @@
+import functools
+import threading
+
+# Token counting and chunking for the OpenAI models the recommenders call.
+# tiktoken is optional: without it (or offline, before its encoding files
+# are cached) tokens are approximated from words.
+
+EMBEDDING_ENCODING = "cl100k_base"   # text-embedding-3-*
+CHAT_ENCODING = "o200k_base"         # gpt-4o / gpt-4.1 family
+WORDS_PER_TOKEN = 0.75
+
+
+_ENCODING_LOCK = threading.Lock()
+
+
+def _encoding(name):
+    # Serialized so concurrent first calls do not all try to download the encoding
+    with _ENCODING_LOCK:
+        return _load_encoding(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(name):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # Not installed, or the encoding file cannot be downloaded (offline)
+        print(f"tiktoken unavailable ({e.__class__.__name__}); approximating tokens from words.")
+        return None
+
+
+def count_tokens(text, encoding=CHAT_ENCODING):
+    enc = _encoding(encoding)
+    if enc is None:
+        return int(len(str(text).split()) / WORDS_PER_TOKEN) + 1
+    return len(enc.encode(str(text), disallowed_special=()))
+
+
+def chunk_text(text, max_tokens=512, overlap=64, max_chunks=None, encoding=EMBEDDING_ENCODING):
+    """Split `text` into chunks of at most `max_tokens` tokens with `overlap` tokens shared."""
+    text = str(text)
+    enc = _encoding(encoding)
+    if enc is not None:
+        units = enc.encode(text, disallowed_special=())
+        size, shared = max_tokens, overlap
+        join = enc.decode
+    else:
+        units = text.split()
+        size = max(1, int(max_tokens * WORDS_PER_TOKEN))
+        shared = int(overlap * WORDS_PER_TOKEN)
+        join = " ".join
+
+    if len(units) <= size:
+        return [text]
+
+    step = max(1, size - shared)
+    # Stop once a window reaches the end, so no chunk is fully covered by its predecessor
+    starts = range(0, max(len(units) - shared, 1), step)
+    chunks = [join(units[i:i + size]) for i in starts]
+    chunks = [c for c in chunks if c.strip()] or [text]
+    return chunks[:max_chunks] if max_chunks else chunks
+
+
+def truncate_tokens(text, max_tokens, encoding=CHAT_ENCODING):
+    """`text` cut to its first `max_tokens` tokens (unchanged if it already fits)."""
+    text = str(text)
+    enc = _encoding(encoding)
+    if enc is None:
+        words = text.split()
+        size = max(1, int(max_tokens * WORDS_PER_TOKEN))
+        return text if len(words) <= size else " ".join(words[:size])
+    units = enc.encode(text, disallowed_special=())
+    return text if len(units) <= max_tokens else enc.decode(units[:max_tokens])
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+# Opt-in per-request tracing.
+#
+# A request is traced when it sends `X-Profile: 1` (or `X-Profile: flamegraph`)
+# or when profiling is switched on through POST /admin/profiling. Code marks
+# its stages with `with span("embed"):`; outside a traced request span() is a
+# no-op costing one context-variable lookup. A traced request can also run a
+# sampling profiler on its worker thread and dump the collapsed stacks
+# (flamegraph.pl / speedscope "folded" format) plus the span tree into
+# PROFILE_DIR. Flamegraphs cost a sampler thread and two files, so they are
+# only taken when the admin `flamegraph` setting is on or the request carries
+# the admin token; PROFILE_DIR keeps the newest PROFILE_MAX_FILES files.
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "5"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+# Admin toggle: trace every request (sample_rate of them) without the header
+SETTINGS = {
+    "enabled": os.getenv("PROFILING", "0") == "1",
+    "flamegraph": False,
+    "sample_rate": 1.0,
+}
+
+_trace = contextvars.ContextVar("trace", default=None)
+_depth = contextvars.ContextVar("trace_depth", default=0)
+
+
+class Trace:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+        self.flamegraph = None
+        self._lock = threading.Lock()
+
+    def add(self, name, start, end, depth, attrs):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((start - self.start) * 1000.0, 3),
+                "duration_ms": round((end - start) * 1000.0, 3),
+                "depth": depth,
+                "thread": threading.current_thread().name,
+                **attrs,
+            })
+
+    def totals(self):
+        """Summed duration per span name."""
+        totals = Counter()
+        for s in self.spans:
+            totals[s["name"]] += s["duration_ms"]
+        return dict(totals)
+
+    def server_timing(self):
+        """Server-Timing header value, readable in browser dev tools."""
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.totals().items())
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "total_ms": round(((self.end or time.perf_counter()) - self.start) * 1000.0, 3),
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+            "flamegraph": self.flamegraph,
+        }
+
+
+def current_trace():
+    return _trace.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _depth.reset(token)
+        trace.add(name, start, time.perf_counter(), depth, attrs)
+
+
+def in_current_context(fn):
+    """Wrap fn so pool threads record spans into the caller's trace."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval_ms` into folded-stack counts."""
+
+    def __init__(self, thread_id, interval_ms=PROFILE_SAMPLE_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000.0
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def save(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def prune_profiles(directory=PROFILE_DIR, keep=PROFILE_MAX_FILES):
+    """Delete all but the `keep` newest files in the profile directory."""
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+    paths = sorted((p for p in paths if os.path.isfile(p)), key=os.path.getmtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def profiling_requested(header_value, allow_flamegraph=False):
+    """(trace?, flamegraph?) for a request given its X-Profile header."""
+    value = (header_value or "").strip().lower()
+    if value in ("1", "true", "trace"):
+        return True, SETTINGS["flamegraph"]
+    if value == "flamegraph":
+        return True, SETTINGS["flamegraph"] or allow_flamegraph
+    if SETTINGS["enabled"] and uuid.uuid4().int % 10000 < SETTINGS["sample_rate"] * 10000:
+        return True, SETTINGS["flamegraph"]
+    return False, False
+
+
+@contextmanager
+def request_trace(name, header_value=None, allow_flamegraph=False):
+    """
+    Trace the enclosed request if profiling is requested; yields the Trace or
+    None. `allow_flamegraph` lets X-Profile: flamegraph sample the stack even
+    when the admin setting is off (the caller checked the admin token).
+    """
+    enabled, flamegraph = profiling_requested(header_value, allow_flamegraph)
+    if not enabled:
+        yield None
+        return
+
+    trace = Trace(name)
+    token = _trace.set(trace)
+    sampler = StackSampler(threading.get_ident()).start() if flamegraph else None
+    try:
+        yield trace
+    finally:
+        trace.end = time.perf_counter()
+        _trace.reset(token)
+        if sampler is not None:
+            sampler.stop()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            trace.flamegraph = os.path.join(PROFILE_DIR, f"{trace.id}.folded")
+            sampler.save(trace.flamegraph)
+            with open(os.path.join(PROFILE_DIR, f"{trace.id}.json"), "w") as f:
+                json.dump(trace.to_dict(), f, indent=2)
+            prune_profiles()
@@ -3,16 +3,15 @@ import faiss
 import pickle
 from pathlib import Path
 
-# Try new LangChain imports if available
-try:
-    from langchain_community.vectorstores import FAISS
-    from langchain_openai import OpenAIEmbeddings
-    LANGCHAIN_AVAILABLE = True
-except ImportError:
-    LANGCHAIN_AVAILABLE = False
-
-
 def view_chunks():
+    # LangChain is slow to import and only needed for LangChain-saved stores
+    try:
+        from langchain_community.vectorstores import FAISS
+        from langchain_openai import OpenAIEmbeddings
+        LANGCHAIN_AVAILABLE = True
+    except ImportError:
+        LANGCHAIN_AVAILABLE = False
+
     base_path = Path("data/faiss_index")
     index_file = base_path / "index.faiss"
     meta_file = base_path / "index.pkl"
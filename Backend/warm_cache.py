@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from serving_config import get_setting, CONFIG
+from prompts import prompt_versions
+
+# Precomputed responses for the recurring head of the query traffic.
+#
+# Role queries like "Java developer" or "sales graduate" come back again and
+# again. The API counts normalized text queries in a QueryLog; the warm set
+# is the serving config `warm_queries` list plus the `warm_top_n` most
+# frequent logged queries with at least `warm_min_hits` hits. For each of
+# them the full pipeline (retrieval and LLM rerank) is run once and the
+# rendered response body is kept, so /recommend answers them with a dict
+# lookup. It is a read-through cache: a logged query that turns hot is stored
+# the first time it is computed after reaching `warm_min_hits`.
+#
+# Entries are tagged with the index version they were computed on and are
+# only served while that version is the current one. An index swap clears
+# the cache and recomputes the warm set in the background, so entries never
+# point at catalog items of an older build. The cache file also records the
+# prompt ids (prompts.py) and a hash of the serving config, and is ignored
+# when either has changed since (e.g. after a tune_* --write).
+#
+#     python warm_cache.py --top 50     # precompute offline into WARM_CACHE_PATH
+
+WARM_CACHE_PATH = os.getenv("WARM_CACHE_PATH", "data/warm_cache.json")
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "data/query_log.json")
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "4"))
+WARM_MAX_RECS = 10
+# Pasted job descriptions do not recur; only short queries are counted
+MAX_QUERY_CHARS = 200
+
+
+def normalize_query(text):
+    return " ".join(str(text).lower().split()).strip(" .?!")
+
+
+class QueryLog:
+    """Hit counts of normalized text queries, persisted as JSON."""
+
+    def __init__(self, path=QUERY_LOG_PATH, max_queries=10000, save_every=100):
+        self.path = path
+        self.max_queries = max_queries
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.counts = Counter()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.counts.update(json.load(f))
+
+    def record(self, text):
+        key = normalize_query(text)
+        if not key or len(key) > MAX_QUERY_CHARS:
+            return 0
+        with self._lock:
+            self.counts[key] += 1
+            if len(self.counts) > 2 * self.max_queries:
+                self.counts = Counter(dict(self.counts.most_common(self.max_queries)))
+            self._unsaved += 1
+            hits = self.counts[key]
+        if self._unsaved >= self.save_every:
+            self.save()
+        return hits
+
+    def hits(self, text):
+        return self.counts.get(normalize_query(text), 0)
+
+    def top(self, n, min_hits=1):
+        with self._lock:
+            return [q for q, c in self.counts.most_common(n) if c >= min_hits]
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = dict(self.counts.most_common(self.max_queries))
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+
+def warm_queries(log=None):
+    """The configured queries, then the most frequent logged ones, up to `warm_top_n`."""
+    top_n = get_setting("warm_top_n")
+    queries = list(dict.fromkeys(normalize_query(q) for q in get_setting("warm_queries") or []))
+    if log is not None:
+        queries += [q for q in log.top(top_n, get_setting("warm_min_hits")) if q not in queries]
+    return queries[:top_n]
+
+
+def config_fingerprint():
+    """Hash of the serving config settings that shape answers (the warm_* keys do not)."""
+    settings = {k: v for k, v in CONFIG.items() if not k.startswith("warm_")}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def precompute(text, max_recs=WARM_MAX_RECS):
+    """(response body, index version) from the full pipeline, or None if not worth caching."""
+    import recommender
+    from responses import render
+
+    bundle = recommender.current_bundle()
+    recs = recommender.get_recommendations(text, max_recs=max_recs, use_llm=True)
+    # A degraded (fallback) answer or one that straddled an index swap is not kept
+    if not recs or any(r.get("short_reason") == recommender.FALLBACK_REASON for r in recs):
+        return None
+    if recommender.current_bundle() is not bundle:
+        return None
+    return render(recs, bundle.fragments), bundle.version
+
+
+class WarmCache:
+    """Response bodies per normalized query, valid for one index version."""
+
+    def __init__(self, log=None, compute=precompute, path=WARM_CACHE_PATH):
+        self.log = log
+        self.compute = compute
+        self.path = path
+        self.queries = set()
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.status = {"state": "empty", "version": None, "queries": 0, "entries": 0, "failed": 0,
+                       "hits": 0, "misses": 0, "refreshes": 0, "last_refresh_at": None, "refresh_ms": None}
+
+    def get(self, text, version):
+        entry = self._entries.get(normalize_query(text))
+        if entry is not None and entry["version"] == version:
+            self.status["hits"] += 1
+            return entry["body"]
+        self.status["misses"] += 1
+        return None
+
+    def wants(self, text):
+        """True for warm-set queries and logged queries that have turned hot."""
+        key = normalize_query(text)
+        if key in self.queries:
+            return True
+        return (self.log is not None and self.log.hits(key) >= get_setting("warm_min_hits")
+                and len(self._entries) < get_setting("warm_top_n"))
+
+    def put(self, text, body, version):
+        with self._lock:
+            self._entries[normalize_query(text)] = {"body": body, "version": version, "built_at": time.time()}
+            self.status["entries"] = len(self._entries)
+
+    def covers(self, version):
+        return self.status["version"] == version and self.status["state"] == "ready"
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = {}
+            self.status.update(state="empty", version=None, entries=0)
+
+    def refresh(self, queries=None):
+        """Recompute the warm set and replace every entry at once."""
+        with self._refresh_lock:
+            queries = warm_queries(self.log) if queries is None else [normalize_query(q) for q in queries]
+            self.status.update(state="refreshing", queries=len(queries))
+            start = time.perf_counter()
+
+            def one(query):
+                try:
+                    return query, self.compute(query)
+                except Exception as e:
+                    print(f"⚠️ Warm cache: '{query[:60]}' failed: {e}")
+                    return query, None
+
+            with ThreadPoolExecutor(max_workers=max(1, WARM_CONCURRENCY)) as pool:
+                results = list(pool.map(one, queries))
+
+            now = time.time()
+            entries = {q: {"body": r[0], "version": r[1], "built_at": now} for q, r in results if r is not None}
+            versions = Counter(e["version"] for e in entries.values())
+            with self._lock:
+                self.queries = set(queries)
+                self._entries = entries
+            elapsed = (time.perf_counter() - start) * 1000.0
+            self.status.update(state="ready", version=versions.most_common(1)[0][0] if versions else None,
+                               entries=len(entries), failed=len(queries) - len(entries),
+                               refreshes=self.status["refreshes"] + 1, last_refresh_at=now, refresh_ms=elapsed)
+            print(f"🔥 Warm cache: {len(entries)}/{len(queries)} queries precomputed "
+                  f"for index {self.status['version']} in {elapsed:.0f} ms")
+        if self.log is not None:
+            self.log.save()
+        self.save()
+        return self.status
+
+    def refresh_in_background(self, queries=None):
+        def run():
+            try:
+                self.refresh(queries)
+            except Exception as e:
+                self.status.update(state="failed")
+                print(f"⚠️ Warm cache refresh failed: {e}")
+
+        threading.Thread(target=run, name="warm-cache", daemon=True).start()
+
+    def on_index_swap(self, bundle):
+        """HotSwap listener: drop entries of the old build and recompute for the new one."""
+        # Queries warmed on request (POST /admin/warm-cache) stay in the set
+        queries = list(dict.fromkeys(warm_queries(self.log) + sorted(self.queries)))
+        self.invalidate()
+        print(f"🔄 Index {bundle.version} swapped in, refreshing the warm cache...")
+        self.refresh_in_background(queries)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = {q: {**e, "body": e["body"].decode("utf-8")} for q, e in self._entries.items()}
+            queries = sorted(self.queries)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"prompts": prompt_versions(), "config": config_fingerprint(),
+                       "queries": queries, "entries": entries}, f)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        """Entries saved by an earlier process or the CLI; False if missing or built with other prompts or config."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("prompts") != prompt_versions():
+            print(f"Ignoring {self.path}: computed with different prompts")
+            return False
+        if data.get("config") != config_fingerprint():
+            print(f"Ignoring {self.path}: computed with a different serving config")
+            return False
+        entries = {q: {**e, "body": e["body"].encode("utf-8")} for q, e in data.get("entries", {}).items()}
+        versions = Counter(e["version"] for e in entries.values())
+        with self._lock:
+            self.queries = set(data.get("queries", []))
+            self._entries = entries
+        self.status.update(state="ready", version=versions.most_common(1)[0][0] if versions else None,
+                           queries=len(self.queries), entries=len(entries))
+        return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute responses for the most frequent queries.")
+    parser.add_argument("--top", type=int, default=None, help="warm_top_n override")
+    parser.add_argument("--queries", nargs="*", default=None, help="Queries to warm instead of the log + config")
+    args = parser.parse_args()
+
+    if args.top is not None:
+        from serving_config import CONFIG
+        CONFIG["warm_top_n"] = args.top
+    cache = WarmCache(QueryLog())
+    status = cache.refresh(args.queries)
+    print(json.dumps(status, indent=2))